@@ -0,0 +1,142 @@
+import gc
+import json
+import random
+import tracemalloc
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Optional
+from sys import path as sys_path
+sys_path += ['modules', 'modules/data collector']
+import pyarrow as pa
+from columnar_accumulator import ColumnarAccumulator
+from youtube_data import YouTubeVideoComments
+from youtube_data_schema import VIDEO_COMMENTS_SCHEMA, build_table_from_rows
+
+@dataclass
+class UnslottedYouTubeVideoComments:
+    # "YouTubeVideoComments" as it was before the slotted records, one "__dict__" per comment
+    author: str
+    text: str
+    like_count: int
+    reply_count: int
+    published_time: str
+    comment_id: Optional[str] = None
+
+def generate_comment_pages(video_count: int, comments_per_video: int, seed: int = 0) -> list[tuple[str, str]]:
+    # the "commentThreads" items of every video, as the JSON text returned by the API (parsed during the collection, like a response)
+    random_generator = random.Random(seed)
+    words: list[str] = ['great', 'video', '台灣', 'news', 'lol', 'agree', 'really', 'this', 'is', 'the', 'best', '😀', 'politics', 'thanks']
+    return [
+        (
+            f"video{index_video:07d}",
+            json.dumps([
+                {'id': f"Ugx{index_video:07d}{index_comment:06d}", 'snippet': {'totalReplyCount': random_generator.randint(0, 20), 'topLevelComment': {'snippet': {
+                    'authorDisplayName': f"@user{random_generator.randint(0, 99999)}",
+                    'textDisplay': ' '.join(random_generator.choices(words, k=random_generator.randint(3, 30))),
+                    'likeCount': random_generator.randint(0, 5000),
+                    'publishedAt': '2025-02-14T05:58:02Z',
+                }}}}
+                for index_comment in range(comments_per_video)
+            ], ensure_ascii=False)
+        )
+        for index_video in range(video_count)
+    ]
+
+def parse_comments(comment_threads: list[dict[str, any]], comment_class: type) -> list[any]:
+    # as "YouTubeCrawler.get_video_comments"
+    return [
+        comment_class(
+            author=comment_thread['snippet']['topLevelComment']['snippet']['authorDisplayName'],
+            text=comment_thread['snippet']['topLevelComment']['snippet']['textDisplay'],
+            like_count=comment_thread['snippet']['topLevelComment']['snippet']['likeCount'],
+            reply_count=comment_thread['snippet']['totalReplyCount'],
+            published_time=comment_thread['snippet']['topLevelComment']['snippet']['publishedAt'],
+            comment_id=comment_thread['id']
+        )
+        for comment_thread in comment_threads
+    ]
+
+def collect_as_objects(comment_pages: list[tuple[str, str]]) -> list[tuple[str, list[UnslottedYouTubeVideoComments]]]:
+    # the previous "DataCollector" path: every "YouTubeVideo" and its comments are kept until "store_data"
+    return [(video_id, parse_comments(json.loads(comment_threads_text), UnslottedYouTubeVideoComments)) for video_id, comment_threads_text in comment_pages]
+
+def build_table_from_objects(videos: list[tuple[str, list[UnslottedYouTubeVideoComments]]]) -> pa.Table:
+    # ... then walked again to build the rows, transposed into columns by "build_table_from_rows"
+    video_comments_list: list[list[any]] = []
+    for video_id, comments in videos:
+        video_comments_list += [[video_id, comment.text, comment.like_count, comment.reply_count, comment.comment_id] for comment in comments]
+    return build_table_from_rows(video_comments_list, VIDEO_COMMENTS_SCHEMA)
+
+def collect_as_columns(comment_pages: list[tuple[str, str]]) -> ColumnarAccumulator:
+    # the "DataCollector" path now: the comments of a video are appended to the columns as they arrive, the records are then dropped
+    video_comments = ColumnarAccumulator(VIDEO_COMMENTS_SCHEMA)
+    for video_id, comment_threads_text in comment_pages:
+        comments: list[YouTubeVideoComments] = parse_comments(json.loads(comment_threads_text), YouTubeVideoComments)
+        video_comments.append_columns([
+            [video_id] * len(comments),
+            [comment.text for comment in comments],
+            [comment.like_count for comment in comments],
+            [comment.reply_count for comment in comments],
+            [comment.comment_id for comment in comments],
+        ])
+    return video_comments
+
+def measure(collect: Callable[[list[tuple[str, str]]], any], build_table: Callable[[any], pa.Table], comment_pages: list[tuple[str, str]]) -> dict[str, float]:
+    # timed without "tracemalloc" (which slows the allocations down), then run again traced for the memory
+    gc.collect()
+    start_time: float = perf_counter()
+    collected_data: any = collect(comment_pages)
+    collect_time_s: float = perf_counter() - start_time
+    start_time = perf_counter()
+    table: pa.Table = build_table(collected_data)
+    build_time_s: float = perf_counter() - start_time
+    del collected_data, table
+
+    gc.collect()
+    arrow_start_bytes: int = pa.total_allocated_bytes()
+    tracemalloc.start()
+    collected_data = collect(comment_pages)
+    held_megabytes: float = (tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes() - arrow_start_bytes) / 1024 / 1024
+    table = build_table(collected_data)
+    peak_python_megabytes: float = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+
+    return {'row_count': table.num_rows, 'collect_time_s': collect_time_s, 'build_time_s': build_time_s, 'held_megabytes': held_megabytes, 'peak_python_megabytes': peak_python_megabytes}
+
+def benchmark_collected_data(comment_count: int = 100000, comments_per_video: int = 1000):
+    '''
+    Compare the memory held by the collected comments and the time to build their Arrow table,
+    between the per-comment dataclass objects kept until "store_data" (before) and the "ColumnarAccumulator" of "DataCollector" (now)
+
+    The memory held is that of the Python objects (traced by "tracemalloc") and of the Arrow buffers once every comment is collected,
+    the Python peak also covers the build of the table.
+
+    Example:
+        python ./benchmarks/benchmark_collected_data.py --comment-count 200000
+    '''
+    comment_pages: list[tuple[str, str]] = generate_comment_pages(max(1, comment_count // comments_per_video), comments_per_video)
+
+    results: dict[str, dict[str, float]] = {
+        'objects': measure(collect_as_objects, build_table_from_objects, comment_pages),
+        'columnar': measure(collect_as_columns, lambda video_comments: video_comments.to_table(), comment_pages),
+    }
+
+    for path, result in results.items():
+        print(
+            f"{path:<9} {result['row_count']} comments: held \033[96m{result['held_megabytes']:.1f} MB\033[0m after collection, "
+            f"Python peak \033[96m{result['peak_python_megabytes']:.1f} MB\033[0m, collect \033[96m{result['collect_time_s']:.2f} s\033[0m, table built in \033[96m{result['build_time_s']:.3f} s\033[0m",
+            end='\n', flush=True
+        )
+    print(
+        f"columnar: \033[92m{results['objects']['held_megabytes'] / results['columnar']['held_megabytes']:.1f}x\033[0m less memory held, "
+        f"table built \033[92m{results['objects']['build_time_s'] / results['columnar']['build_time_s']:.1f}x\033[0m faster",
+        end='\n', flush=True
+    )
+
+if __name__ == '__main__':
+    argument_parser = ArgumentParser(description="Benchmark the memory and time of the collected comments, per-comment objects against the columnar accumulator")
+    argument_parser.add_argument('--comment-count', type=int, default=100000)
+    argument_parser.add_argument('--comments-per-video', type=int, default=1000)
+    arguments = argument_parser.parse_args()
+    benchmark_collected_data(comment_count=arguments.comment_count, comments_per_video=arguments.comments_per_video)
@@ -0,0 +1,31 @@
+from time import time
+from sys import path as sys_path
+from benchmark_environment import REPOSITORY_PATH, offline_working_folder
+sys_path += [f"{REPOSITORY_PATH}/modules", f"{REPOSITORY_PATH}/modules/data collector"] # absolute, the benchmark runs in a temporary folder
+from data_collector import DataCollector
+from utilities import get_refined_time_string
+from youtube_api_stub import YouTubeAPIStub, YouTubeAPIStubSettings
+
+def benchmark_concurrent_comments(worker_counts: tuple[int, ...] = (1, 2, 4, 8), max_videos: int = 16, max_comments: int = 15, latency_s: float = 0.05):
+    '''
+    Time "DataCollector.collect_videos" against a local YouTube API stub for several worker counts
+
+    Example:
+        python ./benchmarks/benchmark_concurrent_comments.py
+    '''
+    settings = YouTubeAPIStubSettings(latency_s=latency_s, comment_pages_per_video=max_comments // 3, comment_page_size=3)
+
+    with YouTubeAPIStub(settings) as stub:
+        for max_workers in worker_counts:
+            with offline_working_folder(): # a fresh folder per worker count, the checkpoint of the previous run would be resumed
+                data_collector = DataCollector('TW', show_progress_bar=False, max_workers=max_workers, api_endpoint=stub.api_endpoint)
+                data_collector.set_interest_categories('politics')
+
+                start_time: float = time()
+                data_collector.collect_videos(max_videos=max_videos, max_comments=max_comments)
+                running_time: float = time() - start_time
+
+            print(f"\033[96m{max_workers}\033[0m worker(s): {max_videos} videos collected in \033[92m{get_refined_time_string(running_time)}\033[0m", end='\n', flush=True)
+
+if __name__ == '__main__':
+    benchmark_concurrent_comments()
@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import resource
+from argparse import ArgumentParser
+from time import time
+from typing import Optional
+from sys import path as sys_path
+from benchmark_environment import REPOSITORY_PATH, offline_working_folder
+sys_path += [f"{REPOSITORY_PATH}/modules", f"{REPOSITORY_PATH}/modules/data collector"] # absolute, the benchmark runs in a temporary folder
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_collector import DataCollector
+from google_drive_uploader import GoogleDriveUploader
+from request_executor import RequestExecutor
+from storage_backend import StorageBackend, InMemoryStorageBackend, GoogleDriveStorageBackend
+from utilities import load_configs, get_refined_time_string
+from video_registry import VideoRegistry
+from youtube_api_stub import YouTubeAPIStub, YouTubeAPIStubSettings
+
+def benchmark_data_collector(max_videos: int = 20, max_comments: int = 30, categories: tuple[str, ...] = ('trending', 'news', 'politics'), storage: str = 'memory',
+                             max_workers: int = 1, latency_s: float = 0.01, error_rate: float = 0.0, share_videos: bool = False, json_output_path: Optional[str] = None) -> dict[str, any]:
+    '''
+    Run "DataCollector" end-to-end (collect, then store every category) against the local YouTube and Drive API stub,
+    and report the videos/s, comments/s, peak memory and API calls of the run
+
+    It runs in a temporary copy of "configs.yaml", so the caches, checkpoints and data of the repository are left untouched.
+    "storage" is "memory" ("InMemoryStorageBackend") or "drive" (the Drive endpoints of the stub, through "GoogleDriveStorageBackend").
+    With "share_videos", the categories share a "VideoRegistry" as in "main_codes/data_pipeline.py" (every category of the stub finds the same videos).
+
+    Example:
+        python ./benchmarks/benchmark_data_collector.py --max-videos 50 --error-rate 0.05 --json-output ./benchmark.json
+    '''
+    settings = YouTubeAPIStubSettings(latency_s=latency_s, comment_pages_per_video=max(1, max_comments // 3), comment_page_size=3, error_rate=error_rate)
+
+    with offline_working_folder(), YouTubeAPIStub(settings) as stub:
+        request_executor = RequestExecutor(max_retries=8, base_backoff_s=0.01, max_backoff_s=0.1) # the injected errors are retried without slowing the benchmark down
+        storage_backend: StorageBackend = InMemoryStorageBackend()
+        if storage == 'drive':
+            storage_backend = GoogleDriveStorageBackend(
+                folder_ids={interested_category: f"stub-folder-{interested_category}" for interested_category in load_configs()['folder_name_to_save_data'].keys()},
+                google_drive_uploader=GoogleDriveUploader(request_executor=request_executor, api_endpoint=stub.drive_api_endpoint)
+            )
+
+        video_registry: Optional[VideoRegistry] = VideoRegistry() if share_videos else None
+        start_time: float = time()
+        for interested_category in categories:
+            data_collector = DataCollector('TW', show_progress_bar=False, max_workers=max_workers, api_endpoint=stub.api_endpoint, interested_category=interested_category,
+                                           request_executor=request_executor, use_response_cache=False, storage_backend=storage_backend, video_registry=video_registry)
+            data_collector.collect_videos(max_videos=max_videos, max_comments=max_comments)
+            data_collector.store_data()
+            data_collector.clean_cached_data()
+        running_time: float = time() - start_time
+
+        row_counts: dict[str, int] = count_stored_rows(storage_backend, categories)
+
+    results: dict[str, any] = {
+        'running_time_s': running_time,
+        'video_count': row_counts.get('video_info', 0),
+        'comment_count': row_counts.get('video_comments', 0),
+        'videos_per_s': row_counts.get('video_info', 0) / running_time,
+        'comments_per_s': row_counts.get('video_comments', 0) / running_time,
+        'peak_rss_megabytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, # kilobytes on Linux
+        'peak_arrow_megabytes': pa.default_memory_pool().max_memory() / 1024 / 1024,
+        'api_call_count': sum(stub.request_counts.values()),
+        'api_call_counts': dict(stub.request_counts),
+        'retry_counts': request_executor.get_retry_counts(),
+        'saved_api_call_count': 0 if video_registry is None else video_registry.get_saved_call_count(),
+        'injected_error_counts': dict(stub.injected_error_counts),
+    }
+
+    print(f"{len(categories)} categories collected and stored in \033[92m{get_refined_time_string(running_time)}\033[0m ({storage} storage)", end='\n', flush=True)
+    print(f"throughput: \033[96m{results['videos_per_s']:.1f}\033[0m videos/s, \033[96m{results['comments_per_s']:.1f}\033[0m comments/s ({results['video_count']} videos, {results['comment_count']} comments)", end='\n', flush=True)
+    print(f"peak memory: \033[96m{results['peak_rss_megabytes']:.1f}\033[0m MB RSS, \033[96m{results['peak_arrow_megabytes']:.1f}\033[0m MB Arrow", end='\n', flush=True)
+    print(f"API calls: \033[96m{results['api_call_count']}\033[0m {results['api_call_counts']}, retries: {results['retry_counts']}", end='\n', flush=True)
+    if video_registry is not None:
+        print(f"shared videos: \033[96m{results['saved_api_call_count']}\033[0m API calls saved {video_registry.get_report()}", end='\n', flush=True)
+
+    if json_output_path is not None:
+        with open(json_output_path, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return results
+
+def count_stored_rows(storage_backend: StorageBackend, categories: tuple[str, ...]) -> dict[str, int]:
+    # the rows of every kind of data, read back from the Parquet footers of the stored files
+    row_counts: dict[str, int] = {}
+    for interested_category in categories:
+        for file_name in storage_backend.list_file_names(interested_category):
+            data_name: str = os.path.splitext(file_name.split('_', 1)[1])[0].removesuffix('_delta')
+            row_counts[data_name] = row_counts.get(data_name, 0) + pq.read_metadata(io.BytesIO(storage_backend.read_bytes(interested_category, file_name))).num_rows
+    return row_counts
+
+if __name__ == '__main__':
+    argument_parser = ArgumentParser(description="Benchmark the data collection end-to-end against a local YouTube and Google Drive API stub")
+    argument_parser.add_argument('--max-videos', type=int, default=20)
+    argument_parser.add_argument('--max-comments', type=int, default=30)
+    argument_parser.add_argument('--storage', choices=('memory', 'drive'), default='memory')
+    argument_parser.add_argument('--max-workers', type=int, default=1)
+    argument_parser.add_argument('--latency-s', type=float, default=0.01, help="the latency of every stub response")
+    argument_parser.add_argument('--error-rate', type=float, default=0.0, help="the share of the stub responses replaced by a retryable 503 error")
+    argument_parser.add_argument('--share-videos', action='store_true', help="share the statistics and comments of the videos across the categories")
+    argument_parser.add_argument('--json-output', type=str, default=None, help="also write the results to this JSON file, e.g. for CI")
+    arguments = argument_parser.parse_args()
+
+    benchmark_data_collector(max_videos=arguments.max_videos, max_comments=arguments.max_comments, storage=arguments.storage, max_workers=arguments.max_workers,
+                             latency_s=arguments.latency_s, error_rate=arguments.error_rate, share_videos=arguments.share_videos, json_output_path=arguments.json_output)
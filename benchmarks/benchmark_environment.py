@@ -0,0 +1,27 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+REPOSITORY_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@contextmanager
+def offline_working_folder() -> Iterator[str]:
+    '''
+    Run a benchmark in a temporary folder holding a copy of "configs.yaml",
+    so the checkpoints, caches and data of a benchmark neither touch the repository nor leak into the next benchmark (e.g. a resumed checkpoint)
+
+    Example:
+        with offline_working_folder(), YouTubeAPIStub() as stub:
+            data_collector = DataCollector('TW', api_endpoint=stub.api_endpoint)
+    '''
+    os.environ.setdefault('YOUTUBE_API_KEY', 'stub-api-key') # the stub accepts any key, "build" only needs one to skip default credentials
+    original_folder_path: str = os.getcwd()
+    with tempfile.TemporaryDirectory() as working_folder_path:
+        shutil.copy(f"{REPOSITORY_PATH}/configs.yaml", f"{working_folder_path}/configs.yaml")
+        os.chdir(working_folder_path)
+        try:
+            yield working_folder_path
+        finally:
+            os.chdir(original_folder_path)
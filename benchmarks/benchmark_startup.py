@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+from benchmark_environment import REPOSITORY_PATH
+sys.path += [f"{REPOSITORY_PATH}/modules", f"{REPOSITORY_PATH}/modules/data collector"]
+from utilities import get_refined_time_string
+
+ENTRY_POINTS: tuple[str, ...] = ('clean_all_data', 'clean_expired_data', 'compact_data', 'clean_online_data', 'data_pipeline')
+HEAVY_MODULES: tuple[str, ...] = ('pandas', 'pyarrow', 'googleapiclient')
+EAGER_IMPORTS: str = 'import pandas, pyarrow.dataset, googleapiclient.discovery' # what every entry point imported before the imports were deferred
+
+def time_entry_point_import(entry_point: str, repeat: int, eager: bool = False) -> tuple[float, list[str]]:
+    '''
+    Import "main_codes/{entry_point}.py" in a fresh interpreter "repeat" times (its "__main__" block is not run)
+
+    Returns:
+        (best_time_s, heavy_modules): the fastest startup and the heavy modules it imported
+    '''
+    code: str = (
+        f"import sys; sys.path[:0] = ['main_codes']; {EAGER_IMPORTS + '; ' if eager else ''}import {entry_point}; "
+        f"print(','.join(module for module in {HEAVY_MODULES!r} if module in sys.modules))"
+    )
+    best_time_s: float = float('inf')
+    for _ in range(repeat):
+        start_time: float = perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], cwd=REPOSITORY_PATH, capture_output=True, text=True, check=True)
+        best_time_s = min(best_time_s, perf_counter() - start_time)
+    return best_time_s, [module for module in result.stdout.strip().split(',') if module]
+
+def time_service_build(repeat: int) -> tuple[float, float]:
+    '''
+    Returns:
+        (build_time_s, cached_build_time_s): "googleapiclient.discovery.build" (the bundled document parsed on every call)
+            against "build_google_api_service" (parsed once), per YouTube service
+    '''
+    from googleapiclient.discovery import build
+    from utilities import build_google_api_service
+
+    build_google_api_service('youtube', 'v3', developerKey='benchmark') # the first call parses the document
+    start_time: float = perf_counter()
+    for _ in range(repeat):
+        build(serviceName='youtube', version='v3', developerKey='benchmark')
+    build_time_s: float = (perf_counter() - start_time) / repeat
+
+    start_time = perf_counter()
+    for _ in range(repeat):
+        build_google_api_service('youtube', 'v3', developerKey='benchmark')
+    return build_time_s, (perf_counter() - start_time) / repeat
+
+def time_configs_load(repeat: int) -> tuple[float, float]:
+    '''
+    Returns:
+        (parse_time_s, cached_load_time_s): parsing "configs.yaml" against "load_configs" of an unchanged file
+    '''
+    import yaml
+    from utilities import load_configs
+
+    file_path: str = f"{REPOSITORY_PATH}/configs.yaml"
+    start_time: float = perf_counter()
+    for _ in range(repeat):
+        with open(file_path, 'r') as file:
+            yaml.safe_load(file)
+    parse_time_s: float = (perf_counter() - start_time) / repeat
+
+    load_configs(file_path)
+    start_time = perf_counter()
+    for _ in range(repeat):
+        load_configs(file_path)
+    return parse_time_s, (perf_counter() - start_time) / repeat
+
+def benchmark_startup(repeat: int = 5):
+    '''
+    Compare the startup of every entry point with the heavy modules imported eagerly (as before) and deferred (as now),
+    and the cost of building a Google API service and loading "configs.yaml" with and without the per-process caches
+
+    Example:
+        python ./benchmarks/benchmark_startup.py --repeat 5
+    '''
+    for entry_point in ENTRY_POINTS:
+        eager_time_s, _ = time_entry_point_import(entry_point, repeat, eager=True)
+        deferred_time_s, heavy_modules = time_entry_point_import(entry_point, repeat)
+        print(
+            f"{entry_point:<20} eager: \033[93m{get_refined_time_string(eager_time_s)}\033[0m, deferred: \033[92m{get_refined_time_string(deferred_time_s)}\033[0m "
+            f"(\033[96m{eager_time_s / deferred_time_s:.1f}x\033[0m), imports: {', '.join(heavy_modules) if heavy_modules else 'none of ' + ', '.join(HEAVY_MODULES)}",
+            end='\n', flush=True
+        )
+
+    build_time_s, cached_build_time_s = time_service_build(repeat * 10)
+    print(f"YouTube service build: \033[93m{build_time_s * 1000:.2f} ms\033[0m, cached discovery document: \033[92m{cached_build_time_s * 1000:.2f} ms\033[0m", end='\n', flush=True)
+    parse_time_s, cached_load_time_s = time_configs_load(repeat * 100)
+    print(f"configs.yaml parse: \033[93m{parse_time_s * 1000:.3f} ms\033[0m, cached load: \033[92m{cached_load_time_s * 1000:.3f} ms\033[0m", end='\n', flush=True)
+
+if __name__ == '__main__':
+    argument_parser = ArgumentParser(description="Benchmark the startup of the entry points, the Google API service build and the config loading")
+    argument_parser.add_argument('--repeat', type=int, default=5, help="the fastest of this many runs is reported")
+    arguments = argument_parser.parse_args()
+    os.chdir(REPOSITORY_PATH)
+    benchmark_startup(repeat=arguments.repeat)
@@ -0,0 +1,62 @@
+import html
+import random
+import re
+from time import time
+from sys import path as sys_path
+sys_path += ['modules', 'modules/data collector']
+import pyarrow as pa
+from snapshot_dataset import SnapshotDataset
+from text_cleaning import clean_text_array
+from utilities import get_refined_time_string
+
+COMMENT_PARTS: list[str] = [
+    'Great video', 'I don&#39;t agree', '&quot;quoted&quot;', 'Tom &amp; Jerry', '<br>', '<a href="https://www.youtube.com/watch?v=QyLM3PyepZw&amp;t=42">0:42</a>',
+    '台灣加油', '&lt;3', '😀', '&#128512;', '&nbsp;', '  ', '\n', 'lol', '<b>bold</b>', 'AT&amp;T', '&eacute;t&eacute;',
+]
+
+def generate_comments(comment_count: int, seed: int = 0) -> list[str]:
+    random_generator = random.Random(seed)
+    return [' '.join(random_generator.choices(COMMENT_PARTS, k=random_generator.randint(3, 12))) for _ in range(comment_count)]
+
+def load_comments(comment_count: int) -> list[str]:
+    # the raw comments of the saved snapshots, repeated up to "comment_count", generated ones when there is no snapshot
+    saved_comments: list[str] = [text for text in SnapshotDataset('video_comments').to_table(columns=['text'])['text'].to_pylist() if text is not None]
+    if not saved_comments:
+        return generate_comments(comment_count)
+    return (saved_comments * (comment_count // len(saved_comments) + 1))[:comment_count]
+
+def clean_text_per_string(text: str) -> str:
+    # the same cleaning one string at a time, as a per-comment "str.replace" chain would have to do it
+    text = re.sub(r'(?i)<br\s*/?>', ' ', text)
+    text = re.sub(r'<[^<>]*>', '', text)
+    text = html.unescape(text)
+    return re.sub(r'[ \t\n\v\f\r\xa0\u3000]+', ' ', text).strip(' ')
+
+def benchmark_text_cleaning(comment_count: int = 1_000_000, use_saved_comments: bool = True):
+    '''
+    Time the column-wide "clean_text_array" against cleaning every comment on its own,
+    on the saved comments (collected before the cleaning stage existed, so still raw HTML) or on generated ones
+
+    Example:
+        python ./benchmarks/benchmark_text_cleaning.py
+    '''
+    comments: list[str] = load_comments(comment_count) if use_saved_comments else generate_comments(comment_count)
+    comment_array: pa.Array = pa.array(comments, type=pa.string())
+
+    start_time: float = time()
+    per_string_cleaned_comments: list[str] = [clean_text_per_string(comment) for comment in comments]
+    per_string_running_time: float = time() - start_time
+
+    start_time = time()
+    vectorized_cleaned_comments: pa.Array = clean_text_array(comment_array)
+    vectorized_running_time: float = time() - start_time
+
+    mismatch_count: int = sum(per_string != vectorized for per_string, vectorized in zip(per_string_cleaned_comments, vectorized_cleaned_comments.to_pylist()))
+    print(f"per string: {comment_count} comments cleaned in \033[92m{get_refined_time_string(per_string_running_time)}\033[0m", end='\n', flush=True)
+    print(f"vectorized: {comment_count} comments cleaned in \033[92m{get_refined_time_string(vectorized_running_time)}\033[0m (\033[96m{per_string_running_time / vectorized_running_time:.1f}x\033[0m, {mismatch_count} different results)", end='\n', flush=True)
+
+if __name__ == '__main__':
+    print("saved comments:")
+    benchmark_text_cleaning(use_saved_comments=True)
+    print("generated comments (most holding rare entities that need \"html.unescape\", the worst case):")
+    benchmark_text_cleaning(use_saved_comments=False)
@@ -0,0 +1,37 @@
+import json
+import os
+from argparse import ArgumentParser
+from googleapiclient.discovery import build
+
+def record_youtube_fixtures(fixture_folder_path: str, location: str = 'TW', query: str = 'news'):
+    '''
+    Record one real response of every YouTube endpoint used by "YouTubeCrawler" into "{fixture_folder_path}/{endpoint}.json",
+    for "YouTubeAPIStubSettings(fixture_folder_path=...)" to serve real-shaped data offline (needs "YOUTUBE_API_KEY", about 105 quota units)
+
+    Example:
+        python ./benchmarks/record_youtube_fixtures.py --fixture-folder-path ./benchmarks/fixtures
+    '''
+    youtube_service = build(serviceName='youtube', version='v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
+
+    responses: dict[str, dict[str, any]] = {}
+    responses['videos'] = youtube_service.videos().list(part='id,snippet,statistics', chart='mostPopular', regionCode=location, maxResults=10).execute()
+    responses['search'] = youtube_service.search().list(q=query, part='id,snippet', regionCode=location, maxResults=10, order='viewCount').execute()
+
+    video_id: str = responses['videos']['items'][0]['id']
+    responses['commentThreads'] = youtube_service.commentThreads().list(part='snippet', videoId=video_id, maxResults=20).execute()
+
+    channel_ids: list[str] = sorted({item['snippet']['channelId'] for item in responses['videos']['items']})
+    responses['channels'] = youtube_service.channels().list(part='snippet,statistics', id=','.join(channel_ids)).execute()
+
+    os.makedirs(fixture_folder_path, exist_ok=True)
+    for endpoint, response in responses.items():
+        with open(f"{fixture_folder_path}/{endpoint}.json", 'w', encoding='utf-8') as file:
+            json.dump(response, file, ensure_ascii=False, indent=2)
+        print(f"\033[92m{endpoint}\033[0m recorded ({len(response.get('items', []))} items)", end='\n', flush=True)
+
+if __name__ == '__main__':
+    argument_parser = ArgumentParser(description="Record real YouTube API responses as fixtures of the local API stub")
+    argument_parser.add_argument('--fixture-folder-path', type=str, default='./benchmarks/fixtures')
+    argument_parser.add_argument('--location', type=str, default='TW')
+    arguments = argument_parser.parse_args()
+    record_youtube_fixtures(arguments.fixture_folder_path, location=arguments.location)
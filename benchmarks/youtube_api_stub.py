@@ -0,0 +1,386 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from dataclasses import dataclass
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+MAX_PAGE_SIZE: int = 50 # "maxResults" of the search, videos and commentThreads endpoints is capped like the real API
+ERROR_REASONS: dict[int, str] = {403: 'quotaExceeded', 404: 'notFound', 429: 'rateLimitExceeded', 500: 'backendError', 503: 'backendError'}
+
+@dataclass
+class YouTubeAPIStubSettings:
+    latency_s: float = 0.05
+    comment_pages_per_video: int = 5
+    comment_page_size: int = 3
+    channel_count: int = 5
+    video_count: int = 200 # the results of a search or of the trending chart, served in pages of at most 50
+    drive_page_size: int = 1000 # the files per page of "files().list"
+    error_rate: float = 0.0 # the share of the requests answered with "error_status_code" instead
+    error_status_code: int = 503
+    error_endpoints: Optional[tuple[str, ...]] = None # the endpoints where errors are injected, e.g. ('commentThreads', 'drive.upload'), all if None
+    error_seed: int = 0
+    fixture_folder_path: Optional[str] = None # "{endpoint}.json" responses recorded from the real API, served instead of the generated ones
+
+class YouTubeAPIStub:
+    '''
+    A local HTTP server answering the YouTube Data API v3 endpoints used by "YouTubeCrawler", and the Google Drive v3 endpoints used by "GoogleDriveUploader",
+    with generated (or recorded) data, a fixed latency, pagination and injected errors
+
+    The Drive files are kept in memory, "drive_files" maps every file ID to its name, folder and content.
+
+    Example:
+        with YouTubeAPIStub(YouTubeAPIStubSettings(latency_s=0.1, error_rate=0.05)) as stub:
+            crawler = YouTubeCrawler('TW', api_endpoint=stub.api_endpoint)
+            google_drive_uploader = GoogleDriveUploader(api_endpoint=stub.drive_api_endpoint)
+    '''
+    def __init__(self, settings: YouTubeAPIStubSettings = YouTubeAPIStubSettings()):
+        self.settings = settings
+        self.request_counts: dict[str, int] = {}
+        self.injected_error_counts: dict[str, int] = {}
+        self.drive_files: dict[str, dict[str, any]] = {}
+        self.__upload_sessions: dict[str, dict[str, any]] = {}
+        self.__next_id: int = 0
+        self.__random_generator = random.Random(settings.error_seed)
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), self.__build_handler())
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+
+    @property
+    def api_endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.__server.server_address[1]}/youtube/v3/"
+
+    @property
+    def drive_api_endpoint(self) -> str:
+        # the root URL of the Drive API, the file, upload and batch paths are appended to it
+        return f"http://127.0.0.1:{self.__server.server_address[1]}/"
+
+    def __enter__(self) -> 'YouTubeAPIStub':
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def count_request(self, endpoint: str):
+        with self.__lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def get_api_call_count(self) -> int:
+        with self.__lock:
+            return sum(self.request_counts.values())
+
+    def should_inject_error(self, endpoint: str) -> bool:
+        if self.settings.error_rate <= 0 or (self.settings.error_endpoints is not None and endpoint not in self.settings.error_endpoints):
+            return False
+        with self.__lock:
+            if self.__random_generator.random() >= self.settings.error_rate:
+                return False
+            self.injected_error_counts[endpoint] = self.injected_error_counts.get(endpoint, 0) + 1
+            return True
+
+    def new_id(self, prefix: str) -> str:
+        with self.__lock:
+            self.__next_id += 1
+            return f"{prefix}{self.__next_id:012d}"
+
+    def __build_handler(self) -> type:
+        stub: YouTubeAPIStub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' # keep-alive, a resumable upload sends every chunk on the same connection
+            disable_nagle_algorithm = True # the headers and the body are separate writes, Nagle would delay the body until the client's delayed ACK
+
+            def do_GET(self):
+                self.__dispatch('GET')
+
+            def do_POST(self):
+                self.__dispatch('POST')
+
+            def do_PUT(self):
+                self.__dispatch('PUT')
+
+            def do_DELETE(self):
+                self.__dispatch('DELETE')
+
+            def __dispatch(self, method: str):
+                url = urlparse(self.path)
+                params: dict[str, str] = {key: values[0] for key, values in parse_qs(url.query).items()}
+                body: bytes = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+                route: Optional[tuple[str, any]] = stub._route(method, url.path, params)
+                if route is None:
+                    self.__send(404, b'', 'text/plain')
+                    return
+                endpoint, handle = route
+
+                stub.count_request(endpoint)
+                sleep(stub.settings.latency_s)
+                if stub.should_inject_error(endpoint):
+                    self.__send(*build_error_response(stub.settings.error_status_code))
+                    return
+
+                self.__send(*handle(params, body, dict(self.headers)))
+
+            def __send(self, status_code: int, body: bytes, content_type: str, headers: Optional[dict[str, str]] = None):
+                self.send_response(status_code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for header_name, header_value in (headers or {}).items():
+                    self.send_header(header_name, header_value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _route(self, method: str, path: str, params: dict[str, str]) -> Optional[tuple[str, any]]:
+        '''
+        The (endpoint, handler) of a request, a handler returns (status_code, body, content_type[, headers])
+        '''
+        path = path.rstrip('/')
+        if method == 'GET' and path.startswith('/youtube/v3/'):
+            endpoint: str = path.rsplit('/', 1)[-1]
+            response_builder = getattr(self, f"_build_{endpoint}_response", None)
+            if response_builder is None:
+                return None
+            return endpoint, lambda params, body, headers: build_json_response(self.__get_fixture_response(endpoint, params) or response_builder(params))
+
+        if path == '/drive/v3/files' and method == 'GET':
+            return 'drive.files.list', self._list_drive_files
+        if path.startswith('/drive/v3/files/') and method == 'GET':
+            return 'drive.files.get', lambda params, body, headers: self._download_drive_file(path.rsplit('/', 1)[-1], headers)
+        if path.startswith('/drive/v3/files/') and method == 'DELETE':
+            return 'drive.files.delete', lambda params, body, headers: self._delete_drive_file(path.rsplit('/', 1)[-1])
+        if path == '/upload/drive/v3/files' and method == 'POST':
+            return 'drive.files.create', self._start_drive_upload
+        if path == '/upload/drive/v3/files' and method == 'PUT':
+            return 'drive.upload', self._upload_drive_chunk
+        if path == '/batch/drive/v3' and method == 'POST':
+            return 'drive.batch', self._execute_drive_batch
+        return None
+
+    def __get_fixture_response(self, endpoint: str, params: dict[str, str]) -> Optional[dict[str, any]]:
+        if self.settings.fixture_folder_path is None or not os.path.isfile(f"{self.settings.fixture_folder_path}/{endpoint}.json"):
+            return None
+        with open(f"{self.settings.fixture_folder_path}/{endpoint}.json", 'r', encoding='utf-8') as file:
+            response: dict[str, any] = json.load(file)
+
+        if 'id' in params: # a lookup by IDs, the IDs missing from the recording are generated (videos) or left out (channels) like unknown IDs
+            recorded_items: dict[str, dict[str, any]] = {item['id']: item for item in response.get('items', [])}
+            response['items'] = [
+                recorded_items[item_id] if item_id in recorded_items else self._build_video_item(item_id)
+                for item_id in params['id'].split(',') if item_id in recorded_items or endpoint == 'videos'
+            ]
+            return response
+
+        # the recorded page is served as every page, the page tokens are the stub's own
+        response.pop('nextPageToken', None)
+        index_page: int = int(params.get('pageToken', 0))
+        if endpoint == 'commentThreads' and index_page + 1 < self.settings.comment_pages_per_video:
+            response['nextPageToken'] = str(index_page + 1)
+        return response
+
+    def _build_video_item(self, video_id: str) -> dict[str, any]:
+        channel_index: int = sum(map(ord, video_id)) % self.settings.channel_count
+        return {
+            'kind': 'youtube#video',
+            'id': video_id,
+            'snippet': {
+                'title': f"Video {video_id}",
+                'channelTitle': f"Channel {channel_index}",
+                'channelId': f"UCstub{channel_index:018d}",
+                'publishedAt': '2025-02-14T05:58:02Z',
+                'description': f"Description of {video_id} &amp; more",
+                'thumbnails': {'default': {'url': f"https://i.ytimg.com/vi/{video_id}/default.jpg", 'width': 120, 'height': 90}}
+            },
+            'statistics': {'viewCount': '1000', 'likeCount': '100', 'commentCount': str(self.settings.comment_pages_per_video * self.settings.comment_page_size)}
+        }
+
+    def _get_page_of_video_ids(self, params: dict[str, str]) -> tuple[list[str], Optional[str]]:
+        index_start: int = int(params.get('pageToken', 0))
+        index_end: int = min(index_start + min(int(params.get('maxResults', 5)), MAX_PAGE_SIZE), self.settings.video_count)
+        next_page_token: Optional[str] = str(index_end) if index_end < self.settings.video_count else None
+        return [f"stub{index_video:07d}" for index_video in range(index_start, index_end)], next_page_token
+
+    def _build_search_response(self, params: dict[str, str]) -> dict[str, any]:
+        video_ids, next_page_token = self._get_page_of_video_ids(params)
+        items: list[dict[str, any]] = []
+        for video_id in video_ids:
+            item: dict[str, any] = self._build_video_item(video_id)
+            items.append({'kind': 'youtube#searchResult', 'id': {'kind': 'youtube#video', 'videoId': item['id']}, 'snippet': item['snippet']})
+
+        response: dict[str, any] = {'kind': 'youtube#searchListResponse', 'items': items, 'pageInfo': {'totalResults': self.settings.video_count, 'resultsPerPage': len(items)}}
+        if next_page_token is not None:
+            response['nextPageToken'] = next_page_token
+        return response
+
+    def _build_videos_response(self, params: dict[str, str]) -> dict[str, any]:
+        if 'id' in params:
+            return {'kind': 'youtube#videoListResponse', 'items': [self._build_video_item(video_id) for video_id in params['id'].split(',')]}
+
+        video_ids, next_page_token = self._get_page_of_video_ids(params)
+        response: dict[str, any] = {'kind': 'youtube#videoListResponse', 'items': [self._build_video_item(video_id) for video_id in video_ids]}
+        if next_page_token is not None:
+            response['nextPageToken'] = next_page_token
+        return response
+
+    def _build_commentThreads_response(self, params: dict[str, str]) -> dict[str, any]:
+        video_id: str = params['videoId']
+        index_page: int = int(params.get('pageToken', 0))
+        items: list[dict[str, any]] = []
+        for index_comment in range(self.settings.comment_page_size):
+            comment_id: str = f"{video_id}.{index_page}.{index_comment}"
+            items.append({
+                'kind': 'youtube#commentThread',
+                'id': comment_id,
+                'snippet': {
+                    'videoId': video_id,
+                    'totalReplyCount': index_comment,
+                    'topLevelComment': {
+                        'id': comment_id,
+                        'snippet': {
+                            'authorDisplayName': f"@author{index_comment}",
+                            'textDisplay': f"Comment {comment_id} &#39;quoted&#39;<br>",
+                            'likeCount': index_page,
+                            'publishedAt': '2025-02-15T05:58:02Z'
+                        }
+                    }
+                }
+            })
+
+        response: dict[str, any] = {'kind': 'youtube#commentThreadListResponse', 'items': items}
+        if index_page + 1 < self.settings.comment_pages_per_video:
+            response['nextPageToken'] = str(index_page + 1)
+        return response
+
+    def _build_channels_response(self, params: dict[str, str]) -> dict[str, any]:
+        items: list[dict[str, any]] = []
+        for channel_id in params['id'].split(','):
+            items.append({
+                'kind': 'youtube#channel',
+                'id': channel_id,
+                'snippet': {
+                    'title': f"Channel {int(channel_id[len('UCstub'):])}",
+                    'description': f"Description of {channel_id}",
+                    'thumbnails': {'default': {'url': f"https://yt3.ggpht.com/{channel_id}=s88", 'width': 88, 'height': 88}}
+                },
+                'statistics': {'subscriberCount': '12000', 'hiddenSubscriberCount': False}
+            })
+        return {'kind': 'youtube#channelListResponse', 'items': items}
+
+    def _list_drive_files(self, params: dict[str, str], body: bytes, headers: dict[str, str]) -> tuple[int, bytes, str]:
+        query: str = params.get('q', '')
+        folder_ids: list[str] = [unescape_query_string(folder_id) for folder_id in re.findall(r"'((?:[^'\\]|\\.)*)' in parents", query)]
+        file_names: list[str] = [unescape_query_string(file_name) for file_name in re.findall(r"name = '((?:[^'\\]|\\.)*)'", query)]
+
+        with self.__lock:
+            listed_files: list[dict[str, str]] = [
+                {'id': file_id, 'name': drive_file['name'], 'md5Checksum': drive_file['md5Checksum']}
+                for file_id, drive_file in self.drive_files.items()
+                if (not folder_ids or drive_file['folder_id'] in folder_ids) and (not file_names or drive_file['name'] in file_names)
+            ]
+
+        index_start: int = int(params.get('pageToken', 0))
+        index_end: int = index_start + min(int(params.get('pageSize', 100)), self.settings.drive_page_size)
+        response: dict[str, any] = {'kind': 'drive#fileList', 'files': listed_files[index_start:index_end]}
+        if index_end < len(listed_files):
+            response['nextPageToken'] = str(index_end)
+        return build_json_response(response)
+
+    def _download_drive_file(self, file_id: str, headers: dict[str, str]) -> tuple[int, bytes, str, dict[str, str]]:
+        with self.__lock:
+            drive_file: Optional[dict[str, any]] = self.drive_files.get(file_id)
+        if drive_file is None:
+            return build_error_response(404)
+
+        content: bytes = drive_file['content']
+        range_match = re.match(r'bytes=(\d+)-(\d*)', headers.get('Range', headers.get('range', '')))
+        if range_match is None or not content:
+            return 200, content, 'application/octet-stream', {}
+        index_start: int = int(range_match.group(1))
+        index_end: int = min(int(range_match.group(2) or len(content) - 1), len(content) - 1)
+        return 206, content[index_start:index_end + 1], 'application/octet-stream', {'Content-Range': f"bytes {index_start}-{index_end}/{len(content)}"}
+
+    def _delete_drive_file(self, file_id: str) -> tuple[int, bytes, str]:
+        with self.__lock:
+            drive_file: Optional[dict[str, any]] = self.drive_files.pop(file_id, None)
+        return (204, b'', 'application/json') if drive_file is not None else build_error_response(404)
+
+    def _start_drive_upload(self, params: dict[str, str], body: bytes, headers: dict[str, str]) -> tuple[int, bytes, str, dict[str, str]]:
+        file_metadata: dict[str, any] = json.loads(body or b'{}')
+        upload_id: str = self.new_id('upload')
+        with self.__lock:
+            self.__upload_sessions[upload_id] = {'name': file_metadata.get('name'), 'folder_id': (file_metadata.get('parents') or [None])[0], 'content': bytearray()}
+        return 200, b'', 'application/json', {'Location': f"{self.drive_api_endpoint}upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"}
+
+    def _upload_drive_chunk(self, params: dict[str, str], body: bytes, headers: dict[str, str]) -> tuple[int, bytes, str, dict[str, str]]:
+        with self.__lock:
+            upload_session: Optional[dict[str, any]] = self.__upload_sessions.get(params.get('upload_id'))
+        if upload_session is None:
+            return build_error_response(404)
+
+        # "bytes {start}-{end}/{total}" for a chunk, "bytes */{total}" asks how much was received after an error
+        content_range_match = re.match(r'bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)', headers.get('Content-Range', headers.get('content-range', '')))
+        if content_range_match is not None and content_range_match.group(1) is not None:
+            if int(content_range_match.group(1)) == len(upload_session['content']):
+                upload_session['content'] += body
+        elif content_range_match is None:
+            upload_session['content'] += body
+
+        total_size: Optional[str] = content_range_match.group(3) if content_range_match is not None else str(len(upload_session['content']))
+        if total_size == '*' or len(upload_session['content']) < int(total_size):
+            received_range: dict[str, str] = {'Range': f"bytes=0-{len(upload_session['content']) - 1}"} if upload_session['content'] else {}
+            return 308, b'', 'text/plain', received_range
+
+        file_id: str = self.new_id('drive')
+        content: bytes = bytes(upload_session['content'])
+        with self.__lock:
+            self.__upload_sessions.pop(params['upload_id'], None)
+            self.drive_files[file_id] = {'name': upload_session['name'], 'folder_id': upload_session['folder_id'], 'content': content, 'md5Checksum': hashlib.md5(content).hexdigest()}
+        return build_json_response({'kind': 'drive#file', 'id': file_id, 'name': upload_session['name']})
+
+    def _execute_drive_batch(self, params: dict[str, str], body: bytes, headers: dict[str, str]) -> tuple[int, bytes, str]:
+        # a "multipart/mixed" request of "application/http" parts, only the deletions of "GoogleDriveUploader.delete_files" are supported
+        content_type: str = headers.get('Content-Type', headers.get('content-type', ''))
+        batch_message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body)
+
+        boundary: str = f"batch_{self.new_id('')}"
+        response_parts: list[str] = []
+        for part in batch_message.get_payload():
+            request_line: str = part.get_payload().lstrip().split('\n', 1)[0].strip()
+            method, path = request_line.split(' ')[:2]
+            if method == 'DELETE' and urlparse(path).path.startswith('/drive/v3/files/'):
+                self.count_request('drive.files.delete')
+                # an error is injected per deletion as well, the other deletions of the batch succeed
+                status_code: int = self.settings.error_status_code if self.should_inject_error('drive.files.delete') else self._delete_drive_file(urlparse(path).path.rsplit('/', 1)[-1])[0]
+            else:
+                status_code = 404
+            status_line: str = 'HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n' if status_code == 204 else f"HTTP/1.1 {status_code} Error\r\nContent-Type: application/json\r\n\r\n{build_error_response(status_code)[1].decode('utf-8')}"
+
+            content_id: str = part['Content-ID'].strip()
+            response_parts.append(f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id[1:-1]}>\r\n\r\n{status_line}\r\n")
+
+        return 200, (''.join(response_parts) + f"--{boundary}--\r\n").encode('utf-8'), f"multipart/mixed; boundary={boundary}"
+
+def build_json_response(response: dict[str, any]) -> tuple[int, bytes, str]:
+    return 200, json.dumps(response).encode('utf-8'), 'application/json; charset=UTF-8'
+
+def build_error_response(status_code: int) -> tuple[int, bytes, str]:
+    # the error body of the Google APIs, "RequestExecutor" reads the reason to tell retryable errors from exhausted quota
+    error_reason: str = ERROR_REASONS.get(status_code, 'backendError')
+    error: dict[str, any] = {'error': {'code': status_code, 'message': f"Injected by the stub: {error_reason}", 'errors': [{'reason': error_reason, 'domain': 'global'}]}}
+    return status_code, json.dumps(error).encode('utf-8'), 'application/json; charset=UTF-8'
+
+def unescape_query_string(value: str) -> str:
+    return re.sub(r'\\(.)', r'\1', value)
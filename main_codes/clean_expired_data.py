@@ -1,37 +1,50 @@
-from datetime import datetime
+from argparse import ArgumentParser
+from typing import Optional
 from time import time
-import os
 from sys import path as sys_path
-sys_path += ['modules']
+sys_path += ['modules', 'modules/data collector']
 from utilities import load_configs, get_refined_time_string
+from snapshot_dataset import SnapshotManifest
+from snapshot_retention import RetentionPolicy, apply_retention_policy
 
-def get_date_a_month_ago() -> int:
-    CURRENT_DATE: int = int(datetime.now().strftime("%Y%m%d"))
-    CURRENT_MONTH: int = CURRENT_DATE // 100 % 100
+def get_retention_policy(keep_days: Optional[int] = None, keep_last_runs: Optional[int] = None, max_total_megabytes: Optional[float] = None) -> RetentionPolicy:
+    '''
+    The retention policy of "configs.yaml[retention]", overridden by the given arguments
+    '''
+    RETENTION_CONFIGS: dict[str, any] = load_configs().get('retention', {})
+    MAX_TOTAL_MEGABYTES: Optional[float] = max_total_megabytes if max_total_megabytes is not None else RETENTION_CONFIGS.get('max_total_megabytes')
+    return RetentionPolicy(
+        keep_days=keep_days if keep_days is not None else RETENTION_CONFIGS.get('keep_days'),
+        keep_last_runs=keep_last_runs if keep_last_runs is not None else RETENTION_CONFIGS.get('keep_last_runs'),
+        max_total_bytes=None if MAX_TOTAL_MEGABYTES is None else int(MAX_TOTAL_MEGABYTES * 1024 * 1024)
+    )
 
-    if CURRENT_MONTH == 1:
-        return CURRENT_DATE - 8900
-    else:
-        return CURRENT_DATE - 100
-
-def clean_expired_data():
+def clean_expired_data(retention_policy: Optional[RetentionPolicy] = None, dry_run: bool = False):
     start_time: float = time()
 
-    DIRECTORIES: dict[str, str] = load_configs()['folder_name_to_save_data']
-    EXPIRED_DATE: int = get_date_a_month_ago()
-    expired_data_count: int = 0
+    if retention_policy is None:
+        retention_policy = get_retention_policy()
+    snapshot_manifest = SnapshotManifest(load_configs().get('snapshot_dataset', {}).get('manifest_file_path', './data/snapshot_manifest.json'))
+    expired_entries: list[dict[str, any]] = apply_retention_policy(snapshot_manifest, retention_policy, dry_run=dry_run)
 
-    for DIRECTORY in DIRECTORIES.values():
-        for file_name in os.listdir(DIRECTORY):
-            if int(file_name[:8]) < EXPIRED_DATE:
-                os.remove(DIRECTORY+'/'+file_name)
-                expired_data_count += 1
+    if dry_run:
+        for expired_entry in expired_entries:
+            print(f"would delete \"{expired_entry['file_path']}\" ({expired_entry['size'] / 1024:.1f} KB)")
 
-    if expired_data_count == 0:
+    expired_bytes: int = sum(expired_entry['size'] for expired_entry in expired_entries)
+    running_time: str = get_refined_time_string(time() - start_time)
+    if len(expired_entries) == 0:
         print(f"Data folder had no expired data !", end='\n', flush=True)
+    elif dry_run:
+        print(f"\033[93mDry run\033[0m: \033[92m{len(expired_entries)}\033[0m expired data files ({expired_bytes / 1024 / 1024:.2f} MB) found in \033[92m{running_time}\033[0m !", end='\n', flush=True)
     else:
-        running_time: str = get_refined_time_string(time() - start_time)
-        print(f"\033[92m{expired_data_count}\033[0m expired data files cleaned in \033[92m{running_time}\033[0m !", end='\n', flush=True)
+        print(f"\033[92m{len(expired_entries)}\033[0m expired data files ({expired_bytes / 1024 / 1024:.2f} MB) cleaned in \033[92m{running_time}\033[0m !", end='\n', flush=True)
 
 if __name__ == '__main__':
-    clean_expired_data()
\ No newline at end of file
+    argument_parser = ArgumentParser(description="Delete the local data files expired by the retention policy of configs.yaml[retention]")
+    argument_parser.add_argument('--keep-days', type=int, default=None, help="delete the files older than this many days")
+    argument_parser.add_argument('--keep-last-runs', type=int, default=None, help="keep the files of the latest runs of every category only")
+    argument_parser.add_argument('--max-total-megabytes', type=float, default=None, help="delete the oldest files until the data folders fit in this size")
+    argument_parser.add_argument('--dry-run', action='store_true', help="only report the files that would be deleted")
+    arguments = argument_parser.parse_args()
+    clean_expired_data(get_retention_policy(arguments.keep_days, arguments.keep_last_runs, arguments.max_total_megabytes), dry_run=arguments.dry_run)
@@ -1,42 +1,51 @@
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from typing import Optional
+from time import time
 from sys import path as sys_path
 sys_path += ['modules']
-from utilities import build_google_drive_service, load_configs
+from utilities import load_configs, get_refined_time_string, get_file_name_period
+from request_executor import build_request_executor
+from storage_backend import StorageBackend, GoogleDriveStorageBackend
 
-def __delete_file_from_google_drive(google_drive_service: any, file_id: str) -> bool:
-    try:
-        google_drive_service.files().delete(fileId=file_id).execute()
+def __is_file_expired(file_name: str, expired_date: Optional[datetime]) -> bool:
+    if expired_date is None:
         return True
-        # print(f"File with ID {file_id} has been deleted.")
-    except Exception as e:
-        print(f"\033[91mAn error occurred\033[0m: {e}")
-        return False
 
-def __clean_google_drive_folder(google_drive_service: any, folder_id: str, folder_name: str):
+    # the names of the uploaded files start with "YYYYMMDDHH", or "YYYYMMDD" / "YYYYMM" once compacted
+    file_name_period: Optional[tuple[datetime, datetime]] = get_file_name_period(file_name)
+    return file_name_period is not None and file_name_period[1] <= expired_date
+
+def __clean_storage_folder(storage_backend: StorageBackend, interested_category: str, expired_date: Optional[datetime]):
     try:
-        results = google_drive_service.files().list(q=f"'{folder_id}' in parents", fields="files(id, name)").execute()
-        files = results.get('files', [])
+        file_names: list[str] = storage_backend.list_file_names(interested_category)
     except Exception as e:
         print(f"\033[91mAn error occurred\033[0m: {e}")
+        return
 
-    cleaned_file_count: int = 0
-    if files:
-        for file in files:
-            if __delete_file_from_google_drive(google_drive_service, file['id']):
-                cleaned_file_count += 1
+    expired_file_names: list[str] = [file_name for file_name in file_names if __is_file_expired(file_name, expired_date)]
+    cleaned_file_count: int = storage_backend.delete_files(interested_category, expired_file_names) if expired_file_names else 0
 
     if cleaned_file_count == 0:
-        print(f"G-Drive folder \"\033[92m{folder_name}\033[0m\" was already empty.")
+        print(f"G-Drive folder \"\033[92m{interested_category}\033[0m\" had nothing to clean.")
     else:
-        print(f"G-Drive Folder \"\033[92m{folder_name}\033[0m\" has been cleaned, \033[92m{cleaned_file_count}\033[0m files has been deleted.")
+        print(f"G-Drive Folder \"\033[92m{interested_category}\033[0m\" has been cleaned, \033[92m{cleaned_file_count}\033[0m of {len(file_names)} files has been deleted.")
+
+def clean_online_data(older_than_days: Optional[int] = None, storage_backend: Optional[StorageBackend] = None):
+    start_time: float = time()
+
+    if storage_backend is None:
+        storage_backend = GoogleDriveStorageBackend(request_executor=build_request_executor())
 
-def clean_online_data():
-    configs: dict[str, any] = load_configs()
-    google_drive_service: any = build_google_drive_service()
+    EXPIRED_DATE: Optional[datetime] = None if older_than_days is None else datetime.combine(datetime.now().date() - timedelta(days=older_than_days), datetime.min.time())
 
-    FOLDER_IDS: dict[str, str] = configs['parent_folder_id_to_upload_data']
+    for interested_category in load_configs()['parent_folder_id_to_upload_data'].keys():
+        __clean_storage_folder(storage_backend, interested_category, expired_date=EXPIRED_DATE)
 
-    for interested_category, folder_id in FOLDER_IDS.items():
-        __clean_google_drive_folder(google_drive_service, folder_id, folder_name=interested_category)
+    running_time: str = get_refined_time_string(time() - start_time)
+    print(f"G-Drive folders cleaned in \033[92m{running_time}\033[0m !", end='\n', flush=True)
 
 if __name__ == '__main__':
-    clean_online_data()
\ No newline at end of file
+    argument_parser = ArgumentParser(description="Delete the uploaded data from the Google Drive folders")
+    argument_parser.add_argument('--older-than-days', type=int, default=None, help="only delete the files whose name date is older than this many days (default: delete all files)")
+    clean_online_data(older_than_days=argument_parser.parse_args().older_than_days)
@@ -0,0 +1,33 @@
+from argparse import ArgumentParser
+from typing import Optional
+from time import time
+from sys import path as sys_path
+sys_path += ['modules', 'modules/data collector']
+from utilities import load_configs, get_refined_time_string
+from snapshot_compaction import compact_snapshots
+
+def compact_data(granularity: Optional[str] = None):
+    start_time: float = time()
+
+    configs: dict[str, any] = load_configs()
+    DIRECTORIES: dict[str, str] = configs['folder_name_to_save_data']
+    GRANULARITY: str = granularity if granularity is not None else configs.get('compaction', {}).get('granularity', 'day')
+    compacted_file_count: int = 0
+    merged_file_count: int = 0
+
+    for interested_category in DIRECTORIES.keys():
+        for compacted_file_path, period_file_count, row_count in compact_snapshots(interested_category, granularity=GRANULARITY):
+            print(f"\"{compacted_file_path}\": \033[92m{period_file_count}\033[0m files merged into \033[92m{row_count}\033[0m rows")
+            compacted_file_count += 1
+            merged_file_count += period_file_count
+
+    if compacted_file_count == 0:
+        print(f"Data folders had nothing to compact !", end='\n', flush=True)
+    else:
+        running_time: str = get_refined_time_string(time() - start_time)
+        print(f"\033[92m{merged_file_count}\033[0m data files compacted into \033[92m{compacted_file_count}\033[0m files in \033[92m{running_time}\033[0m !", end='\n', flush=True)
+
+if __name__ == '__main__':
+    argument_parser = ArgumentParser(description="Merge the snapshots (and comment deltas) of every finished day or month into one sorted file per kind of data")
+    argument_parser.add_argument('--granularity', choices=['day', 'month'], default=None, help="the period of the compacted files (default: configs.yaml[compaction][granularity])")
+    compact_data(granularity=argument_parser.parse_args().granularity)
@@ -1,15 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from time import time
+from typing import Optional
+import datetime
 from sys import path as sys_path
 sys_path += ['modules', 'modules/data collector']
 from data_collector import DataCollector
-from utilities import load_configs
+from quota_budget import QuotaBudget, QuotaBudgetExceededError
+from request_executor import RequestExecutor, build_request_executor
+from run_metrics import get_run_metrics, export_run_metrics
+from snapshot_dataset import SnapshotManifest
+from utilities import Configs, load_configs, get_refined_time_string
+from video_registry import VideoRegistry
 
-if __name__ == '__main__':
-    data_collector = DataCollector('TW', show_progress_bar=False)
+def collect_a_category(interested_category: str, current_timestamp: str, request_executor: RequestExecutor, configs: Configs, video_registry: VideoRegistry) -> tuple[Optional[DataCollector], float]:
+    '''
+    Returns:
+        (data_collector, running_time_s) : "data_collector" is None if the category was aborted, the other categories go on regardless
+    '''
+    start_time: float = time()
 
-    for interested_category in load_configs()['folder_name_to_save_data'].keys():
-        data_collector.set_interest_categories(interested_category)
+    data_collector = DataCollector('TW', show_progress_bar=False, interested_category=interested_category, current_timestamp=current_timestamp, request_executor=request_executor, configs=configs, video_registry=video_registry)
+    try:
+        # a collection running out of quota stops early and stores what it collected, this only catches a budget error escaping it
         data_collector.collect_videos(max_videos=10, max_comments=100)
         data_collector.store_data()
-        data_collector.clean_cached_data()
+    except QuotaBudgetExceededError as error:
+        get_run_metrics().increment('categories_aborted', category=interested_category)
+        print(f"\033[91mCategory ({interested_category}) aborted\033[0m: {error}", end='\n', flush=True)
+        return None, time() - start_time
+    data_collector.clean_cached_data()
+
+    return data_collector, time() - start_time
+
+def run_data_pipeline():
+    start_time: float = time()
+
+    configs: Configs = load_configs() # parsed once, shared by every category
+    INTERESTED_CATEGORIES: list[str] = list(configs['folder_name_to_save_data'].keys())
+    CURRENT_TIMESTAMP: str = datetime.datetime.now().strftime("%Y%m%d%H")
+    quota_budget = QuotaBudget(max_units=configs.get('max_quota_units_per_run'))
+    request_executor: RequestExecutor = build_request_executor(quota_budget=quota_budget)
+    video_registry = VideoRegistry(INTERESTED_CATEGORIES) # the statistics and comments of a video found by several categories are fetched once
+
+    if configs.get('parallel_categories', False):
+        # every category runs as an independent job with its own crawler, only the request executor (rate limit and quota budget) is shared
+        with ThreadPoolExecutor(max_workers=len(INTERESTED_CATEGORIES)) as executor:
+            futures: dict[str, Future] = {
+                interested_category: executor.submit(collect_a_category, interested_category, CURRENT_TIMESTAMP, request_executor, configs, video_registry)
+                for interested_category in INTERESTED_CATEGORIES
+            }
+            category_results: dict[str, tuple[Optional[DataCollector], float]] = {interested_category: future.result() for interested_category, future in futures.items()}
+    else:
+        category_results = {interested_category: collect_a_category(interested_category, CURRENT_TIMESTAMP, request_executor, configs, video_registry) for interested_category in INTERESTED_CATEGORIES}
 
-    data_collector.upload_data_to_google_drive()
+    # any stored category uploads the files of every category of this run
+    stored_data_collectors: list[DataCollector] = [data_collector for data_collector, _ in category_results.values() if data_collector is not None]
+    if stored_data_collectors:
+        stored_data_collectors[0].upload_data_to_google_drive()
+
+    # the manifest is committed with the data by the workflow, so the next checkout only reads the footers of the files stored after this run
+    snapshot_manifest = SnapshotManifest(configs.get('snapshot_dataset', {}).get('manifest_file_path', './data/snapshot_manifest.json'))
+    if snapshot_manifest.refresh() > 0:
+        snapshot_manifest.save()
+
+    print('-'*50)
+    for interested_category, (data_collector, category_running_time) in category_results.items():
+        category_status: str = '\033[91maborted\033[0m' if data_collector is None else '\033[93mtruncated\033[0m (quota budget ran out)' if data_collector.is_truncated() else 'finished'
+        print(f"Category (\033[96m{interested_category}\033[0m) {category_status} in \033[92m{get_refined_time_string(category_running_time)}\033[0m", end='\n', flush=True)
+    print(f"Shared videos: \033[92m{video_registry.get_saved_call_count()}\033[0m API calls saved across categories {video_registry.get_report()}", end='\n', flush=True)
+    print(f"Quota spent: \033[92m{quota_budget.get_total_spent_units()}\033[0m units {quota_budget.get_spent_units()}, retries: {request_executor.get_retry_counts()}", end='\n', flush=True)
+    print(f"Data pipeline finished in \033[92m{get_refined_time_string(time() - start_time)}\033[0m !", end='\n', flush=True)
+    print('-'*50)
+
+    get_run_metrics().record_span('pipeline', time() - start_time)
+    metrics_file_path: Optional[str] = export_run_metrics()
+    if metrics_file_path is not None:
+        print(f"Run metrics exported to \033[92m{metrics_file_path}\033[0m", end='\n', flush=True)
+
+if __name__ == '__main__':
+    run_data_pipeline()
@@ -0,0 +1,137 @@
+from dataclasses import dataclass, asdict
+from typing import Optional
+import json
+import os
+import threading
+from youtube_data import YouTubeVideoInfo, YouTubeVideoStatistics, YouTubeVideoComments
+
+@dataclass
+class CollectionCheckpoint:
+    '''
+    Append-only JSON-lines journal of a collection run, keyed by the run timestamp and the interested category
+
+    The journal records every discovered page of videos and every fetched page of comments with their "nextPageToken",
+    and every video that has been fully collected, so a restarted run for the same timestamp can resume.
+
+    Example:
+        checkpoint = CollectionCheckpoint('./checkpoints', '2025021812', 'news')
+        checkpoint.save_comments_page('QyLM3PyepZw', comments, next_page_token)
+        comments, next_page_token, is_finished = checkpoint.get_saved_comments('QyLM3PyepZw')
+    '''
+    __file_path: str
+    __videos: Optional[tuple[list[YouTubeVideoInfo], dict[str, YouTubeVideoStatistics]]]
+    __discovery_page_token: Optional[str]
+    __comments: dict[str, list[YouTubeVideoComments]]
+    __next_page_tokens: dict[str, Optional[str]]
+    __collected_video_ids: set[str]
+    __lock: threading.Lock
+
+    def __init__(self, folder_path: str, current_timestamp: str, interested_category: str):
+        os.makedirs(folder_path, exist_ok=True)
+
+        self.__file_path = f"{folder_path}/{current_timestamp}_{interested_category}.jsonl"
+        self.__videos = None
+        self.__discovery_page_token = None
+        self.__comments = {}
+        self.__next_page_tokens = {}
+        self.__collected_video_ids = set()
+        self.__lock = threading.Lock()
+
+        if os.path.exists(self.__file_path):
+            self.__load()
+
+    def is_resumed(self) -> bool:
+        return self.__videos is not None
+
+    def get_videos(self) -> Optional[tuple[list[YouTubeVideoInfo], dict[str, YouTubeVideoStatistics]]]:
+        return self.__videos
+
+    def get_discovery_page_token(self) -> Optional[str]:
+        '''
+        the "nextPageToken" of the last saved page of videos, None when the discovery ended
+        '''
+        return self.__discovery_page_token
+
+    def is_video_collected(self, video_id: str) -> bool:
+        return video_id in self.__collected_video_ids
+
+    def has_saved_comments(self, video_id: str) -> bool:
+        with self.__lock:
+            return video_id in self.__next_page_tokens or video_id in self.__collected_video_ids
+
+    def get_saved_comments(self, video_id: str) -> tuple[list[YouTubeVideoComments], Optional[str], bool]:
+        '''
+        Returns:
+            (comments, next_page_token, is_finished) : the comments saved so far, the token of the next page and whether the pagination ended
+        '''
+        with self.__lock:
+            comments: list[YouTubeVideoComments] = list(self.__comments.get(video_id, []))
+            if video_id not in self.__next_page_tokens:
+                return comments, None, video_id in self.__collected_video_ids
+            next_page_token: Optional[str] = self.__next_page_tokens[video_id]
+            return comments, next_page_token, next_page_token is None or video_id in self.__collected_video_ids
+
+    def save_videos(self, videos: list[YouTubeVideoInfo], videos_statistics: dict[str, YouTubeVideoStatistics], next_page_token: Optional[str] = None):
+        '''
+        save a page of discovered videos, "next_page_token" is the token of the next page (None when the discovery ended)
+        '''
+        self.__add_videos(videos, videos_statistics, next_page_token)
+        self.__append_record({
+            'type': 'videos',
+            'videos': [asdict(video) for video in videos],
+            'statistics': {video_id: asdict(statistics) for video_id, statistics in videos_statistics.items()},
+            'next_page_token': next_page_token
+        })
+
+    def save_comments_page(self, video_id: str, comments: list[YouTubeVideoComments], next_page_token: Optional[str]):
+        # only the journal keeps the comments of a live run, the ones in memory are those loaded from a previous run
+        with self.__lock:
+            self.__next_page_tokens[video_id] = next_page_token
+        self.__append_record({'type': 'comments_page', 'video_id': video_id, 'comments': [asdict(comment) for comment in comments], 'next_page_token': next_page_token})
+
+    def save_collected_video(self, video_id: str):
+        with self.__lock:
+            self.__collected_video_ids.add(video_id)
+            self.__comments.pop(video_id, None)
+        self.__append_record({'type': 'collected_video', 'video_id': video_id})
+
+    def remove(self):
+        if os.path.exists(self.__file_path):
+            os.remove(self.__file_path)
+
+    def __add_videos(self, videos: list[YouTubeVideoInfo], videos_statistics: dict[str, YouTubeVideoStatistics], next_page_token: Optional[str]):
+        with self.__lock:
+            if self.__videos is None:
+                self.__videos = ([], {})
+            self.__videos[0].extend(videos)
+            self.__videos[1].update(videos_statistics)
+            self.__discovery_page_token = next_page_token
+
+    def __append_record(self, record: dict[str, any]):
+        with self.__lock:
+            with open(self.__file_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def __load(self):
+        valid_bytes: int = 0
+        with open(self.__file_path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'): # the last record is truncated if the process died while writing it
+                    break
+                record: dict[str, any] = json.loads(line)
+                valid_bytes += len(line)
+
+                if record['type'] == 'videos':
+                    self.__add_videos(
+                        [YouTubeVideoInfo(**video) for video in record['videos']],
+                        {video_id: YouTubeVideoStatistics(**statistics) for video_id, statistics in record['statistics'].items()},
+                        record.get('next_page_token') # a journal written before the paginated discovery holds a single page
+                    )
+                elif record['type'] == 'comments_page':
+                    self.__comments.setdefault(record['video_id'], []).extend(YouTubeVideoComments(**comment) for comment in record['comments'])
+                    self.__next_page_tokens[record['video_id']] = record['next_page_token']
+                elif record['type'] == 'collected_video':
+                    self.__collected_video_ids.add(record['video_id'])
+
+        if valid_bytes < os.path.getsize(self.__file_path):
+            os.truncate(self.__file_path, valid_bytes)
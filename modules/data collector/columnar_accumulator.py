@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+import pyarrow as pa
+from youtube_data_schema import build_array
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+@dataclass
+class ColumnarAccumulator:
+    '''
+    Append-only buffer of the rows of one schema, one Python list per column,
+    sealed into an Arrow record batch once "batch_size" rows are buffered, so the collected values are mostly held in Arrow buffers rather than as Python objects
+
+    A table is built column by column from the sealed batches, without a Python loop over the rows.
+
+    Example:
+        video_comments = ColumnarAccumulator(VIDEO_COMMENTS_SCHEMA)
+        video_comments.append_columns([['QyLM3PyepZw', 'QyLM3PyepZw'], ['Nice video', 'lol'], [3, 0], [0, 1], ['Ugx1', 'Ugx2']])
+        video_comments_table: pa.Table = video_comments.to_table()
+    '''
+    __schema: pa.Schema
+    __batch_size: int
+    __columns: list[list[any]]
+    __record_batches: list[pa.RecordBatch]
+    __row_count: int
+
+    def __init__(self, schema: pa.Schema, batch_size: int = 65536):
+        self.__schema = schema
+        self.__batch_size = batch_size
+        self.__columns = [[] for _ in schema]
+        self.__record_batches = []
+        self.__row_count = 0
+
+    def append_row(self, row: list[any]):
+        for column, value in zip(self.__columns, row):
+            column.append(value)
+        self.__after_append(1)
+
+    def append_rows(self, rows: list[list[any]]):
+        if not rows:
+            return
+        for column, values in zip(self.__columns, zip(*rows)):
+            column.extend(values)
+        self.__after_append(len(rows))
+
+    def append_columns(self, columns: list[list[any]]):
+        '''
+        append the rows given as one list of values per column of the schema, e.g. every comment of a video at once
+        '''
+        if len(columns) != len(self.__columns):
+            raise ValueError(f"\n\033[91mInvalid input of \"columns\"\033[0m: {len(columns)} columns\n\033[92mValid input\033[0m: one list per column of {self.__schema.names}")
+        for column, values in zip(self.__columns, columns):
+            column.extend(values)
+        self.__after_append(len(columns[0]) if columns else 0)
+
+    def get_row_count(self) -> int:
+        return self.__row_count
+
+    def to_table(self) -> pa.Table:
+        '''
+        Returns:
+            table: every appended row, typed by the schema, one chunk per sealed batch (the dictionaries of the chunks are unified)
+        '''
+        self.__seal()
+        if not self.__record_batches:
+            return self.__schema.empty_table()
+        return pa.Table.from_batches(self.__record_batches, schema=self.__schema).unify_dictionaries()
+
+    def to_pandas(self) -> 'DataFrame':
+        return self.to_table().to_pandas()
+
+    def pop_table(self) -> pa.Table:
+        '''
+        the table of the rows appended so far, which are then removed from the accumulator (e.g. a row group of "ParquetStreamWriter")
+        '''
+        table: pa.Table = self.to_table()
+        self.clear()
+        return table
+
+    def clear(self):
+        self.__columns = [[] for _ in self.__schema]
+        self.__record_batches = []
+        self.__row_count = 0
+
+    def __after_append(self, row_count: int):
+        self.__row_count += row_count
+        if len(self.__columns[0]) >= self.__batch_size:
+            self.__seal()
+
+    def __seal(self):
+        if not self.__columns or not self.__columns[0]:
+            return
+        self.__record_batches.append(pa.RecordBatch.from_arrays([build_array(column, field.type) for column, field in zip(self.__columns, self.__schema)], schema=self.__schema))
+        self.__columns = [[] for _ in self.__schema]
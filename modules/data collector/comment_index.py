@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+import json
+import os
+
+@dataclass
+class CommentIndex:
+    '''
+    Local index of the newest comment IDs seen for every video of a category, used by the incremental collection
+
+    The videos not seen for "keep_days" days (the retention of the data, their known comments are expired with it) are dropped when saving.
+
+    Example:
+        comment_index = CommentIndex('./data/comment_index/news.json', keep_days=30)
+        known_comment_ids: Optional[set[str]] = comment_index.get_known_comment_ids('QyLM3PyepZw') # None for an unseen video
+        comment_index.update('QyLM3PyepZw', ['Ugz...'], current_timestamp='2025021812')
+        comment_index.save()
+    '''
+    __file_path: str
+    __max_known_comment_ids: int
+    __keep_days: Optional[int]
+    __entries: dict[str, dict[str, any]]
+
+    def __init__(self, file_path: str, max_known_comment_ids: int = 100, keep_days: Optional[int] = None):
+        self.__file_path = file_path
+        self.__max_known_comment_ids = max_known_comment_ids
+        self.__keep_days = keep_days
+        self.__entries = {}
+
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as file:
+                self.__entries = json.load(file)
+
+    def get_known_comment_ids(self, video_id: str) -> Optional[set[str]]:
+        entry: Optional[dict[str, any]] = self.__entries.get(video_id)
+        return None if entry is None else set(entry['comment_ids'])
+
+    def update(self, video_id: str, newest_comment_ids: list[str], current_timestamp: str):
+        '''
+        "newest_comment_ids" are the IDs fetched in this run, newest first, they are put in front of the IDs already known
+        '''
+        known_comment_ids: list[str] = self.__entries.get(video_id, {}).get('comment_ids', [])
+        self.__entries[video_id] = {
+            'comment_ids': list(dict.fromkeys(newest_comment_ids + known_comment_ids))[:self.__max_known_comment_ids],
+            'last_seen_timestamp': current_timestamp
+        }
+
+    def save(self):
+        if os.path.dirname(self.__file_path):
+            os.makedirs(os.path.dirname(self.__file_path), exist_ok=True)
+
+        if self.__keep_days is not None and self.__entries:
+            # the expiry counts from the last run seen by the index, "last_seen_timestamp" is "%Y%m%d%H" as the snapshots
+            LAST_RUN_TIME: datetime = datetime.strptime(max(entry['last_seen_timestamp'] for entry in self.__entries.values()), '%Y%m%d%H')
+            EXPIRED_TIMESTAMP: str = (LAST_RUN_TIME - timedelta(days=self.__keep_days)).strftime('%Y%m%d%H')
+            self.__entries = {video_id: entry for video_id, entry in self.__entries.items() if entry['last_seen_timestamp'] >= EXPIRED_TIMESTAMP}
+
+        with open(f"{self.__file_path}.partial", 'w', encoding='utf-8') as file:
+            json.dump(self.__entries, file)
+        os.replace(f"{self.__file_path}.partial", self.__file_path)
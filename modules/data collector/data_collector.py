@@ -1,182 +1,503 @@
 from enum import Enum
 from dataclasses import dataclass
-import pandas as pd
+from typing import Callable, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+import threading
+import os
+import pyarrow as pa
 import datetime
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
 from time import time
 from sys import path as sys_path
 sys_path += ['modules']
-from utilities import load_configs, get_progress_bar_text, get_refined_time_string, build_google_drive_service
-from youtube_crawler import YouTubeVideo, YouTubeCrawler
-from youtube_data import YouTubeVideoInfo, YouTubeVideoStatistics, YouTubeVideoComments
+from utilities import Configs, load_configs, get_progress_bar_text, get_refined_time_string
+from google_drive_uploader import GoogleDriveUploader
+from storage_backend import StorageBackend, LocalStorageBackend, GoogleDriveStorageBackend, build_storage_backend, write_parquet_table
+from quota_budget import QuotaBudgetExceededError
+from request_executor import RequestExecutor
+from run_metrics import get_run_metrics
+from youtube_crawler import YouTubeVideo, YouTubeCrawler, prefetch_pages, MAX_IDS_PER_REQUEST
+from collection_checkpoint import CollectionCheckpoint
+from comment_index import CommentIndex
+from parquet_stream_writer import ParquetStreamWriter, get_parquet_options
+from columnar_accumulator import ColumnarAccumulator
+from text_cleaning import clean_table_text
+from video_registry import VideoRegistry
+from youtube_data_schema import SCHEMAS_OF_SAVED_DATA, build_table_from_rows
+from youtube_data import YouTubeChannelInfo, YouTubeVideoInfo, YouTubeVideoStatistics, YouTubeVideoComments
+
+DiscoveredPage = tuple[list[YouTubeVideoInfo], dict[str, YouTubeVideoStatistics], Optional[str]] # (videos, videos_statistics, next_page_token)
+UNKNOWN_VIDEO_STATISTICS: YouTubeVideoStatistics = YouTubeVideoStatistics(view_count=None, like_count=None, dislike_count=None, comment_count=None)
 
 @dataclass
 class DataCollector:
-    __youtube_videos: list[YouTubeVideo]
+    __collected_data: dict[str, ColumnarAccumulator]
     __youtube_crawler: YouTubeCrawler
     __show_progress_bar: bool
     __current_timestamp: str
+    __location: str
+    __api_endpoint: Optional[str]
+    __use_response_cache: Optional[bool]
+    __max_workers: int
+    __worker_local: threading.local
+    __request_executor: RequestExecutor
+    __checkpoint: Optional[CollectionCheckpoint]
+    __comment_index: Optional[CommentIndex]
+    __stream_writers: Optional[dict[str, ParquetStreamWriter]]
+    __channel_rows: dict[str, list[any]]
+    __storage_backend: StorageBackend
+    __configs: Configs
+    __video_registry: Optional[VideoRegistry]
+    __is_truncated: bool
     __interested_category: str = "trending"
 
-    def __init__(self, location: str, show_progress_bar: bool = True):
+    def __init__(self, location: str, show_progress_bar: bool = True, max_workers: Optional[int] = None, api_endpoint: Optional[str] = None,
+                 interested_category: Optional[str] = None, current_timestamp: Optional[str] = None, request_executor: Optional[RequestExecutor] = None,
+                 use_response_cache: Optional[bool] = None, storage_backend: Optional[StorageBackend] = None, configs: Optional[Configs] = None,
+                 video_registry: Optional[VideoRegistry] = None):
         start_time: float = time()
         
-        self.__youtube_crawler = YouTubeCrawler(location)
-        self.__youtube_videos = []
+        self.__configs = configs if configs is not None else load_configs()
+        if max_workers is None:
+            CONCURRENT_COLLECTION: dict[str, any] = self.__configs.get('concurrent_collection', {})
+            max_workers = CONCURRENT_COLLECTION.get('max_workers', 1) if CONCURRENT_COLLECTION.get('enabled', False) else 1
+
+        self.__request_executor = request_executor if request_executor is not None else RequestExecutor()
+        self.__youtube_crawler = YouTubeCrawler(location, api_endpoint=api_endpoint, request_executor=self.__request_executor, use_response_cache=use_response_cache)
+        self.__collected_data = {data_name: ColumnarAccumulator(SCHEMAS_OF_SAVED_DATA[data_name]) for data_name in ('video_info', 'video_comments')}
         self.__show_progress_bar = show_progress_bar
-        self.__current_timestamp = datetime.datetime.now().strftime("%Y%m%d%H")
+        self.__current_timestamp = current_timestamp if current_timestamp is not None else datetime.datetime.now().strftime("%Y%m%d%H")
+        self.__location = location
+        self.__api_endpoint = api_endpoint
+        self.__use_response_cache = use_response_cache
+        self.__max_workers = max(1, max_workers)
+        self.__worker_local = threading.local()
+        self.__checkpoint = None
+        self.__comment_index = None
+        self.__stream_writers = None
+        self.__channel_rows = {}
+        self.__storage_backend = storage_backend if storage_backend is not None else build_storage_backend(request_executor=self.__request_executor)
+        self.__video_registry = video_registry # shared by the categories of a run, nothing is shared without it
+        self.__is_truncated = False
+        if interested_category is not None:
+            self.set_interest_categories(interested_category)
         
+        get_run_metrics().record_span('init', time() - start_time)
         running_time: str = get_refined_time_string(time() - start_time)
         print(f"Data_Collector initialized in \033[92m{running_time}\033[0m !", end='\n', flush=True)
     
     def clean_cached_data(self):
-        self.__youtube_videos = []
+        for accumulator in self.__collected_data.values():
+            accumulator.clear()
+        self.__channel_rows = {}
 
     def set_interest_categories(self, interested_category: str):
-        if interested_category not in load_configs()['folder_name_to_save_data'].keys():
-            raise ValueError(f"\n\033[91mInvalid input of \"interested_category\"\033[0m: {interested_category}\n\033[92mValid input\033[0m: the key of \"config.yaml[folder_name_to_save_data]\".\n\033[96mExample\033[0m: {tuple(load_configs()['folder_name_to_save_data'].keys())}")
+        if interested_category not in self.__configs['folder_name_to_save_data'].keys():
+            raise ValueError(f"\n\033[91mInvalid input of \"interested_category\"\033[0m: {interested_category}\n\033[92mValid input\033[0m: the key of \"config.yaml[folder_name_to_save_data]\".\n\033[96mExample\033[0m: {tuple(self.__configs['folder_name_to_save_data'].keys())}")
 
         self.__interested_category = interested_category
 
+    def is_truncated(self) -> bool:
+        '''
+        whether the last "collect_videos" stopped early because the quota budget ran out, what was collected before is still stored
+        '''
+        return self.__is_truncated
+
     def collect_videos(self, max_videos: int, max_comments: int):
-        if self.__interested_category == "trending":
-            self.__collect_trending_videos(max_videos=max_videos, max_comments=max_comments)
-        else:
-            self.__collect_searched_videos(query=self.__interested_category, max_videos=max_videos, max_comments=max_comments)
- 
-    def __collect_trending_videos(self, max_videos: int, max_comments: int):
         start_time: float = time()
+        self.__is_truncated = False
+
+        CHECKPOINT_CONFIGS: dict[str, any] = self.__configs.get('checkpoint', {})
+        if CHECKPOINT_CONFIGS.get('enabled', False):
+            self.__checkpoint = CollectionCheckpoint(CHECKPOINT_CONFIGS.get('folder_path', './checkpoints'), self.__current_timestamp, self.__interested_category)
+            if self.__checkpoint.is_resumed():
+                print(f"Collection ({self.__interested_category}) resumed from the checkpoint of \033[92m{self.__current_timestamp}\033[0m !", end='\n', flush=True)
+
+        INCREMENTAL_COLLECTION_CONFIGS: dict[str, any] = self.__configs.get('incremental_collection', {})
+        if INCREMENTAL_COLLECTION_CONFIGS.get('enabled', False):
+            self.__comment_index = CommentIndex(
+                f"{INCREMENTAL_COLLECTION_CONFIGS.get('index_folder_path', './data/comment_index')}/{self.__interested_category}.json",
+                max_known_comment_ids=INCREMENTAL_COLLECTION_CONFIGS.get('max_known_comment_ids', 100),
+                keep_days=self.__configs.get('retention', {}).get('keep_days')
+            )
 
-        videos = self.__youtube_crawler.get_trending_videos(max_videos)
+        if self.__configs.get('streaming_storage', {}).get('enabled', False) and self.__stream_writers is None:
+            self.__open_stream_writers()
 
-        for index_video, video in enumerate(videos):
-            self.__youtube_videos.append(
-                YouTubeVideo(
-                    info=video, 
-                    statistics=self.__youtube_crawler.get_video_statistics(video.video_id), 
-                    comments=self.__youtube_crawler.get_video_comments(video.video_id, max_comments)
-                )
-            )
+        try:
+            if self.__interested_category == "trending":
+                self.__collect_trending_videos(max_videos=max_videos, max_comments=max_comments)
+            else:
+                self.__collect_searched_videos(query=self.__interested_category, max_videos=max_videos, max_comments=max_comments)
+        finally:
+            if self.__video_registry is not None:
+                # the comments kept for this category are dropped, the other categories still reuse what it fetched
+                self.__video_registry.release_category(self.__interested_category)
 
-            if self.__show_progress_bar:
-                print(f"\rCollecting Data: {get_progress_bar_text( (index_video + 1) / len(videos) )}", end='', flush=True)
-        else:
-            if self.__show_progress_bar: print()
+        get_run_metrics().record_span('collect', time() - start_time, category=self.__interested_category)
+ 
+    def __collect_trending_videos(self, max_videos: int, max_comments: int):
+        self.__collect_discovered_videos(
+            'trending',
+            lambda youtube_crawler, max_results, page_token, known_video_ids: youtube_crawler.iterate_trending_videos(max_results, page_token=page_token, known_video_ids=known_video_ids),
+            max_videos, max_comments
+        )
 
-            running_time: str = get_refined_time_string(time() - start_time)
-            print(f"Data (trending) collected in \033[92m{running_time}\033[0m !", end='\n', flush=True)
-    
     def __collect_searched_videos(self, query: str, max_videos: int, max_comments: int):
+        def discover_searched_videos(youtube_crawler: YouTubeCrawler, max_results: int, page_token: Optional[str], known_video_ids: set[str]) -> Iterator[DiscoveredPage]:
+            for videos, next_page_token in youtube_crawler.iterate_searched_videos(query, max_results, page_token=page_token, known_video_ids=known_video_ids):
+                video_ids: list[str] = [video.video_id for video in videos]
+                if self.__video_registry is None:
+                    yield videos, youtube_crawler.get_videos_statistics(video_ids), next_page_token
+                else:
+                    yield videos, self.__video_registry.get_videos_statistics(video_ids, youtube_crawler.get_videos_statistics), next_page_token
+
+        self.__collect_discovered_videos(query, discover_searched_videos, max_videos, max_comments)
+
+    def __collect_discovered_videos(self, query: str, discover_pages: Callable[[YouTubeCrawler, int, Optional[str], set[str]], Iterator[DiscoveredPage]], max_videos: int, max_comments: int):
         start_time: float = time()
 
-        videos = self.__youtube_crawler.get_searched_videos(query, max_videos)
+        for index_video, (video, statistics, comments) in enumerate(self.__iterate_collected_videos(discover_pages, max_videos, max_comments)):
+            self.__add_collected_video(YouTubeVideo(info=video, statistics=statistics, comments=comments))
+            if self.__checkpoint is not None:
+                self.__checkpoint.save_collected_video(video.video_id)
+            if self.__comment_index is not None:
+                self.__comment_index.update(video.video_id, [comment.comment_id for comment in comments if comment.comment_id], self.__current_timestamp)
 
-        for index_video, video in enumerate(videos):
-            self.__youtube_videos.append(
-                YouTubeVideo(
-                    info=video, 
-                    statistics=self.__youtube_crawler.get_video_statistics(video.video_id), 
-                    comments=self.__youtube_crawler.get_video_comments(video.video_id, max_comments)
-                )
-            )
-            
             if self.__show_progress_bar:
-                print(f"\rCollecting Data: {get_progress_bar_text( index_video / len(videos))}", end='', flush=True)
-        else:
-            if self.__show_progress_bar: print()
+                print(f"\rCollecting Data: {get_progress_bar_text( min(1, (index_video + 1) / max(1, max_videos)) )}", end='', flush=True)
+        if self.__show_progress_bar: print()
 
-            running_time: str = get_refined_time_string(time() - start_time)
-            print(f"Data ({query}) collected in \033[92m{running_time}\033[0m !", end='\n', flush=True)
+        running_time: str = get_refined_time_string(time() - start_time)
+        print(f"Data ({query}) collected in \033[92m{running_time}\033[0m !", end='\n', flush=True)
+
+    def __iterate_collected_videos(self, discover_pages: Callable[[YouTubeCrawler, int, Optional[str], set[str]], Iterator[DiscoveredPage]], max_videos: int, max_comments: int) -> Iterator[tuple[YouTubeVideoInfo, YouTubeVideoStatistics, list[YouTubeVideoComments]]]:
+        '''
+        Yield every discovered video with its statistics and comments, in the discovery order
 
-    def __prepare_data_to_store(self) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        The comments of a page are fetched as soon as the page arrives, while the next page is requested in the background.
+        With more than one worker, the comment pagination of the videos is fanned out to a thread pool,
+        and every worker thread fetches through its own "YouTubeCrawler".
+        '''
+        discovered_pages: Iterator[tuple[list[YouTubeVideoInfo], dict[str, YouTubeVideoStatistics]]] = self.__iterate_discovered_pages(discover_pages, max_videos)
+
+        if self.__max_workers == 1:
+            for videos, videos_statistics in discovered_pages:
+                for video in videos:
+                    try:
+                        comments: list[YouTubeVideoComments] = self.__get_video_comments(self.__youtube_crawler, video.video_id, max_comments)
+                    except QuotaBudgetExceededError as error:
+                        self.__truncate_collection(error)
+                        return
+                    yield video, videos_statistics.get(video.video_id, UNKNOWN_VIDEO_STATISTICS), comments
+            return
+
+        with ThreadPoolExecutor(max_workers=self.__max_workers, initializer=self.__initialize_worker_crawler) as executor:
+            pending_videos: deque[tuple[YouTubeVideoInfo, YouTubeVideoStatistics, Future]] = deque()
+            for videos, videos_statistics in discovered_pages:
+                for video in videos:
+                    pending_videos.append((
+                        video,
+                        videos_statistics.get(video.video_id, UNKNOWN_VIDEO_STATISTICS),
+                        executor.submit(lambda video_id: self.__get_video_comments(self.__worker_local.youtube_crawler, video_id, max_comments), video.video_id)
+                    ))
+                while pending_videos and pending_videos[0][2].done():
+                    yield from self.__get_collected_video(*pending_videos.popleft())
+                if self.__is_truncated:
+                    break
+
+            # the videos already submitted are still collected, those whose comments ran out of quota are left out
+            while pending_videos:
+                yield from self.__get_collected_video(*pending_videos.popleft())
+
+    def __get_collected_video(self, video: YouTubeVideoInfo, statistics: YouTubeVideoStatistics, comments_future: Future) -> Iterator[tuple[YouTubeVideoInfo, YouTubeVideoStatistics, list[YouTubeVideoComments]]]:
+        try:
+            yield video, statistics, comments_future.result()
+        except QuotaBudgetExceededError as error:
+            self.__truncate_collection(error)
+
+    def __truncate_collection(self, error: QuotaBudgetExceededError):
+        # running out of quota ends the collection like running out of videos, no new page or video is requested afterwards
+        if self.__is_truncated:
+            return
+        self.__is_truncated = True
+        get_run_metrics().increment('collections_truncated', category=self.__interested_category)
+        print(f"\n\033[93mCollection ({self.__interested_category}) truncated\033[0m, the data collected so far is kept: {error}", end='\n', flush=True)
+
+    def __get_video_comments(self, youtube_crawler: YouTubeCrawler, video_id: str, max_comments: int) -> list[YouTubeVideoComments]:
+        comment_options: dict[str, any] = {}
+        known_comment_ids: Optional[set[str]] = None if self.__comment_index is None else self.__comment_index.get_known_comment_ids(video_id)
+        if known_comment_ids is not None:
+            # only the comments newer than the last snapshot are fetched, a video seen for the first time gets its top comments as usual
+            comment_options = {'order': 'time', 'known_comment_ids': known_comment_ids}
+
+        if self.__video_registry is None or (self.__checkpoint is not None and self.__checkpoint.has_saved_comments(video_id)):
+            return self.__fetch_video_comments(youtube_crawler, video_id, max_comments, comment_options)[0]
+
+        fetched_page_counts: list[int] = []
+        def fetch_video_comments() -> tuple[list[YouTubeVideoComments], int]:
+            comments, page_count = self.__fetch_video_comments(youtube_crawler, video_id, max_comments, comment_options)
+            fetched_page_counts.append(page_count)
+            return comments, page_count
+
+        comments: list[YouTubeVideoComments] = self.__video_registry.get_video_comments(self.__interested_category, video_id, max_comments, fetch_video_comments, **comment_options)
+        if not fetched_page_counts and self.__checkpoint is not None:
+            # the comments fetched by another category are journaled as one page, for a resumed run to find them
+            self.__checkpoint.save_comments_page(video_id, comments, None)
+        return comments
+
+    def __fetch_video_comments(self, youtube_crawler: YouTubeCrawler, video_id: str, max_comments: int, comment_options: dict[str, any]) -> tuple[list[YouTubeVideoComments], int]:
+        '''
+        Returns:
+            (comments, fetched_page_count) : the comments, saved ones first, and the number of pages fetched from the API
+        '''
+        fetched_page_count: int = 0
+        def on_page(page_comments: list[YouTubeVideoComments], page_next_page_token: Optional[str]):
+            nonlocal fetched_page_count
+            fetched_page_count += 1
+            if self.__checkpoint is not None:
+                self.__checkpoint.save_comments_page(video_id, page_comments, page_next_page_token)
+
+        if self.__checkpoint is None:
+            return youtube_crawler.get_video_comments(video_id, max_comments, on_page=on_page, **comment_options), fetched_page_count
+
+        comments, next_page_token, is_finished = self.__checkpoint.get_saved_comments(video_id)
+        if is_finished or len(comments) >= max_comments:
+            return comments[:max_comments], fetched_page_count
+
+        comments += youtube_crawler.get_video_comments(video_id, max_comments - len(comments), page_token=next_page_token, on_page=on_page, **comment_options)
+        return comments, fetched_page_count
+
+    def __iterate_discovered_pages(self, discover_pages: Callable[[YouTubeCrawler, int, Optional[str], set[str]], Iterator[DiscoveredPage]], max_videos: int) -> Iterator[tuple[list[YouTubeVideoInfo], dict[str, YouTubeVideoStatistics]]]:
+        page_token: Optional[str] = None
+        known_video_ids: set[str] = set()
+        if self.__checkpoint is not None and self.__checkpoint.is_resumed():
+            videos, videos_statistics = self.__checkpoint.get_videos()
+            yield list(videos[:max_videos]), dict(videos_statistics)
+            # the discovery goes on from the last saved page if the previous run stopped in the middle of it,
+            # the videos saved before are neither yielded again nor discovered beyond "max_videos" in total
+            page_token = self.__checkpoint.get_discovery_page_token()
+            known_video_ids = {video.video_id for video in videos}
+            if page_token is None or len(known_video_ids) >= max_videos:
+                return
+
+        # the pages are fetched on a background thread, through a crawler of their own (an HTTP connection is not thread-safe)
+        discovery_crawler = YouTubeCrawler(self.__location, api_endpoint=self.__api_endpoint, request_executor=self.__request_executor, use_response_cache=self.__use_response_cache)
+        discovered_pages: Iterator[DiscoveredPage] = prefetch_pages(discover_pages(discovery_crawler, max_videos, page_token, known_video_ids))
+        while not self.__is_truncated:
+            try:
+                videos, videos_statistics, next_page_token = next(discovered_pages)
+            except StopIteration:
+                return
+            except QuotaBudgetExceededError as error:
+                self.__truncate_collection(error)
+                return
+            if self.__video_registry is not None:
+                self.__video_registry.add_videos_statistics(videos_statistics)
+            if self.__checkpoint is not None:
+                self.__checkpoint.save_videos(videos, videos_statistics, next_page_token)
+            yield videos, videos_statistics
+
+    def __add_collected_video(self, video: YouTubeVideo):
+        get_run_metrics().increment('videos_collected', category=self.__interested_category)
+        get_run_metrics().increment('comments_collected', len(video.get_comments()), category=self.__interested_category)
+
+        # the rows go straight to the columns of the collected data, or in streaming mode to the Parquet row groups,
+        # the video and its comments are not kept, only the (few) channels are kept until "store_data"
+        if self.__stream_writers is None:
+            self.__collected_data['video_info'].append_row(self.__get_video_info_row(video))
+            self.__collected_data['video_comments'].append_columns(self.__get_video_comments_columns(video))
+        else:
+            self.__stream_writers['video_info'].write_rows([self.__get_video_info_row(video)])
+            self.__stream_writers['video_comments'].write_columns(self.__get_video_comments_columns(video))
+        if video.get_info().channel_id not in self.__channel_rows:
+            self.__channel_rows[video.get_info().channel_id] = self.__get_channel_row(video.get_info())
+
+    def __open_stream_writers(self):
+        config: Configs = self.__configs
+        FILE_NAMES: dict[str, str] = get_file_names_of_saved_data(config)
+        PARQUET_OPTIONS: dict[str, any] = get_parquet_options(config)
+
+        TEXT_COLUMNS: dict[str, list[str]] = get_text_columns_to_clean(config)
+
+        self.__stream_writers = {
+            data_name: ParquetStreamWriter(
+                self.__storage_backend.open_writer(self.__interested_category, f"{self.__current_timestamp}_{file_name}"),
+                SCHEMAS_OF_SAVED_DATA[data_name],
+                transform_table=lambda table, data_name=data_name: clean_table_text(table, TEXT_COLUMNS.get(data_name, [])),
+                **PARQUET_OPTIONS
+            )
+            for data_name, file_name in FILE_NAMES.items()
+        }
+        self.__channel_rows = {}
+
+    def __close_stream_writers(self):
+        self.__stream_writers['channel_info'].write_rows(self.__get_enriched_channel_rows(list(self.__channel_rows.values())))
+        FILE_NAMES: dict[str, str] = get_file_names_of_saved_data(self.__configs)
+        for data_name, stream_writer in self.__stream_writers.items():
+            row_count: int = stream_writer.close()
+            self.__record_written_file(FILE_NAMES[data_name], row_count, stream_writer.get_byte_count())
+
+        self.__stream_writers = None
+        self.__channel_rows = {}
+
+    def __get_video_info_row(self, video: YouTubeVideo) -> list[any]:
+        video_info: YouTubeVideoInfo = video.get_info()
+        statistics: YouTubeVideoStatistics = video.get_statistics()
+        return [video_info.video_id, video_info.title, video_info.channel, video_info.published_time, video_info.description, video_info.thumbnails, statistics.view_count, statistics.like_count]
+
+    def __get_video_comments_columns(self, video: YouTubeVideo) -> list[list[any]]:
+        video_comments: list[YouTubeVideoComments] = video.get_comments()
+        return [
+            [video.get_info().video_id] * len(video_comments),
+            [video_comment.text for video_comment in video_comments],
+            [video_comment.like_count for video_comment in video_comments],
+            [video_comment.reply_count for video_comment in video_comments],
+            [video_comment.comment_id for video_comment in video_comments],
+        ]
+
+    def __get_channel_row(self, video_info: YouTubeVideoInfo) -> list[any]:
+        return [video_info.channel_id, video_info.channel, None, None, None]
+
+    def __get_enriched_channel_rows(self, channel_rows: list[list[any]]) -> list[list[any]]:
+        # batched (and cached) channels lookups, the rows of channels the API does not return are kept as they are
+        # the enrichment is best-effort: once the quota runs out or a lookup fails, the remaining channels keep their title-only rows and the data is stored anyway
+        channel_ids: list[str] = [channel_row[0] for channel_row in channel_rows]
+        channels_info: dict[str, YouTubeChannelInfo] = {}
+        for index_start in range(0, len(channel_ids), MAX_IDS_PER_REQUEST):
+            try:
+                channels_info.update(self.__youtube_crawler.get_channels_info(channel_ids[index_start:index_start + MAX_IDS_PER_REQUEST]))
+            except (QuotaBudgetExceededError, HttpError) as error:
+                get_run_metrics().increment('channels_not_enriched', len(channel_ids) - index_start, category=self.__interested_category)
+                print(f"\033[93mChannel info ({self.__interested_category}) not enriched\033[0m for {len(channel_ids) - index_start} channels: {error}", end='\n', flush=True)
+                break
+        return [self.__get_channel_info_row(channels_info[channel_row[0]]) if channel_row[0] in channels_info else channel_row for channel_row in channel_rows]
+
+    def __get_channel_info_row(self, channel_info: YouTubeChannelInfo) -> list[any]:
+        return [channel_info.channel_id, channel_info.title, channel_info.description, channel_info.subscribers, channel_info.thumbnails]
+
+    def __initialize_worker_crawler(self):
+        self.__worker_local.youtube_crawler = YouTubeCrawler(self.__location, api_endpoint=self.__api_endpoint, request_executor=self.__request_executor, use_response_cache=self.__use_response_cache)
+
+    def __prepare_data_to_store(self) -> tuple[pa.Table, pa.Table, pa.Table]:
         '''
         Prepare data to store in local or online storage
         
         Returns:
-            (video_info_df, video_comments_df, channels_df) : tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]
+            (video_info_table, video_comments_table, channels_table) : tuple[pa.Table, pa.Table, pa.Table], typed by "youtube_data_schema"
         
         Example:
-            video_info_df: pd.DataFrame
-            video_comments_df: pd.DataFrame
-            channels_df: pd.DataFrame
-            video_info_df, video_comments_df, channels_df = self.__prepare_data_to_store()
+            video_info_table: pa.Table
+            video_comments_table: pa.Table
+            channels_table: pa.Table
+            video_info_table, video_comments_table, channels_table = self.__prepare_data_to_store()
         '''
-        video_info_list = [['video_id', 'title', 'channel', 'published_time', 'description', 'thumbnails', 'view_count', 'like_count']]
-        video_comments_list = [['video_id', 'text', 'like_count', 'reply_count']]
-        channels_list = [['channel_id', 'title', 'description', 'subscribers', 'thumbnails']]
-        seen_channel_ids = set()
-
-        for index_video, video in enumerate(self.__youtube_videos):
-            video_info: YouTubeVideoInfo = video.get_info()
-            statistics: YouTubeVideoStatistics = video.get_statistics()
-            video_comments:YouTubeVideoComments = video.get_comments()
-            video_info_list.append([video_info.video_id, video_info.title, video_info.channel, video_info.published_time, video_info.description, video_info.thumbnails, statistics.view_count, statistics.like_count])
-            for video_comment in video_comments:
-                video_comments_list.append([video_info.video_id, video_comment.text, video_comment.like_count, video_comment.reply_count])
-            if video_info.channel_id not in seen_channel_ids:
-                seen_channel_ids.add(video_info.channel_id)
-                channels_list.append([video_info.channel_id, video_info.channel, None, None, None])
-
-            if self.__show_progress_bar:
-                print(f"\rPreparing data to store: {get_progress_bar_text( index_video / len(self.__youtube_videos) )}", end='', flush=True)
-        else:
-            if self.__show_progress_bar: print(f"\rPreparing data to store: {get_progress_bar_text(1)}")
+        start_time: float = time()
 
-        video_info_df = pd.DataFrame(video_info_list[1:], columns=video_info_list[0])
-        video_comments_df = pd.DataFrame(video_comments_list[1:], columns=video_comments_list[0])
-        channels_df = pd.DataFrame(channels_list[1:], columns=channels_list[0])
+        # the collected data is already columnar, the tables are built column by column from it
+        TEXT_COLUMNS: dict[str, list[str]] = get_text_columns_to_clean(self.__configs)
+        video_info_table = clean_table_text(self.__collected_data['video_info'].to_table(), TEXT_COLUMNS.get('video_info', []))
+        video_comments_table = clean_table_text(self.__collected_data['video_comments'].to_table(), TEXT_COLUMNS.get('video_comments', []))
+        channels_table = clean_table_text(build_table_from_rows(self.__get_enriched_channel_rows(list(self.__channel_rows.values())), SCHEMAS_OF_SAVED_DATA['channel_info']), TEXT_COLUMNS.get('channel_info', []))
 
-        return video_info_df, video_comments_df, channels_df
+        get_run_metrics().record_span('prepare', time() - start_time, category=self.__interested_category)
+        return video_info_table, video_comments_table, channels_table
 
     def store_data(self):
         start_time: float = time()
 
-        config: dict[str, any] = load_configs()
-        FOLDER_PATH: str = config['folder_name_to_save_data'][self.__interested_category]
-        FILE_NAMES: dict[str, str] = config['file_names_of_saved_data']
+        if self.__stream_writers is not None:
+            self.__close_stream_writers()
+        else:
+            self.__store_prepared_data()
 
-        video_info_df: pd.DataFrame
-        video_comments_df: pd.DataFrame
-        channels_df: pd.DataFrame
-        video_info_df, video_comments_df, channels_df = self.__prepare_data_to_store()
+        if self.__comment_index is not None:
+            self.__comment_index.save()
+            self.__comment_index = None
 
-        video_info_df.to_parquet(f"{FOLDER_PATH}/{self.__current_timestamp}_{FILE_NAMES['video_info']}", index=False)
-        video_comments_df.to_parquet(f"{FOLDER_PATH}/{self.__current_timestamp}_{FILE_NAMES['video_comments']}", index=False)
-        channels_df.to_parquet(f"{FOLDER_PATH}/{self.__current_timestamp}_{FILE_NAMES['channel_info']}", index=False)
+        if self.__checkpoint is not None: # the data is safely stored, a restarted run has nothing left to resume
+            self.__checkpoint.remove()
+            self.__checkpoint = None
 
+        get_run_metrics().record_span('store', time() - start_time, category=self.__interested_category)
         running_time: str = get_refined_time_string(time() - start_time)
         print(f"Data ({self.__interested_category}) stored in \033[92m{running_time}\033[0m !", end='\n', flush=True)
 
-    def __upload_a_category_data_to_google_drive(self, interested_category: str):
-        if interested_category not in load_configs()['folder_name_to_save_data'].keys():
-            raise ValueError(f"\n\033[91mInvalid input of \"interested_category\"\033[0m: {interested_category}\n\033[92mValid input\033[0m: the key of \"config.yaml[folder_name_to_save_data]\".\n\033[96mExample\033[0m: {tuple(load_configs()['folder_name_to_save_data'].keys())}")
+    def __store_prepared_data(self):
+        config: Configs = self.__configs
+        FILE_NAMES: dict[str, str] = get_file_names_of_saved_data(config)
+
+        PARQUET_OPTIONS: dict[str, any] = get_parquet_options(config)
+
+        video_info_table: pa.Table
+        video_comments_table: pa.Table
+        channels_table: pa.Table
+        video_info_table, video_comments_table, channels_table = self.__prepare_data_to_store()
+
+        for data_name, table in (('video_info', video_info_table), ('video_comments', video_comments_table), ('channel_info', channels_table)):
+            byte_count: int = write_parquet_table(self.__storage_backend, self.__interested_category, f"{self.__current_timestamp}_{FILE_NAMES[data_name]}", table, **PARQUET_OPTIONS)
+            self.__record_written_file(FILE_NAMES[data_name], table.num_rows, byte_count)
+
+    def __record_written_file(self, file_name: str, row_count: int, byte_count: int):
+        get_run_metrics().increment('rows_written', row_count, category=self.__interested_category, file_name=file_name)
+        get_run_metrics().increment('bytes_written', byte_count, category=self.__interested_category, file_name=file_name)
 
-        config: dict[str, any] = load_configs()
-        FOLDER_PATH: str = config['folder_name_to_save_data'][interested_category]
-        FILE_NAMES: dict[str, str] = config['file_names_of_saved_data']
-        PARENT_FOLDER_ID: str = config['parent_folder_id_to_upload_data'][interested_category]
+    def __get_a_category_file_paths_to_upload(self, interested_category: str) -> list[str]:
+        if interested_category not in self.__configs['folder_name_to_save_data'].keys():
+            raise ValueError(f"\n\033[91mInvalid input of \"interested_category\"\033[0m: {interested_category}\n\033[92mValid input\033[0m: the key of \"config.yaml[folder_name_to_save_data]\".\n\033[96mExample\033[0m: {tuple(self.__configs['folder_name_to_save_data'].keys())}")
 
-        google_drive_service: any = build_google_drive_service()
+        FILE_NAMES: dict[str, str] = get_file_names_of_saved_data(self.__configs)
 
-        for file_name in FILE_NAMES.values():
-            file_metadata: dict[str, any] = {
-                'name': self.__current_timestamp+'_'+file_name,
-                'parents': [PARENT_FOLDER_ID]
-            }
-            media = MediaFileUpload(f'{FOLDER_PATH}/{self.__current_timestamp}_{file_name}', mimetype='application/octet-stream')
-            google_drive_service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+        # a category aborted before its data was stored has no file to upload
+        file_paths: list[str] = [self.__storage_backend.get_file_path(interested_category, f'{self.__current_timestamp}_{file_name}') for file_name in FILE_NAMES.values()]
+        return [file_path for file_path in file_paths if os.path.exists(file_path)]
 
-    def upload_data_to_google_drive(self):
+    def upload_data_to_google_drive(self, google_drive_uploader: Optional[GoogleDriveUploader] = None, storage_backend: Optional[StorageBackend] = None):
+        '''
+        Copy the locally stored files of this run to G-Drive, or to "storage_backend" if given
+
+        Nothing is uploaded when the data was stored straight into a remote backend, "configs.yaml[storage_backend]".
+        '''
         start_time: float = time()
 
-        for interested_category in load_configs()['folder_name_to_save_data'].keys():
-            self.__upload_a_category_data_to_google_drive(interested_category)
+        if not isinstance(self.__storage_backend, LocalStorageBackend):
+            print(f"\033[93mUpload skipped\033[0m, the data is already stored in \033[92m{type(self.__storage_backend).__name__}\033[0m", end='\n', flush=True)
+            return
+
+        if storage_backend is None:
+            storage_backend = GoogleDriveStorageBackend(google_drive_uploader=google_drive_uploader, request_executor=self.__request_executor)
+
+        uploaded_file_count, skipped_file_count = storage_backend.store_local_files({
+            interested_category: self.__get_a_category_file_paths_to_upload(interested_category)
+            for interested_category in self.__configs['folder_name_to_save_data'].keys()
+        })
 
+        get_run_metrics().record_span('upload', time() - start_time)
         running_time: str = get_refined_time_string(time() - start_time)
-        print(f"Data uploaded in \033[92m{running_time}\033[0m !", end='\n', flush=True)
+        print(f"Data uploaded in \033[92m{running_time}\033[0m ! (\033[92m{uploaded_file_count}\033[0m uploaded, \033[92m{skipped_file_count}\033[0m already uploaded)", end='\n', flush=True)
+
+def get_file_names_of_saved_data(config: dict[str, any]) -> dict[str, str]:
+    '''
+    The file names of "configs.yaml[file_names_of_saved_data]", the comments go to a delta file in incremental collection
+    '''
+    FILE_NAMES: dict[str, str] = dict(config['file_names_of_saved_data'])
+    INCREMENTAL_COLLECTION_CONFIGS: dict[str, any] = config.get('incremental_collection', {})
+    if INCREMENTAL_COLLECTION_CONFIGS.get('enabled', False):
+        FILE_NAMES['video_comments'] = INCREMENTAL_COLLECTION_CONFIGS.get('delta_file_name', 'video_comments_delta.parquet')
+    return FILE_NAMES
+
+def get_text_columns_to_clean(config: dict[str, any]) -> dict[str, list[str]]:
+    '''
+    The HTML text columns of every kind of saved data to clean before storage, "configs.yaml[text_cleaning]"
+    '''
+    TEXT_CLEANING_CONFIGS: dict[str, any] = config.get('text_cleaning', {})
+    if not TEXT_CLEANING_CONFIGS.get('enabled', True):
+        return {}
+    return TEXT_CLEANING_CONFIGS.get('columns', {'channel_info': ['title', 'description'], 'video_info': ['title', 'channel', 'description'], 'video_comments': ['text']})
 
 if __name__ == '__main__':
-    data_collector = DataCollector('TW', show_progress_bar=False)
+    data_collector = DataCollector('TW', show_progress_bar=False, use_response_cache=True)
 
     data_collector.set_interest_categories('trending')
     data_collector.collect_videos(max_videos=1, max_comments=1)
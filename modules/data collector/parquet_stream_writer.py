@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sys import path as sys_path
+sys_path += ['modules']
+from storage_backend import StorageWriter
+from columnar_accumulator import ColumnarAccumulator
+
+@dataclass
+class ParquetStreamWriter:
+    '''
+    Write rows to a storage backend file one row group at a time, so at most "row_group_size" rows are held in memory
+
+    The file is only committed to the backend on "close", so a crashed run never leaves a half-written file behind.
+
+    Example:
+        writer = ParquetStreamWriter(storage_backend.open_writer('news', '2025021812_video_comments.parquet'), VIDEO_COMMENTS_SCHEMA, row_group_size=10000)
+        writer.write_rows([['QyLM3PyepZw', 'Nice video', 3, 0, 'Ugx1']])
+        writer.close()
+    '''
+    __storage_writer: StorageWriter
+    __schema: pa.Schema
+    __row_group_size: int
+    __writer: pq.ParquetWriter
+    __buffered_rows: ColumnarAccumulator
+    __row_count: int
+    __byte_count: int
+    __transform_table: Optional[Callable[[pa.Table], pa.Table]]
+
+    def __init__(self, storage_writer: StorageWriter, schema: pa.Schema, row_group_size: int = 10000, compression: str = 'zstd', compression_level: Optional[int] = None,
+                 transform_table: Optional[Callable[[pa.Table], pa.Table]] = None):
+        self.__storage_writer = storage_writer
+        self.__schema = schema
+        self.__row_group_size = row_group_size
+        self.__writer = pq.ParquetWriter(storage_writer.get_sink(), schema, compression=compression, compression_level=compression_level)
+        self.__buffered_rows = ColumnarAccumulator(schema, batch_size=row_group_size)
+        self.__row_count = 0
+        self.__byte_count = 0
+        self.__transform_table = transform_table # applied to every row group before it is written, e.g. the text cleaning
+
+    def write_rows(self, rows: list[list[any]]):
+        self.__buffered_rows.append_rows(rows)
+        if self.__buffered_rows.get_row_count() >= self.__row_group_size:
+            self.__flush()
+
+    def write_columns(self, columns: list[list[any]]):
+        '''
+        write rows given as one list of values per column of the schema, see "ColumnarAccumulator.append_columns"
+        '''
+        self.__buffered_rows.append_columns(columns)
+        if self.__buffered_rows.get_row_count() >= self.__row_group_size:
+            self.__flush()
+
+    def close(self) -> int:
+        self.__flush()
+        self.__writer.close()
+        self.__byte_count = self.__storage_writer.commit()
+        return self.__row_count
+
+    def get_byte_count(self) -> int:
+        '''
+        The size of the written file, known once closed
+        '''
+        return self.__byte_count
+
+    def abort(self):
+        self.__writer.close()
+        self.__storage_writer.abort()
+
+    def __flush(self):
+        if self.__buffered_rows.get_row_count() == 0:
+            return
+
+        row_group_table: pa.Table = self.__buffered_rows.pop_table()
+        if self.__transform_table is not None:
+            row_group_table = self.__transform_table(row_group_table)
+        self.__writer.write_table(row_group_table, row_group_size=self.__row_group_size)
+        self.__row_count += row_group_table.num_rows
+
+def get_parquet_options(config: dict[str, any]) -> dict[str, any]:
+    '''
+    The options of every written Parquet file, "configs.yaml[parquet_options]"
+    '''
+    PARQUET_OPTIONS: dict[str, any] = config.get('parquet_options', {})
+    return {
+        'compression': PARQUET_OPTIONS.get('compression', 'zstd'),
+        'compression_level': PARQUET_OPTIONS.get('compression_level'),
+        'row_group_size': PARQUET_OPTIONS.get('row_group_size', 10000)
+    }
@@ -0,0 +1,122 @@
+from datetime import datetime
+from typing import Optional
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sys import path as sys_path
+sys_path += ['modules']
+from utilities import load_configs, get_file_name_period
+from snapshot_dataset import SnapshotManifest, SnapshotDataset
+from parquet_stream_writer import get_parquet_options
+
+# the rows of a compacted file are sorted on these columns, then on "snapshot_timestamp", every row of every snapshot is kept
+SORT_KEYS: dict[str, list[str]] = {
+    'channel_info': ['channel_id'],
+    'video_info': ['video_id'],
+    'video_comments': ['video_id'],
+}
+PERIOD_LENGTHS: dict[str, int] = {'day': 8, 'month': 6} # the length of the "YYYYMMDD" / "YYYYMM" prefix of the compacted files
+
+def compact_snapshots(interested_category: str, granularity: str = 'day', current_time: Optional[datetime] = None, manifest: Optional[SnapshotManifest] = None) -> list[tuple[str, int, int]]:
+    '''
+    Merge the snapshots of every finished day (or month) of a category into one "{YYYYMMDD}_{file_name}" (or "{YYYYMM}_{file_name}") per kind of data,
+    sorted, then delete the merged files
+
+    The rows of every snapshot are kept (e.g. the view counts of a video every 12 hours), only a snapshot merged twice is dropped,
+    i.e. the source files left behind by an interrupted compaction, whose snapshots are already held by a compacted file.
+
+    The compacted file is written to "{file_path}.partial" and renamed when complete, so a reader never sees a half-written file.
+    The period still running at "current_time" is left alone, as later runs still add snapshots to it.
+    The comment delta files of the incremental collection are merged with the comment snapshots of their period.
+
+    Returns:
+        compacted_files: (compacted_file_path, merged_file_count, row_count) of every written file
+
+    Example:
+        compacted_files: list[tuple[str, int, int]] = compact_snapshots('news', granularity='month')
+    '''
+    if granularity not in PERIOD_LENGTHS:
+        raise ValueError(f"\n\033[91mInvalid input of \"granularity\"\033[0m: {granularity}\n\033[92mValid input\033[0m: {tuple(PERIOD_LENGTHS.keys())}")
+
+    configs: dict[str, any] = load_configs()
+    FOLDER_PATH: str = configs['folder_name_to_save_data'][interested_category]
+    FILE_NAMES: dict[str, str] = configs['file_names_of_saved_data']
+    PARQUET_OPTIONS: dict[str, any] = get_compaction_parquet_options(configs)
+    PERIOD_LENGTH: int = PERIOD_LENGTHS[granularity]
+
+    if current_time is None:
+        current_time = datetime.now()
+    if manifest is None:
+        manifest = SnapshotManifest(configs.get('snapshot_dataset', {}).get('manifest_file_path', './data/snapshot_manifest.json'))
+    manifest.refresh()
+
+    compacted_files: list[tuple[str, int, int]] = []
+    for data_name, file_name in FILE_NAMES.items():
+        entries_by_period: dict[str, list[dict[str, any]]] = {}
+        for entry in manifest.get_entries(data_name, categories=[interested_category]):
+            if len(entry['file_timestamp']) < PERIOD_LENGTH: continue # already compacted into a longer period
+            entries_by_period.setdefault(entry['file_timestamp'][:PERIOD_LENGTH], []).append(entry)
+
+        snapshot_dataset = SnapshotDataset(data_name, manifest)
+        for period, entries in sorted(entries_by_period.items()):
+            if get_file_name_period(period)[1] > current_time: continue
+            compacted_file_path: str = f"{FOLDER_PATH}/{period}_{file_name}"
+            if [entry['file_path'] for entry in entries] == [compacted_file_path]: continue # nothing new since the last compaction
+
+            period_table: pa.Table = read_snapshots_once(snapshot_dataset, interested_category, entries)
+            compacted_table: pa.Table = sort_snapshot_rows(period_table.drop_columns(['category']), SORT_KEYS[data_name])
+
+            pq.write_table(compacted_table, f"{compacted_file_path}.partial", **PARQUET_OPTIONS)
+            os.replace(f"{compacted_file_path}.partial", compacted_file_path)
+            for entry in entries:
+                if entry['file_path'] != compacted_file_path:
+                    os.remove(entry['file_path'])
+
+            compacted_files.append((compacted_file_path, len(entries), compacted_table.num_rows))
+
+    if manifest.refresh() > 0:
+        manifest.save()
+
+    return compacted_files
+
+def read_snapshots_once(snapshot_dataset: SnapshotDataset, interested_category: str, entries: list[dict[str, any]]) -> pa.Table:
+    '''
+    Read the rows of the files of "entries", a snapshot held by several files is read from the first compacted file holding it
+
+    A compacted file is written whole before its source files are deleted, so a snapshot found in a compacted file and in another file is a copy.
+    The raw files never drop each other's rows: two snapshots of the same hour are both kept.
+    '''
+    tables: list[pa.Table] = []
+    read_snapshot_timestamps: set[str] = set()
+    for entry in sorted(entries, key=lambda entry: (not entry['is_compacted'], entry['file_path'])): # the compacted files first
+        table: pa.Table = snapshot_dataset.to_table(categories=[interested_category], file_paths=[entry['file_path']])
+        if read_snapshot_timestamps:
+            is_copied = pc.is_in(table['snapshot_timestamp'], value_set=pa.array(sorted(read_snapshot_timestamps), type=pa.string()))
+            table = table.filter(pc.invert(pc.fill_null(is_copied, False)))
+        if entry['is_compacted']:
+            read_snapshot_timestamps.update(pc.unique(table['snapshot_timestamp']).to_pylist())
+        tables.append(table)
+
+    return pa.concat_tables(tables).unify_dictionaries() if tables else snapshot_dataset.get_schema().empty_table()
+
+def sort_snapshot_rows(table: pa.Table, key_columns: list[str]) -> pa.Table:
+    '''
+    Sort the rows on the key columns, then on "snapshot_timestamp" (the order of the rows within a snapshot is kept), no row is dropped
+    '''
+    if table.num_rows == 0:
+        return table
+
+    sort_columns: list[str] = key_columns + ['snapshot_timestamp'] # cast, a dictionary column cannot be sorted on
+    sort_indices: pa.Array = pc.sort_indices(
+        pa.table({sort_column: table[sort_column].cast(pa.string()) for sort_column in sort_columns}),
+        sort_keys=[(sort_column, 'ascending') for sort_column in sort_columns]
+    )
+    return table.take(sort_indices).unify_dictionaries().combine_chunks()
+
+def get_compaction_parquet_options(configs: dict[str, any]) -> dict[str, any]:
+    COMPACTION_CONFIGS: dict[str, any] = configs.get('compaction', {})
+    return {
+        **get_parquet_options(configs),
+        'row_group_size': COMPACTION_CONFIGS.get('row_group_size', 100000) # the rows are sorted on video_id, so larger row groups still prune well
+    }
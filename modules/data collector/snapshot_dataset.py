@@ -0,0 +1,316 @@
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+from datetime import datetime
+import hashlib
+import json
+import os
+import pyarrow as pa
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
+from sys import path as sys_path
+sys_path += ['modules']
+from utilities import load_configs, get_file_name_period
+from youtube_data_schema import SCHEMAS_OF_SAVED_DATA, conform_table_to_schema
+if TYPE_CHECKING:
+    import pyarrow.dataset as ds # imported by the scans only, "pyarrow.dataset" imports pandas and the manifest (e.g. for the cleanup) needs neither
+    from pandas import DataFrame
+
+PARTITION_FIELDS: list[pa.Field] = [pa.field('category', pa.string()), pa.field('snapshot_timestamp', pa.string())] # derived from the folder and the file name
+MANIFEST_VERSION: int = 2 # a manifest of another version is rebuilt from the files
+
+@dataclass
+class SnapshotManifest:
+    '''
+    Index of the saved Parquet snapshots: category, timestamps, row count and per-column min/max of every file, read from the Parquet footers
+
+    The snapshots of a run are named "YYYYMMDDHH_*", the compacted files "YYYYMMDD_*" or "YYYYMM_*" and keep the "snapshot_timestamp" of every row.
+
+    Only the files added or changed since the last "refresh" have their footer read.
+
+    Example:
+        snapshot_manifest = SnapshotManifest('./data/snapshot_manifest.json')
+        snapshot_manifest.refresh()
+        entries: list[dict[str, any]] = snapshot_manifest.get_entries('video_comments', categories=['news'], start_timestamp='2025030100')
+        snapshot_manifest.save()
+    '''
+    __file_path: str
+    __entries: dict[str, dict[str, any]]
+
+    def __init__(self, file_path: str):
+        self.__file_path = file_path
+        self.__entries = {}
+
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as file:
+                manifest: dict[str, any] = json.load(file)
+            if manifest.get('version') == MANIFEST_VERSION:
+                self.__entries = manifest['entries']
+
+    def refresh(self, folder_paths: Optional[dict[str, str]] = None, data_names_by_file_name: Optional[dict[str, str]] = None, check_modified: bool = True) -> int:
+        '''
+        Scan the data folders, index the new or changed snapshot files and drop the deleted ones
+
+        Args:
+            folder_paths: the folder of every category, "configs.yaml[folder_name_to_save_data]" if not given
+            data_names_by_file_name: the data name of every file name suffix, built from "configs.yaml" if not given
+            check_modified: stat the indexed files to re-read the changed ones, when False only the names are listed and only new files are read
+
+        Returns:
+            changed_entry_count: the number of files whose footer was read, plus the deleted files dropped from the manifest
+        '''
+        configs: dict[str, any] = load_configs()
+        if folder_paths is None:
+            folder_paths = configs['folder_name_to_save_data']
+        if data_names_by_file_name is None:
+            data_names_by_file_name = get_data_names_by_file_name(configs)
+
+        changed_entry_count: int = 0
+        found_file_paths: set[str] = set()
+        for category, folder_path in folder_paths.items():
+            if not os.path.isdir(folder_path): continue
+            for file_name in sorted(os.listdir(folder_path)):
+                file_timestamp, _, data_file_name = file_name.partition('_')
+                if data_file_name not in data_names_by_file_name or get_file_name_period(file_name) is None: continue
+
+                file_path: str = f"{folder_path}/{file_name}"
+                found_file_paths.add(file_path)
+
+                entry: Optional[dict[str, any]] = self.__entries.get(file_path)
+                if entry is not None and not check_modified: # the snapshots are never modified once written, only replaced by compaction
+                    continue
+                file_stat: os.stat_result = os.stat(file_path)
+                # a fresh checkout (e.g. every GitHub Actions run) resets the modified times, a snapshot of a run is never rewritten so its size is enough,
+                # a compacted file is rewritten in place when a late snapshot joins its period
+                if entry is not None and entry['size'] == file_stat.st_size and (not entry['is_compacted'] or entry['modified_time_ns'] == file_stat.st_mtime_ns):
+                    continue
+
+                self.__entries[file_path] = self.__build_entry(file_path, file_stat, category, file_timestamp, data_names_by_file_name[data_file_name])
+                changed_entry_count += 1
+
+        for file_path in set(self.__entries) - found_file_paths:
+            del self.__entries[file_path]
+            changed_entry_count += 1
+
+        return changed_entry_count
+
+    def get_entries(self, data_name: Optional[str] = None, categories: Optional[list[str]] = None, start_timestamp: Optional[str] = None, end_timestamp: Optional[str] = None) -> list[dict[str, any]]:
+        '''
+        "start_timestamp" and "end_timestamp" are inclusive "YYYYMMDDHH" strings, like the prefix of the file names,
+        a compacted file is selected when the snapshots it holds overlap them
+        '''
+        return [
+            entry for entry in self.__entries.values()
+            if (data_name is None or entry['data_name'] == data_name)
+            and (categories is None or entry['category'] in categories)
+            and (start_timestamp is None or entry['last_snapshot_timestamp'] >= start_timestamp)
+            and (end_timestamp is None or entry['first_snapshot_timestamp'] <= end_timestamp)
+        ]
+
+    def remove_entries(self, file_paths: list[str]):
+        for file_path in file_paths:
+            self.__entries.pop(file_path, None)
+
+    def save(self):
+        if os.path.dirname(self.__file_path):
+            os.makedirs(os.path.dirname(self.__file_path), exist_ok=True)
+
+        with open(f"{self.__file_path}.partial", 'w', encoding='utf-8') as file:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.__entries}, file)
+        os.replace(f"{self.__file_path}.partial", self.__file_path)
+
+    def __build_entry(self, file_path: str, file_stat: os.stat_result, category: str, file_timestamp: str, data_name: str) -> dict[str, any]:
+        parquet_metadata: pq.FileMetaData = pq.read_metadata(file_path)
+        column_statistics: dict[str, dict[str, any]] = get_column_statistics(parquet_metadata)
+        is_compacted: bool = len(file_timestamp) < 10
+        snapshot_timestamp_statistics: dict[str, any] = column_statistics.get('snapshot_timestamp', {}) if is_compacted else {}
+        return {
+            'file_path': file_path,
+            'category': category,
+            'file_timestamp': file_timestamp,
+            'is_compacted': is_compacted,
+            'first_snapshot_timestamp': snapshot_timestamp_statistics.get('min', file_timestamp.ljust(10, '0')),
+            'last_snapshot_timestamp': snapshot_timestamp_statistics.get('max', file_timestamp.ljust(10, '9')),
+            'data_name': data_name,
+            'size': file_stat.st_size,
+            'modified_time_ns': file_stat.st_mtime_ns,
+            'row_count': parquet_metadata.num_rows,
+            'row_group_count': parquet_metadata.num_row_groups,
+            # files written with the same layout are scanned together, see "SnapshotDataset.to_table"
+            'schema_fingerprint': hashlib.md5(parquet_metadata.schema.to_arrow_schema().remove_metadata().to_string().encode('utf-8')).hexdigest(),
+            'columns': column_statistics
+        }
+
+@dataclass
+class SnapshotDataset:
+    '''
+    All the snapshots of one kind of saved data ("channel_info", "video_info" or "video_comments") queried as a single dataset,
+    with the "category" and "snapshot_timestamp" columns derived from the folder and the file name
+
+    The manifest prunes the files by category, time range and video ID range before any data is read,
+    the columns and the filter are pushed down to the Parquet reader.
+
+    Example:
+        video_comments_dataset = SnapshotDataset('video_comments')
+        video_comments_table: pa.Table = video_comments_dataset.to_table(
+            columns=['video_id', 'text', 'like_count'],
+            categories=['news'],
+            start_timestamp='2025030100',
+            end_timestamp='2025031423',
+            video_ids=['QyLM3PyepZw']
+        )
+        filtered_comments_table: pa.Table = video_comments_dataset.to_table(filter=ds.field('like_count') > 1000)
+    '''
+    __data_name: str
+    __schema: pa.Schema
+    __manifest: SnapshotManifest
+
+    def __init__(self, data_name: str, manifest: Optional[SnapshotManifest] = None):
+        if data_name not in SCHEMAS_OF_SAVED_DATA:
+            raise ValueError(f"\n\033[91mInvalid input of \"data_name\"\033[0m: {data_name}\n\033[92mValid input\033[0m: {tuple(SCHEMAS_OF_SAVED_DATA.keys())}")
+
+        self.__data_name = data_name
+        self.__schema = SCHEMAS_OF_SAVED_DATA[data_name]
+        if manifest is None:
+            manifest = SnapshotManifest(load_configs().get('snapshot_dataset', {}).get('manifest_file_path', './data/snapshot_manifest.json'))
+            if manifest.refresh() > 0:
+                manifest.save()
+        self.__manifest = manifest
+
+    def get_schema(self) -> pa.Schema:
+        return pa.schema(list(self.__schema) + PARTITION_FIELDS)
+
+    def get_file_paths(self, categories: Optional[list[str]] = None, start_timestamp: Optional[str] = None, end_timestamp: Optional[str] = None, video_ids: Optional[list[str]] = None) -> list[str]:
+        return [entry['file_path'] for entry in self.__get_entries(categories, start_timestamp, end_timestamp, video_ids)]
+
+    def get_row_count(self, categories: Optional[list[str]] = None, start_timestamp: Optional[str] = None, end_timestamp: Optional[str] = None) -> int:
+        '''
+        The number of rows of the selected snapshots, read from the manifest without opening any file
+        '''
+        return sum(entry['row_count'] for entry in self.__get_entries(categories, start_timestamp, end_timestamp))
+
+    def to_table(self, columns: Optional[list[str]] = None, filter: Optional['ds.Expression'] = None, categories: Optional[list[str]] = None,
+                 start_timestamp: Optional[str] = None, end_timestamp: Optional[str] = None, video_ids: Optional[list[str]] = None,
+                 file_paths: Optional[list[str]] = None) -> pa.Table:
+        '''
+        Read the selected rows and columns of the snapshots
+
+        Args:
+            columns: the columns to read, every column of the schema (and the partition columns) if not given
+            filter: a "pyarrow.dataset" expression on the columns of "get_schema()"
+            categories: the categories to read, all of them if not given
+            start_timestamp, end_timestamp: inclusive "YYYYMMDDHH" bounds of the snapshots to read
+            video_ids: only read the rows of these videos
+            file_paths: only read these files (of "get_file_paths()")
+
+        Returns:
+            table: the rows typed by "get_schema()", restricted to "columns"
+        '''
+        import pyarrow.dataset as ds
+
+        entries: list[dict[str, any]] = self.__get_entries(categories, start_timestamp, end_timestamp, video_ids)
+        if file_paths is not None:
+            entries = [entry for entry in entries if entry['file_path'] in file_paths]
+        if video_ids is not None:
+            filter = ds.field('video_id').isin(video_ids) if filter is None else filter & ds.field('video_id').isin(video_ids)
+        if start_timestamp is not None: # the rows of a compacted file span many snapshots
+            filter = ds.field('snapshot_timestamp') >= start_timestamp if filter is None else filter & (ds.field('snapshot_timestamp') >= start_timestamp)
+        if end_timestamp is not None:
+            filter = ds.field('snapshot_timestamp') <= end_timestamp if filter is None else filter & (ds.field('snapshot_timestamp') <= end_timestamp)
+
+        entries_by_schema_fingerprint: dict[str, list[dict[str, any]]] = {}
+        for entry in entries:
+            entries_by_schema_fingerprint.setdefault(entry['schema_fingerprint'], []).append(entry)
+
+        schema: pa.Schema = self.get_schema()
+        tables: list[pa.Table] = [self.__scan_files(same_schema_entries, columns, filter) for same_schema_entries in entries_by_schema_fingerprint.values()]
+        if not tables:
+            return schema.empty_table() if columns is None else schema.empty_table().select(columns)
+        return pa.concat_tables(tables).unify_dictionaries()
+
+    def to_pandas(self, columns: Optional[list[str]] = None, filter: Optional['ds.Expression'] = None, categories: Optional[list[str]] = None,
+                  start_timestamp: Optional[str] = None, end_timestamp: Optional[str] = None, video_ids: Optional[list[str]] = None) -> 'DataFrame':
+        return self.to_table(columns, filter, categories, start_timestamp, end_timestamp, video_ids).to_pandas()
+
+    def __get_entries(self, categories: Optional[list[str]] = None, start_timestamp: Optional[str] = None, end_timestamp: Optional[str] = None, video_ids: Optional[list[str]] = None) -> list[dict[str, any]]:
+        entries: list[dict[str, any]] = self.__manifest.get_entries(self.__data_name, categories, start_timestamp, end_timestamp)
+        if video_ids is None:
+            return entries
+        return [entry for entry in entries if may_contain_any_value(entry, 'video_id', video_ids)]
+
+    def __scan_files(self, entries: list[dict[str, any]], columns: Optional[list[str]], filter: Optional['ds.Expression']) -> pa.Table:
+        # the files of one layout are scanned as one dataset of their own physical schema (plus the missing columns of the current one),
+        # then converted to the current schema
+        import pyarrow.dataset as ds
+
+        schema: pa.Schema = self.get_schema()
+        physical_schema: pa.Schema = pq.read_schema(entries[0]['file_path']).remove_metadata()
+        scanned_schema: pa.Schema = pa.schema(list(physical_schema) + [field for field in schema if field.name not in physical_schema.names])
+
+        dataset = ds.FileSystemDataset.from_paths(
+            [entry['file_path'] for entry in entries],
+            schema=scanned_schema,
+            format=ds.ParquetFileFormat(),
+            filesystem=fs.LocalFileSystem(),
+            partitions=[
+                ds.field('category') == entry['category'] if entry['is_compacted'] else (ds.field('category') == entry['category']) & (ds.field('snapshot_timestamp') == entry['file_timestamp'])
+                for entry in entries
+            ]
+        )
+
+        try:
+            scanned_table: pa.Table = dataset.to_table(columns=columns, filter=filter)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            # the filter compares a column whose type changed since these files were written, filter after the conversion instead
+            return ds.dataset(conform_table_to_schema(dataset.to_table(), schema)).to_table(columns=columns, filter=filter)
+
+        conformed_schema: pa.Schema = schema if columns is None else pa.schema([schema.field(column) for column in columns])
+        return conform_table_to_schema(scanned_table, conformed_schema)
+
+def get_data_names_by_file_name(configs: dict[str, any]) -> dict[str, str]:
+    '''
+    The data name of every file name of "configs.yaml[file_names_of_saved_data]", the comment delta files count as "video_comments"
+    '''
+    data_names_by_file_name: dict[str, str] = {file_name: data_name for data_name, file_name in configs['file_names_of_saved_data'].items()}
+    data_names_by_file_name[configs.get('incremental_collection', {}).get('delta_file_name', 'video_comments_delta.parquet')] = 'video_comments'
+    return data_names_by_file_name
+
+def get_column_statistics(parquet_metadata: pq.FileMetaData) -> dict[str, dict[str, any]]:
+    '''
+    The min, max and null count of every top-level column over all row groups, min and max are left out when a row group has no statistics
+    '''
+    column_statistics: dict[str, dict[str, any]] = {}
+    for index_column in range(parquet_metadata.num_columns):
+        column_path: str = parquet_metadata.schema.column(index_column).path
+        if '.' in column_path: continue # nested fields, e.g. "thumbnails.default.url"
+
+        minimums: list[any] = []
+        maximums: list[any] = []
+        null_count: Optional[int] = 0
+        for index_row_group in range(parquet_metadata.num_row_groups):
+            statistics = parquet_metadata.row_group(index_row_group).column(index_column).statistics
+            if statistics is None or not statistics.has_min_max:
+                minimums, maximums = [None], [None]
+            else:
+                minimums.append(statistics.min)
+                maximums.append(statistics.max)
+            null_count = None if statistics is None or null_count is None or not statistics.has_null_count else null_count + statistics.null_count
+
+        column_statistics[column_path] = {'null_count': null_count}
+        if minimums and None not in minimums and None not in maximums:
+            column_statistics[column_path]['min'] = __to_json_value(min(minimums))
+            column_statistics[column_path]['max'] = __to_json_value(max(maximums))
+
+    return column_statistics
+
+def may_contain_any_value(entry: dict[str, any], column: str, values: list[any]) -> bool:
+    column_statistics: dict[str, any] = entry['columns'].get(column, {})
+    if 'min' not in column_statistics:
+        return True
+    return any(column_statistics['min'] <= value <= column_statistics['max'] for value in values)
+
+def __to_json_value(value: any) -> any:
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
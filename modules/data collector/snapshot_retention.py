@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+import os
+from sys import path as sys_path
+sys_path += ['modules']
+from utilities import get_file_name_period
+from snapshot_dataset import SnapshotManifest
+
+@dataclass
+class RetentionPolicy:
+    keep_days: Optional[int] = None # the files whose last covered day is older than this many days expire
+    keep_last_runs: Optional[int] = None # per category, the files holding none of the latest runs expire
+    max_total_bytes: Optional[int] = None # over all categories, the oldest files expire until the rest fits
+
+def get_expired_entries(entries: list[dict[str, any]], retention_policy: RetentionPolicy, current_time: Optional[datetime] = None) -> list[dict[str, any]]:
+    '''
+    Select the manifest entries that a retention policy expires, every rule of the policy that is set applies
+
+    Returns:
+        expired_entries: the entries to delete, oldest first
+
+    Example:
+        expired_entries: list[dict[str, any]] = get_expired_entries(snapshot_manifest.get_entries(), RetentionPolicy(keep_days=30, max_total_bytes=10**9))
+    '''
+    if current_time is None:
+        current_time = datetime.now()
+    expired_file_paths: set[str] = set()
+
+    if retention_policy.keep_days is not None:
+        EXPIRED_DATE: datetime = datetime.combine(current_time.date() - timedelta(days=retention_policy.keep_days), datetime.min.time())
+        expired_file_paths.update(entry['file_path'] for entry in entries if get_file_name_period(os.path.basename(entry['file_path']))[1] <= EXPIRED_DATE)
+
+    if retention_policy.keep_last_runs is not None:
+        run_timestamps_by_category: dict[str, set[str]] = {}
+        for entry in entries: # a compacted file counts as the latest run it holds
+            run_timestamps_by_category.setdefault(entry['category'], set()).add(entry['last_snapshot_timestamp'])
+        for category, run_timestamps in run_timestamps_by_category.items():
+            kept_run_timestamps: list[str] = sorted(run_timestamps, reverse=True)[:retention_policy.keep_last_runs]
+            if len(kept_run_timestamps) < retention_policy.keep_last_runs: continue
+            expired_file_paths.update(entry['file_path'] for entry in entries if entry['category'] == category and entry['last_snapshot_timestamp'] < kept_run_timestamps[-1])
+
+    if retention_policy.max_total_bytes is not None:
+        total_bytes: int = 0
+        for entry in sorted(entries, key=lambda entry: entry['last_snapshot_timestamp'], reverse=True):
+            if entry['file_path'] in expired_file_paths: continue
+            total_bytes += entry['size']
+            if total_bytes > retention_policy.max_total_bytes:
+                expired_file_paths.add(entry['file_path'])
+
+    return sorted([entry for entry in entries if entry['file_path'] in expired_file_paths], key=lambda entry: (entry['last_snapshot_timestamp'], entry['file_path']))
+
+def delete_files_in_bulk(file_paths: list[str]) -> int:
+    '''
+    Delete files grouped by folder, each folder is opened once and the files are unlinked relative to it
+
+    Returns:
+        deleted_file_count: the number of deleted files, files already gone are skipped
+    '''
+    file_names_by_folder_path: dict[str, list[str]] = {}
+    for file_path in file_paths:
+        file_names_by_folder_path.setdefault(os.path.dirname(file_path), []).append(os.path.basename(file_path))
+
+    deleted_file_count: int = 0
+    for folder_path, file_names in file_names_by_folder_path.items():
+        folder_fd: Optional[int] = os.open(folder_path, os.O_RDONLY) if os.unlink in os.supports_dir_fd else None
+        try:
+            for file_name in file_names:
+                try:
+                    if folder_fd is None:
+                        os.unlink(f"{folder_path}/{file_name}")
+                    else:
+                        os.unlink(file_name, dir_fd=folder_fd)
+                    deleted_file_count += 1
+                except FileNotFoundError:
+                    continue
+        finally:
+            if folder_fd is not None:
+                os.close(folder_fd)
+
+    return deleted_file_count
+
+def apply_retention_policy(manifest: SnapshotManifest, retention_policy: RetentionPolicy, dry_run: bool = False, current_time: Optional[datetime] = None) -> list[dict[str, any]]:
+    '''
+    Delete the files expired by "retention_policy" and drop them from the manifest, nothing is deleted with "dry_run"
+
+    The manifest is refreshed from the file names only, the files already indexed are not stat-ed again.
+
+    Returns:
+        expired_entries: the entries of the deleted (or, with "dry_run", to be deleted) files
+
+    Example:
+        expired_entries: list[dict[str, any]] = apply_retention_policy(SnapshotManifest('./data/snapshot_manifest.json'), RetentionPolicy(keep_days=30), dry_run=True)
+    '''
+    manifest.refresh(check_modified=False)
+    expired_entries: list[dict[str, any]] = get_expired_entries(manifest.get_entries(), retention_policy, current_time)
+
+    if not dry_run and expired_entries:
+        delete_files_in_bulk([entry['file_path'] for entry in expired_entries])
+        manifest.remove_entries([entry['file_path'] for entry in expired_entries])
+    manifest.save()
+
+    return expired_entries
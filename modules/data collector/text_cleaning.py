@@ -0,0 +1,72 @@
+from typing import Callable, Optional, Union
+import html
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# "textDisplay", titles and descriptions are HTML: line breaks are "<br>", links are "<a>" tags and the text is entity-escaped
+LINE_BREAK_TAG_PATTERN: str = r'<[bB][rR]\s*/?>'
+TAG_PATTERN: str = r'<[^<>]*>'
+COMMON_ENTITIES: list[tuple[str, str]] = [('&#39;', "'"), ('&quot;', '"'), ('&lt;', '<'), ('&gt;', '>'), ('&amp;', '&')] # "&amp;" last, "&amp;lt;" must give "&lt;"
+OTHER_ENTITY_PATTERN: str = r'&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);' # matched after the common entities were replaced
+WHITESPACE_PATTERN: str = r'[\s\v\x{00a0}\x{3000}]{2,}|[\t\n\v\f\r\x{00a0}\x{3000}]' # whitespace other than a single space, including the no-break and the ideographic space
+NEEDS_CLEANING_PATTERN: str = r'[<&\t\n\v\f\r\x{00a0}\x{3000}]|  |^ | $' # most comments are plain text and are left untouched
+
+def clean_text_array(text_array: Union[pa.Array, pa.ChunkedArray]) -> Union[pa.Array, pa.ChunkedArray]:
+    '''
+    Clean a whole column of HTML text at once: the tags are stripped, the HTML entities unescaped and the whitespace collapsed into single spaces
+
+    One regular expression match selects the strings needing any cleaning, only those go through the replacements.
+    The common entities are replaced column-wide by "pyarrow.compute", only the (few) strings holding other entities go through "html.unescape".
+    A dictionary-encoded column only has its dictionary cleaned.
+
+    Example:
+        cleaned_texts: pa.Array = clean_text_array(pa.array(['Nice&#39;<br>video &amp; <a href="https://youtu.be">link</a>']))  # ["Nice' video & link"]
+    '''
+    if isinstance(text_array, pa.ChunkedArray):
+        return pa.chunked_array([clean_text_array(chunk) for chunk in text_array.chunks], type=text_array.type)
+    if pa.types.is_dictionary(text_array.type):
+        return pa.DictionaryArray.from_arrays(text_array.indices, clean_text_array(text_array.dictionary))
+
+    needs_cleaning: pa.Array = pc.fill_null(pc.match_substring_regex(text_array, NEEDS_CLEANING_PATTERN), False)
+    if not pc.any(needs_cleaning).as_py():
+        return text_array
+    return pc.replace_with_mask(text_array, needs_cleaning, clean_html_texts(text_array.filter(needs_cleaning)))
+
+def clean_html_texts(text_array: pa.Array) -> pa.Array:
+    text_array = transform_where_substring(text_array, '<', lambda tagged_texts: pc.replace_substring_regex(pc.replace_substring_regex(tagged_texts, LINE_BREAK_TAG_PATTERN, ' '), TAG_PATTERN, ''))
+    text_array = transform_where_substring(text_array, '&', unescape_html_entities)
+    text_array = pc.replace_substring_regex(text_array, WHITESPACE_PATTERN, ' ')
+    return pc.utf8_trim(text_array, ' ')
+
+def unescape_html_entities(text_array: pa.Array) -> pa.Array:
+    # a string with a rare entity is unescaped by "html.unescape" from its escaped form, a partially unescaped string could be unescaped twice
+    has_other_entity: pa.Array = pc.fill_null(pc.match_substring_regex(pc.replace_substring_regex(text_array, '&(?:#39|quot|lt|gt|amp);', ''), OTHER_ENTITY_PATTERN), False)
+    escaped_text_array: pa.Array = text_array
+    for entity, character in COMMON_ENTITIES:
+        text_array = pc.replace_substring(text_array, entity, character)
+    if pc.any(has_other_entity).as_py():
+        other_entity_texts: list[Optional[str]] = [html.unescape(text) for text in escaped_text_array.filter(has_other_entity).to_pylist()]
+        text_array = pc.replace_with_mask(text_array, has_other_entity, pa.array(other_entity_texts, type=text_array.type))
+    return text_array
+
+def transform_where_substring(text_array: pa.Array, substring: str, transform: Callable[[pa.Array], pa.Array]) -> pa.Array:
+    '''
+    Apply "transform" to the strings holding "substring" only, a plain substring search is much cheaper than the regular expressions
+    '''
+    has_substring: pa.Array = pc.fill_null(pc.match_substring(text_array, substring), False)
+    if not pc.any(has_substring).as_py():
+        return text_array
+    return pc.replace_with_mask(text_array, has_substring, transform(text_array.filter(has_substring)))
+
+def clean_table_text(table: pa.Table, text_columns: list[str]) -> pa.Table:
+    '''
+    Clean the "text_columns" of a table with "clean_text_array", the columns missing from the table are skipped
+
+    Example:
+        video_comments_table = clean_table_text(video_comments_table, ['text'])
+    '''
+    for text_column in text_columns:
+        if text_column not in table.column_names: continue
+        index_column: int = table.schema.get_field_index(text_column)
+        table = table.set_column(index_column, table.schema.field(index_column), clean_text_array(table[text_column]))
+    return table
@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Callable, Optional
+import math
+import threading
+from sys import path as sys_path
+sys_path += ['modules']
+from run_metrics import get_run_metrics
+from youtube_crawler import MAX_IDS_PER_REQUEST
+from youtube_data import YouTubeVideoStatistics, YouTubeVideoComments
+
+@dataclass
+class VideoRegistry:
+    '''
+    Run-scoped registry of the statistics and comments fetched per video, shared by the "DataCollector" of every category of a pipeline run,
+    so a video found by several categories (e.g. in "trending", "news" and "politics") is fetched once
+
+    The comments are keyed by the video and the order of the pagination, and a video requested by another category while its comments are being fetched
+    waits for that fetch instead of starting its own. They are only kept while a category still collecting has not taken them,
+    and at most "max_cached_videos" of them are kept at all. The comments of an incremental collection (stopped at the comments known by its category) are not shared.
+
+    Example:
+        video_registry = VideoRegistry(['news', 'politics'])
+        news_collector = DataCollector('TW', interested_category='news', video_registry=video_registry)
+        politics_collector = DataCollector('TW', interested_category='politics', video_registry=video_registry)
+        ...
+        print(video_registry.get_report()) # {'reused_statistics': 12, 'reused_comments': 7, 'saved_videos_calls': 0, 'saved_comment_threads_calls': 231}
+    '''
+    __statistics: dict[str, YouTubeVideoStatistics]
+    __comments: dict[tuple[str, str], tuple[int, Future, set[str]]]
+    __collecting_categories: set[str]
+    __max_cached_videos: int
+    __report: dict[str, int]
+    __lock: threading.Lock
+
+    def __init__(self, interested_categories: list[str], max_cached_videos: int = 500):
+        '''
+        Args:
+            interested_categories: the categories sharing the registry, each one calls "release_category" once it stops collecting
+        '''
+        self.__statistics = {}
+        self.__comments = {}
+        self.__collecting_categories = set(interested_categories)
+        self.__max_cached_videos = max_cached_videos
+        self.__report = {'reused_statistics': 0, 'reused_comments': 0, 'saved_videos_calls': 0, 'saved_comment_threads_calls': 0}
+        self.__lock = threading.Lock()
+
+    def add_videos_statistics(self, videos_statistics: dict[str, YouTubeVideoStatistics]):
+        '''
+        register the statistics fetched along with the videos, e.g. by "get_trending_videos"
+        '''
+        with self.__lock:
+            self.__statistics.update(videos_statistics)
+
+    def get_videos_statistics(self, video_ids: list[str], fetch_videos_statistics: Callable[[list[str]], dict[str, YouTubeVideoStatistics]]) -> dict[str, YouTubeVideoStatistics]:
+        '''
+        Args:
+            fetch_videos_statistics: fetch the statistics of the videos not registered yet, e.g. "YouTubeCrawler.get_videos_statistics"
+
+        Returns:
+            videos_statistics: the statistics keyed by video ID, videos not found by the API are left out
+        '''
+        unique_video_ids: list[str] = list(dict.fromkeys(video_ids))
+        with self.__lock:
+            videos_statistics: dict[str, YouTubeVideoStatistics] = {video_id: self.__statistics[video_id] for video_id in unique_video_ids if video_id in self.__statistics}
+        missing_video_ids: list[str] = [video_id for video_id in unique_video_ids if video_id not in videos_statistics]
+
+        fetched_videos_statistics: dict[str, YouTubeVideoStatistics] = fetch_videos_statistics(missing_video_ids) if missing_video_ids else {}
+        saved_call_count: int = math.ceil(len(unique_video_ids) / MAX_IDS_PER_REQUEST) - math.ceil(len(missing_video_ids) / MAX_IDS_PER_REQUEST)
+        with self.__lock:
+            self.__statistics.update(fetched_videos_statistics)
+            self.__report['reused_statistics'] += len(videos_statistics)
+            self.__report['saved_videos_calls'] += saved_call_count
+        get_run_metrics().increment('api_calls_saved', saved_call_count, endpoint='videos')
+
+        return {**videos_statistics, **fetched_videos_statistics}
+
+    def get_video_comments(self, interested_category: str, video_id: str, max_comments: int, fetch_video_comments: Callable[[], tuple[list[YouTubeVideoComments], int]],
+                           order: str = 'relevance', known_comment_ids: Optional[set[str]] = None) -> list[YouTubeVideoComments]:
+        '''
+        Args:
+            interested_category: the category taking the comments, they are not kept for it anymore
+            fetch_video_comments: fetch the comments when no category has fetched enough of them yet, returns (comments, fetched_page_count)
+            order, known_comment_ids: the options of the pagination, as "YouTubeCrawler.get_video_comments"
+
+        Returns:
+            comments: at most "max_comments" comments, a list of its own (the comment objects are shared)
+        '''
+        if known_comment_ids is not None:
+            # the known comments come from the index of the category, no other category asks for the same pagination
+            return list(fetch_video_comments()[0])
+
+        key: tuple[str, str] = (video_id, order)
+        with self.__lock:
+            registered_comments: Optional[tuple[int, Future, set[str]]] = self.__comments.get(key)
+            if registered_comments is not None and not self.__covers(registered_comments, max_comments):
+                registered_comments = None
+            if registered_comments is None:
+                own_comments_future: Optional[Future] = Future()
+                self.__comments[key] = (max_comments, own_comments_future, {interested_category})
+            else:
+                own_comments_future = None
+                registered_comments[2].add(interested_category)
+
+        if own_comments_future is None:
+            try:
+                comments, page_count = registered_comments[1].result()
+            finally:
+                with self.__lock:
+                    self.__release_comments(key, registered_comments)
+            with self.__lock:
+                self.__report['reused_comments'] += 1
+                self.__report['saved_comment_threads_calls'] += page_count
+            get_run_metrics().increment('api_calls_saved', page_count, endpoint='commentThreads')
+            return comments[:max_comments]
+
+        try:
+            comments, page_count = fetch_video_comments()
+        except BaseException as error:
+            with self.__lock:
+                if self.__comments.get(key, (None, None))[1] is own_comments_future:
+                    self.__comments.pop(key)
+            own_comments_future.set_exception(error)
+            raise
+        own_comments_future.set_result((comments, page_count))
+        with self.__lock:
+            self.__release_comments(key, self.__comments.get(key))
+            self.__evict_comments()
+        return list(comments)
+
+    def release_category(self, interested_category: str):
+        '''
+        the category stopped collecting, the comments kept only for it are dropped
+        '''
+        with self.__lock:
+            self.__collecting_categories.discard(interested_category)
+            for key, registered_comments in list(self.__comments.items()):
+                self.__release_comments(key, registered_comments)
+
+    def get_report(self) -> dict[str, int]:
+        '''
+        Returns:
+            report: the videos whose statistics and comments were reused across categories, and the API calls saved by them
+        '''
+        with self.__lock:
+            return dict(self.__report)
+
+    def get_saved_call_count(self) -> int:
+        with self.__lock:
+            return self.__report['saved_videos_calls'] + self.__report['saved_comment_threads_calls']
+
+    def __release_comments(self, key: tuple[str, str], registered_comments: Optional[tuple[int, Future, set[str]]]):
+        # fetched comments taken by every category still collecting are not reused anymore, call it with the lock held
+        if registered_comments is None or self.__comments.get(key) is not registered_comments:
+            return
+        _, comments_future, taking_categories = registered_comments
+        if comments_future.done() and self.__collecting_categories <= taking_categories:
+            self.__comments.pop(key)
+
+    def __evict_comments(self):
+        # the oldest fetched comments go first once more than "max_cached_videos" are kept, call it with the lock held
+        for key, registered_comments in list(self.__comments.items()):
+            if len(self.__comments) <= self.__max_cached_videos:
+                return
+            if registered_comments[1].done():
+                self.__comments.pop(key)
+
+    def __covers(self, registered_comments: tuple[int, Future, set[str]], max_comments: int) -> bool:
+        # the registered comments serve a request of up to as many comments, or any request once the pagination ran out of comments
+        registered_max_comments, comments_future, _ = registered_comments
+        if max_comments <= registered_max_comments:
+            return True
+        return comments_future.done() and comments_future.exception() is None and len(comments_future.result()[0]) < registered_max_comments
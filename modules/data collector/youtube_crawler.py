@@ -1,22 +1,39 @@
 from dataclasses import dataclass
-from typing import Optional
-from googleapiclient.discovery import build, Resource
+from typing import Callable, Iterator, Optional, TypeVar
+from concurrent.futures import ThreadPoolExecutor, Future
+from googleapiclient.discovery import Resource
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
 import os
 from sys import path as sys_path
 sys_path += ['modules']
-from utilities import load_configs
-from youtube_data import YouTubeVideoInfo, YouTubeVideoStatistics, YouTubeVideoComments
+from utilities import load_configs, build_google_api_service
+from request_executor import RequestExecutor
+from run_metrics import get_run_metrics
+from response_cache import ResponseCache, get_response_cache_key, get_shared_response_cache, get_shared_channel_info_cache
+from youtube_data import YouTubeChannelInfo, YouTubeVideoInfo, YouTubeVideoStatistics, YouTubeVideoComments
 from datetime import datetime, timedelta
 
+MAX_IDS_PER_REQUEST: int = 50 # the "id" parameter of "videos().list" and "channels().list" accepts at most 50 IDs
+MAX_RESULTS_PER_PAGE: int = 50 # "maxResults" of "search().list" and "videos().list(chart=...)" is rejected above 50, more results are paginated
+
 @dataclass
 class YouTubeCrawler:
     __youtube_service: Resource
     __region_code: str
+    __request_executor: RequestExecutor
+    __response_cache: Optional[ResponseCache]
     __show_errors: bool = False
 
-    def __init__(self, location: str):
-        self.__youtube_service = build(serviceName='youtube', version='v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
+    def __init__(self, location: str, api_endpoint: Optional[str] = None, request_executor: Optional[RequestExecutor] = None, use_response_cache: Optional[bool] = None):
+        client_options: Optional[dict[str, str]] = {'api_endpoint': api_endpoint} if api_endpoint else None # e.g. a local stub server for benchmarks
+        self.__youtube_service = build_google_api_service('youtube', 'v3', developerKey=os.getenv('YOUTUBE_API_KEY'), client_options=client_options)
         self.__region_code = location
+        self.__request_executor = request_executor if request_executor is not None else RequestExecutor()
+
+        if use_response_cache is None:
+            use_response_cache = load_configs().get('response_cache', {}).get('enabled', False)
+        self.__response_cache = get_shared_response_cache() if use_response_cache else None
 
     def set_region_code(self, location: str):
         self.__region_code = location
@@ -24,95 +41,242 @@ class YouTubeCrawler:
     def set_show_errors(self, show_errors: bool):
         self.__show_errors = show_errors
 
+    def get_request_executor(self) -> RequestExecutor:
+        return self.__request_executor
+
+    def iterate_searched_videos(self, query: str, max_results: int, page_token: Optional[str] = None, known_video_ids: Optional[set[str]] = None) -> Iterator[tuple[list[YouTubeVideoInfo], Optional[str]]]:
+        """
+        search the videos page by page, following "nextPageToken" until "max_results" videos are found
+
+        Args:
+            page_token: resume the pagination from a saved "nextPageToken"
+            known_video_ids: the videos found before the pagination was resumed, they are not yielded again and count toward "max_results"
+
+        Returns:
+            pages: a lazy generator of (videos, next_page_token), a page is only requested when the previous one has been consumed
+
+        Example:
+            for videos, next_page_token in crawler.iterate_searched_videos('news', max_results=200):
+                ...
+        """
+        # Calculate the date one week ago from today, truncated to the hour to keep the request (and its cache key) stable within an hour
+        one_week_ago = (datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=7)).isoformat("T") + "Z"
+        seen_video_ids: set[str] = set(known_video_ids) if known_video_ids else set() # a video may be repeated on the next page when the ranking changes during the pagination
+        next_page_token = page_token
+
+        while len(seen_video_ids) < max_results:
+            searched_response = self.__execute(
+                self.__youtube_service.search().list(
+                    q=query,
+                    part='id,snippet',
+                    regionCode=self.__region_code,
+                    maxResults=min(max_results - len(seen_video_ids), MAX_RESULTS_PER_PAGE),
+                    publishedAfter=one_week_ago,
+                    order='viewCount',
+                    pageToken=next_page_token
+                ),
+                endpoint='search'
+            )
+
+            videos: list[YouTubeVideoInfo] = []
+            for searched_result in searched_response.get('items', []):
+                if searched_result['id']['kind'] == 'youtube#video' and searched_result['id']['videoId'] not in seen_video_ids and len(seen_video_ids) < max_results:
+                    seen_video_ids.add(searched_result['id']['videoId'])
+                    videos.append(
+                        YouTubeVideoInfo(
+                            title=searched_result['snippet']['title'],
+                            channel=searched_result['snippet']['channelTitle'],
+                            channel_id=searched_result['snippet']['channelId'],
+                            published_time=searched_result['snippet']['publishedAt'],
+                            description=searched_result['snippet']['description'],
+                            video_id=searched_result['id']['videoId'],
+                            thumbnails=searched_result['snippet']['thumbnails']
+                        )
+                    )
+
+            next_page_token = searched_response.get('nextPageToken')
+            yield videos, next_page_token
+            if not next_page_token: break
+
     def get_searched_videos(self, query: str, max_results: int) -> list[YouTubeVideoInfo]:
-        # Calculate the date one week ago from today
-        one_week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat("T") + "Z"
-
-        searched_response = self.__youtube_service.search().list(
-            q=query,
-            part='id,snippet',
-            regionCode=self.__region_code,
-            maxResults=max_results,
-            publishedAfter=one_week_ago,
-            order='viewCount'
-        ).execute()
+        return [video for videos, _ in self.iterate_searched_videos(query, max_results) for video in videos]
 
-        videos: list[YouTubeVideoInfo] = []
-        for searched_result in searched_response.get('items', []):
-            if searched_result['id']['kind'] == 'youtube#video':
+    def iterate_trending_videos(self, max_results: int, page_token: Optional[str] = None, known_video_ids: Optional[set[str]] = None) -> Iterator[tuple[list[YouTubeVideoInfo], dict[str, YouTubeVideoStatistics], Optional[str]]]:
+        """
+        get the trending videos and their statistics page by page, following "nextPageToken" until "max_results" videos are found
+
+        Args:
+            page_token: resume the pagination from a saved "nextPageToken"
+            known_video_ids: the videos found before the pagination was resumed, they are not yielded again and count toward "max_results"
+
+        Returns:
+            pages: a lazy generator of (videos, videos_statistics, next_page_token), a page is only requested when the previous one has been consumed
+
+        Example:
+            for videos, videos_statistics, next_page_token in crawler.iterate_trending_videos(max_results=200):
+                ...
+        """
+        seen_video_ids: set[str] = set(known_video_ids) if known_video_ids else set()
+        next_page_token = page_token
+
+        while len(seen_video_ids) < max_results:
+            trending_response = self.__execute(
+                self.__youtube_service.videos().list(
+                    part='id,snippet,statistics',
+                    chart='mostPopular',
+                    regionCode=self.__region_code,
+                    maxResults=min(max_results - len(seen_video_ids), MAX_RESULTS_PER_PAGE),
+                    pageToken=next_page_token
+                ),
+                endpoint='videos'
+            )
+
+            videos: list[YouTubeVideoInfo] = []
+            videos_statistics: dict[str, YouTubeVideoStatistics] = {}
+            for trending_result in trending_response.get('items', []):
+                if trending_result['id'] in seen_video_ids or len(seen_video_ids) >= max_results:
+                    continue
+                seen_video_ids.add(trending_result['id'])
                 videos.append(
                     YouTubeVideoInfo(
-                        title=searched_result['snippet']['title'],
-                        channel=searched_result['snippet']['channelTitle'],
-                        channel_id=searched_result['snippet']['channelId'],
-                        published_time=searched_result['snippet']['publishedAt'],
-                        description=searched_result['snippet']['description'],
-                        video_id=searched_result['id']['videoId'],
-                        thumbnails=searched_result['snippet']['thumbnails']
+                        title=trending_result['snippet']['title'],
+                        channel=trending_result['snippet']['channelTitle'],
+                        channel_id=trending_result['snippet']['channelId'],
+                        published_time=trending_result['snippet']['publishedAt'],
+                        description=trending_result['snippet']['description'],
+                        video_id=trending_result['id'],
+                        thumbnails=trending_result['snippet']['thumbnails']
                     )
                 )
+                videos_statistics[trending_result['id']] = self.__parse_video_statistics(trending_result.get('statistics', {}))
 
-        return videos
-
-    def get_trending_videos(self, max_results: int) -> list[YouTubeVideoInfo]:
-        trending_response = self.__youtube_service.videos().list(
-            part='id,snippet',
-            chart='mostPopular',
-            regionCode=self.__region_code,
-            maxResults=max_results
-        ).execute()
+            next_page_token = trending_response.get('nextPageToken')
+            yield videos, videos_statistics, next_page_token
+            if not next_page_token: break
 
+    def get_trending_videos(self, max_results: int) -> tuple[list[YouTubeVideoInfo], dict[str, YouTubeVideoStatistics]]:
         videos: list[YouTubeVideoInfo] = []
-        for trending_result in trending_response.get('items', []):
-            videos.append(
-                YouTubeVideoInfo(
-                    title=trending_result['snippet']['title'],
-                    channel=trending_result['snippet']['channelTitle'],
-                    channel_id=trending_result['snippet']['channelId'],
-                    published_time=trending_result['snippet']['publishedAt'],
-                    description=trending_result['snippet']['description'],
-                    video_id=trending_result['id'],
-                    thumbnails=trending_result['snippet']['thumbnails']
-                )
+        videos_statistics: dict[str, YouTubeVideoStatistics] = {}
+        for page_videos, page_videos_statistics, _ in self.iterate_trending_videos(max_results):
+            videos += page_videos
+            videos_statistics.update(page_videos_statistics)
+        return videos, videos_statistics
+
+    def get_videos_statistics(self, video_ids: list[str]) -> dict[str, YouTubeVideoStatistics]:
+        """
+        get the statistics of many videos, with one "videos().list" call per 50 video IDs
+
+        Args:
+            video_ids: the IDs of the videos
+
+        Returns:
+            videos_statistics: the statistics keyed by video ID, videos not found by the API are left out
+
+        Example:
+            videos_statistics: dict[str, YouTubeVideoStatistics] = crawler.get_videos_statistics(['QyLM3PyepZw', 'KUHGCcg-_9c'])
+        """
+        videos_statistics: dict[str, YouTubeVideoStatistics] = {}
+        unique_video_ids: list[str] = list(dict.fromkeys(video_ids))
+
+        for index_start in range(0, len(unique_video_ids), MAX_IDS_PER_REQUEST):
+            video_response = self.__execute(
+                self.__youtube_service.videos().list(
+                    part='id,statistics',
+                    id=','.join(unique_video_ids[index_start:index_start + MAX_IDS_PER_REQUEST])
+                ),
+                endpoint='videos'
             )
 
-        return videos
+            for video_result in video_response.get('items', []):
+                videos_statistics[video_result['id']] = self.__parse_video_statistics(video_result.get('statistics', {}))
+
+        return videos_statistics
 
     def get_video_statistics(self, video_id: str) -> YouTubeVideoStatistics:
-        video_response = self.__youtube_service.videos().list(
-            part='statistics',
-            id=video_id
-        ).execute()
-
-        video_statistics: YouTubeVideoStatistics = YouTubeVideoStatistics(view_count=None, like_count=None, dislike_count=None, comment_count=None)
-        if 'items' in video_response and len(video_response['items']) > 0:
-            video_statistics.view_count = int(video_response['items'][0]['statistics'].get('viewCount', 0))
-            video_statistics.like_count = int(video_response['items'][0]['statistics'].get('likeCount', 0))
-            video_statistics.dislike_count = int(video_response['items'][0]['statistics'].get('dislikeCount', 0))
-            video_statistics.comment_count = int(video_response['items'][0]['statistics'].get('commentCount', 0))
-        return video_statistics
-
-    def get_video_comments(self, video_id: str, max_comments: int) -> list[YouTubeVideoComments]: # FIXME handle error when there are no comments
+        return self.get_videos_statistics([video_id]).get(
+            video_id,
+            YouTubeVideoStatistics(view_count=None, like_count=None, dislike_count=None, comment_count=None)
+        )
+
+    def get_channels_info(self, channel_ids: list[str]) -> dict[str, YouTubeChannelInfo]:
+        """
+        get the metadata of many channels, from the channel info cache or with one "channels().list" call per 50 uncached channel IDs
+
+        Args:
+            channel_ids: the IDs of the channels
+
+        Returns:
+            channels_info: the metadata keyed by channel ID, channels not found by the API are left out
+
+        Example:
+            channels_info: dict[str, YouTubeChannelInfo] = crawler.get_channels_info(['UCpu3bemTQwAU8PqM4kJdoEQ'])
+        """
+        channel_info_cache: ResponseCache = get_shared_channel_info_cache()
+        channel_items: dict[str, dict[str, any]] = {}
+        uncached_channel_ids: list[str] = []
+
+        for channel_id in dict.fromkeys(channel_ids):
+            channel_item: Optional[dict[str, any]] = channel_info_cache.get('channels', channel_id)
+            if channel_item is None:
+                uncached_channel_ids.append(channel_id)
+            else:
+                channel_items[channel_id] = channel_item
+        get_run_metrics().increment('channel_info_cache_hits', len(channel_items))
+
+        for index_start in range(0, len(uncached_channel_ids), MAX_IDS_PER_REQUEST):
+            requested_channel_ids: list[str] = uncached_channel_ids[index_start:index_start + MAX_IDS_PER_REQUEST]
+            channel_response = self.__request_executor.execute(
+                self.__youtube_service.channels().list(
+                    part='id,snippet,statistics',
+                    id=','.join(requested_channel_ids)
+                ),
+                endpoint='channels'
+            )
+
+            found_channel_items: dict[str, dict[str, any]] = {channel_result['id']: channel_result for channel_result in channel_response.get('items', [])}
+            for channel_id in requested_channel_ids:
+                # a channel missing from the response is cached as {} so a deleted channel is not requested again until the TTL expires
+                channel_items[channel_id] = found_channel_items.get(channel_id, {})
+                channel_info_cache.put('channels', channel_id, channel_items[channel_id])
+
+        return {channel_id: self.__parse_channel_info(channel_item) for channel_id, channel_item in channel_items.items() if channel_item}
+
+    def get_video_comments(self, video_id: str, max_comments: int, page_token: Optional[str] = None,
+                           on_page: Optional[Callable[[list[YouTubeVideoComments], Optional[str]], None]] = None,
+                           order: str = 'relevance', known_comment_ids: Optional[set[str]] = None) -> list[YouTubeVideoComments]: # FIXME handle error when there are no comments
+        '''
+        "page_token" resumes the pagination from a saved "nextPageToken",
+        "on_page" is called with the comments of every fetched page and the token of the next page,
+        with order='time', the pagination stops at the first comment of "known_comment_ids" (everything after it is older)
+        '''
+        reached_known_comment: bool = False
         comments:list[YouTubeVideoComments] = []
-        next_page_token = None
+        next_page_token = page_token
 
         while True:
             try:
-                comments_response = self.__youtube_service.commentThreads().list(
-                    part='snippet',
-                    videoId=video_id,
-                    maxResults=3, # FIXME for testing purposes, change this to 100
-                    pageToken=next_page_token,
-                    order='relevance'
-                ).execute()
-            except Exception as e:
+                comments_response = self.__execute(
+                    self.__youtube_service.commentThreads().list(
+                        part='snippet',
+                        videoId=video_id,
+                        maxResults=3, # FIXME for testing purposes, change this to 100
+                        pageToken=next_page_token,
+                        order=order
+                    ),
+                    endpoint='commentThreads'
+                )
+            except HttpError as e: # e.g. comments are disabled, retryable and quota errors are handled by the request executor
                 if self.__show_errors:
                     print('-'*50)
                     print(f"\033[91mAn error occurred\033[0m:\n{e}")
                     print('-'*50)
                 break
 
+            page_comments_start: int = len(comments)
             for comment_thread in comments_response.get('items', []):
+                if known_comment_ids is not None and comment_thread['id'] in known_comment_ids:
+                    reached_known_comment = True
+                    break
                 comment_info = comment_thread['snippet']['topLevelComment']['snippet']
                 total_reply_count=comment_thread['snippet']['totalReplyCount']
                 comments.append(
@@ -121,30 +285,82 @@ class YouTubeCrawler:
                         text=comment_info['textDisplay'],
                         like_count=comment_info['likeCount'],
                         reply_count=total_reply_count,
-                        published_time=comment_info['publishedAt']
+                        published_time=comment_info['publishedAt'],
+                        comment_id=comment_thread['id']
                     )
                 )
                 if len(comments) >= max_comments: break
 
-            next_page_token = comments_response.get('nextPageToken')
+            next_page_token = None if reached_known_comment else comments_response.get('nextPageToken')
+            if on_page is not None:
+                on_page(comments[page_comments_start:], next_page_token)
             if not next_page_token or len(comments) >= max_comments: break
 
         return comments
 
-    def __clean_text_with_special_strings(self, text: str) -> str:
-        special_strings             = ['\n', '\r', '\t', '\\', '&#39;', '&amp;']#, '&quot;', '&lt;', '&gt;']
-        special_string_replacements = [''  , ''  , ' ' , ''  , '\''   , '&'    ]#, '\"'    , '<'    , '>'  ]
-        return text.replace(special_strings[0], special_string_replacements[0]).replace(special_strings[1], special_string_replacements[1]).replace(special_strings[2], special_string_replacements[2]).replace(special_strings[3], special_string_replacements[3]).replace(special_strings[4], special_string_replacements[4]).replace(special_strings[5], special_string_replacements[5])#.replace(special_strings[6], special_string_replacements[6]).replace(special_strings[7], special_string_replacements[7]).replace(special_strings[8], special_string_replacements[8])
+    def __execute(self, request: HttpRequest, endpoint: str) -> dict[str, any]:
+        if self.__response_cache is None:
+            return self.__request_executor.execute(request, endpoint=endpoint)
+
+        cache_key: str = get_response_cache_key(request.uri)
+        response: Optional[dict[str, any]] = self.__response_cache.get(endpoint, cache_key)
+        if response is not None:
+            get_run_metrics().increment('response_cache_hits', endpoint=endpoint)
+        else:
+            response = self.__request_executor.execute(request, endpoint=endpoint)
+            self.__response_cache.put(endpoint, cache_key, response)
+        return response
+
+    def __parse_video_statistics(self, statistics: dict[str, str]) -> YouTubeVideoStatistics:
+        return YouTubeVideoStatistics(
+            view_count=int(statistics.get('viewCount', 0)),
+            like_count=int(statistics.get('likeCount', 0)),
+            dislike_count=int(statistics.get('dislikeCount', 0)),
+            comment_count=int(statistics.get('commentCount', 0))
+        )
+
+    def __parse_channel_info(self, channel_item: dict[str, any]) -> YouTubeChannelInfo:
+        statistics: dict[str, any] = channel_item.get('statistics', {})
+        return YouTubeChannelInfo(
+            channel_id=channel_item['id'],
+            title=channel_item['snippet']['title'],
+            description=channel_item['snippet'].get('description', ''),
+            subscribers=None if statistics.get('hiddenSubscriberCount', False) or 'subscriberCount' not in statistics else int(statistics['subscriberCount']),
+            thumbnails=channel_item['snippet'].get('thumbnails', {})
+        )
+
+Page = TypeVar('Page')
+__END_OF_PAGES: object = object()
+
+def prefetch_pages(pages: Iterator[Page]) -> Iterator[Page]:
+    """
+    iterate "pages" one page ahead on a background thread, so the next page is in flight while the current one is processed
+
+    The generator of "pages" runs on that thread only, it must not share an HTTP connection (i.e. a "YouTubeCrawler") with the consumer.
+
+    Example:
+        for videos, videos_statistics, next_page_token in prefetch_pages(discovery_crawler.iterate_trending_videos(max_results=200)):
+            ... # the comments of this page are fetched while the next page is requested
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        next_page: Future = executor.submit(next, pages, __END_OF_PAGES)
+        while True:
+            page: any = next_page.result()
+            if page is __END_OF_PAGES:
+                return
+            next_page = executor.submit(next, pages, __END_OF_PAGES)
+            yield page
+
 @dataclass
 class YouTubeVideo:
     __info: YouTubeVideoInfo
     __statistics: Optional[YouTubeVideoStatistics]
     __comments: list[YouTubeVideoComments]
 
-    def __init__(self, info: YouTubeVideoInfo, statistics: Optional[YouTubeVideoStatistics] = None, comments: list[YouTubeVideoComments] = []):
+    def __init__(self, info: YouTubeVideoInfo, statistics: Optional[YouTubeVideoStatistics] = None, comments: Optional[list[YouTubeVideoComments]] = None):
         self.__info = info
         self.__statistics = statistics
-        self.__comments = comments
+        self.__comments = comments if comments is not None else [] # a list of its own, "append_comments" extends it in place
 
     def get_info(self) -> YouTubeVideoInfo:
         return self.__info
@@ -167,7 +383,7 @@ class YouTubeVideo:
 # Test 'YouTubeCrawler'
 if __name__ == "__main__":
     # Initialize the YouTubeCrawler with a region code
-    crawler = YouTubeCrawler(location='TW')
+    crawler = YouTubeCrawler(location='TW', use_response_cache=True)
 
     # Search for videos with a specific query
     search_query = "政治新聞"
@@ -177,7 +393,7 @@ if __name__ == "__main__":
         print(f"Title: {video.title}, Channel: {video.channel}, Published At: {video.published_time}")
 
     # Get trending videos
-    # trending_videos = crawler.get_trending_videos(max_results=1)
+    # trending_videos, trending_videos_statistics = crawler.get_trending_videos(max_results=1)
     # print("\nTrending Videos:")
     # for video in trending_videos:
     #     print(f"Title: {video.title}, Channel: {video.channel}, Published At: {video.published_time}")
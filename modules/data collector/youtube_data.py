@@ -1,21 +1,31 @@
 from dataclasses import dataclass
+from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class YouTubeVideoStatistics:
     view_count: int
     like_count: int
     dislike_count: int
     comment_count: int
     
-@dataclass
+@dataclass(slots=True) # no "__dict__" per record, there is one per collected comment
 class YouTubeVideoComments:
     author: str
     text: str
     like_count: int
     reply_count: int
     published_time: str
+    comment_id: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
+class YouTubeChannelInfo:
+    channel_id: str
+    title: str
+    description: str
+    subscribers: Optional[int] # None when the channel hides its subscriber count
+    thumbnails: dict
+
+@dataclass(slots=True)
 class YouTubeVideoInfo:
     title: str
     channel: str
@@ -0,0 +1,88 @@
+import pyarrow as pa
+
+ID_TYPE: pa.DataType = pa.dictionary(pa.int32(), pa.string()) # IDs and names repeated on many rows are dictionary-encoded
+TIMESTAMP_TYPE: pa.DataType = pa.timestamp('s', tz='UTC')
+THUMBNAIL_TYPE: pa.DataType = pa.struct([('url', pa.string()), ('width', pa.int32()), ('height', pa.int32())])
+THUMBNAILS_TYPE: pa.DataType = pa.struct([(resolution, THUMBNAIL_TYPE) for resolution in ('default', 'medium', 'high', 'standard', 'maxres')])
+
+CHANNEL_INFO_SCHEMA: pa.Schema = pa.schema([
+    ('channel_id', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('subscribers', pa.int64()),
+    ('thumbnails', THUMBNAILS_TYPE),
+])
+
+VIDEO_INFO_SCHEMA: pa.Schema = pa.schema([
+    ('video_id', pa.string()),
+    ('title', pa.string()),
+    ('channel', ID_TYPE),
+    ('published_time', TIMESTAMP_TYPE),
+    ('description', pa.string()),
+    ('thumbnails', THUMBNAILS_TYPE),
+    ('view_count', pa.int64()),
+    ('like_count', pa.int64()),
+])
+
+VIDEO_COMMENTS_SCHEMA: pa.Schema = pa.schema([
+    ('video_id', ID_TYPE),
+    ('text', pa.string()),
+    ('like_count', pa.int32()),
+    ('reply_count', pa.int32()),
+    ('comment_id', pa.string()),
+])
+
+SCHEMAS_OF_SAVED_DATA: dict[str, pa.Schema] = { # keyed like "configs.yaml[file_names_of_saved_data]"
+    'channel_info': CHANNEL_INFO_SCHEMA,
+    'video_info': VIDEO_INFO_SCHEMA,
+    'video_comments': VIDEO_COMMENTS_SCHEMA,
+}
+
+def build_table_from_rows(rows: list[list[any]], schema: pa.Schema) -> pa.Table:
+    '''
+    Build an Arrow table of "schema" from rows of Python values, ISO 8601 strings are parsed into timestamps
+
+    Example:
+        video_comments_table: pa.Table = build_table_from_rows([['QyLM3PyepZw', 'Nice video', 3, 0]], VIDEO_COMMENTS_SCHEMA)
+    '''
+    columns: list[list[any]] = [list(column) for column in zip(*rows)] if rows else [[] for _ in schema]
+    return pa.Table.from_arrays([build_array(column, field.type) for column, field in zip(columns, schema)], schema=schema)
+
+def build_array(values: list[any], data_type: pa.DataType) -> pa.Array:
+    if pa.types.is_timestamp(data_type):
+        # the API returns e.g. "2025-02-14T05:58:02Z", sometimes with milliseconds
+        return pa.array(values, type=pa.string()).cast(pa.timestamp('ms', tz=data_type.tz)).cast(data_type, safe=False)
+    return pa.array(values, type=data_type)
+
+def conform_table_to_schema(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    '''
+    Convert a table written with an older layout (e.g. by pandas before the explicit schemas) to "schema",
+    struct fields are matched by name and missing columns or fields are filled with nulls, extra columns are kept at the end
+
+    Example:
+        video_info_table: pa.Table = conform_table_to_schema(pq.read_table('./data/news/2025021812_video_info.parquet'), VIDEO_INFO_SCHEMA)
+    '''
+    columns: list[pa.ChunkedArray] = []
+    for field in schema:
+        if field.name in table.column_names:
+            columns.append(pa.chunked_array([conform_array(chunk, field.type) for chunk in table[field.name].chunks], type=field.type))
+        else:
+            columns.append(pa.chunked_array([pa.nulls(table.num_rows, type=field.type)], type=field.type))
+
+    extra_fields: list[pa.Field] = [table.schema.field(column_name) for column_name in table.column_names if column_name not in schema.names]
+    return pa.Table.from_arrays(columns + [table[extra_field.name] for extra_field in extra_fields], schema=pa.schema(list(schema) + extra_fields))
+
+def conform_array(array: pa.Array, data_type: pa.DataType) -> pa.Array:
+    if array.type == data_type:
+        return array
+    if pa.types.is_null(array.type):
+        return pa.nulls(len(array), type=data_type)
+    if pa.types.is_struct(data_type) and pa.types.is_struct(array.type):
+        children: list[pa.Array] = [
+            conform_array(array.field(child.name), child.type) if array.type.get_field_index(child.name) >= 0 else pa.nulls(len(array), type=child.type)
+            for child in data_type
+        ]
+        return pa.StructArray.from_arrays(children, fields=list(data_type), mask=array.is_null())
+    if pa.types.is_timestamp(data_type) and pa.types.is_string(array.type):
+        return array.cast(pa.timestamp('ms', tz=data_type.tz)).cast(data_type, safe=False)
+    return array.cast(data_type)
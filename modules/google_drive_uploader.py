@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import os
+import threading
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload, MediaIoBaseDownload
+from utilities import load_configs, load_google_drive_credentials, build_google_drive_service
+from request_executor import RequestExecutor
+from run_metrics import get_run_metrics
+
+MAX_REQUESTS_PER_BATCH: int = 100 # the Google Drive API accepts at most 100 calls per batch request
+
+@dataclass
+class GoogleDriveUploader:
+    '''
+    Upload files to Google Drive folders concurrently with resumable, chunked uploads, and list, download or delete the files of a folder
+
+    The credentials are loaded once, and every thread builds one Drive client for its whole lifetime (the client is not thread-safe).
+    Files already in the target folder with the same name and md5 are skipped.
+
+    Example:
+        google_drive_uploader = GoogleDriveUploader()
+        uploaded_file_count, skipped_file_count = google_drive_uploader.upload_files({'17ndnKwwil9JRo0gQyMZeJDAdkNjNkVlb': ['./data/trending/2025021812_video_info.parquet']})
+    '''
+    __credentials: any
+    __api_endpoint: Optional[str]
+    __request_executor: RequestExecutor
+    __max_workers: int
+    __chunk_size_bytes: int
+    __worker_local: threading.local
+
+    def __init__(self, request_executor: Optional[RequestExecutor] = None, max_workers: Optional[int] = None, chunk_size_mb: Optional[int] = None, credentials: any = None,
+                 api_endpoint: Optional[str] = None):
+        GOOGLE_DRIVE_UPLOAD_CONFIGS: dict[str, any] = load_configs().get('google_drive_upload', {})
+
+        self.__credentials = credentials if credentials is not None or api_endpoint is not None else load_google_drive_credentials()
+        self.__api_endpoint = api_endpoint # e.g. a local stub server for benchmarks
+        self.__request_executor = request_executor if request_executor is not None else RequestExecutor()
+        self.__max_workers = max_workers if max_workers is not None else GOOGLE_DRIVE_UPLOAD_CONFIGS.get('max_workers', 4)
+        self.__chunk_size_bytes = int((chunk_size_mb if chunk_size_mb is not None else GOOGLE_DRIVE_UPLOAD_CONFIGS.get('chunk_size_mb', 8)) * 1024 * 1024)
+        self.__worker_local = threading.local()
+
+    def get_google_drive_service(self) -> any:
+        '''
+        The Drive client of the calling thread, built on its first use
+        '''
+        if getattr(self.__worker_local, 'google_drive_service', None) is None:
+            self.__worker_local.google_drive_service = build_google_drive_service(self.__credentials, self.__api_endpoint)
+        return self.__worker_local.google_drive_service
+
+    def upload_files(self, file_paths_by_folder_id: dict[str, list[str]]) -> tuple[int, int]:
+        '''
+        Upload local files into Google Drive folders, each file is named after its local file name
+
+        Returns:
+            (uploaded_file_count, skipped_file_count) : tuple[int, int]
+        '''
+        upload_jobs: list[tuple[str, str]] = []
+        skipped_file_count: int = 0
+        for folder_id, file_paths in file_paths_by_folder_id.items():
+            if not file_paths: continue
+            uploaded_md5_checksums: dict[str, str] = self.__list_md5_checksums(folder_id, [os.path.basename(file_path) for file_path in file_paths])
+            for file_path in file_paths:
+                if uploaded_md5_checksums.get(os.path.basename(file_path)) == get_file_md5_checksum(file_path):
+                    skipped_file_count += 1
+                else:
+                    upload_jobs.append((file_path, folder_id))
+
+        if upload_jobs:
+            with ThreadPoolExecutor(max_workers=min(self.__max_workers, len(upload_jobs))) as executor:
+                list(executor.map(lambda upload_job: self.__upload_a_file(*upload_job), upload_jobs))
+
+        get_run_metrics().increment('uploaded_files', len(upload_jobs))
+        get_run_metrics().increment('upload_skipped_files', skipped_file_count)
+        return len(upload_jobs), skipped_file_count
+
+    def upload_stream(self, file_object: any, file_name: str, folder_id: str):
+        '''
+        Upload the content of a readable binary file object (read from its current position) as "file_name"
+        '''
+        self.__create_file(file_name, folder_id, MediaIoBaseUpload(file_object, mimetype='application/octet-stream', chunksize=self.__chunk_size_bytes, resumable=True))
+
+    def download_file(self, file_id: str) -> bytes:
+        downloaded_file = io.BytesIO()
+        downloader = MediaIoBaseDownload(downloaded_file, self.get_google_drive_service().files().get_media(fileId=file_id), chunksize=self.__chunk_size_bytes)
+        is_done: bool = False
+        while not is_done:
+            _, is_done = downloader.next_chunk(num_retries=3)
+        return downloaded_file.getvalue()
+
+    def list_files(self, folder_id: str, file_names: Optional[list[str]] = None) -> list[dict[str, str]]:
+        '''
+        List the (id, name, md5Checksum) of the files of a folder, only the files named in "file_names" if given
+        '''
+        query: str = f"'{folder_id}' in parents and trashed = false"
+        if file_names is not None:
+            query += ' and (' + ' or '.join(f"name = '{escape_query_string(file_name)}'" for file_name in file_names) + ')'
+
+        files: list[dict[str, str]] = []
+        next_page_token: Optional[str] = None
+        while True:
+            listed_response: dict[str, any] = self.__request_executor.execute(
+                self.get_google_drive_service().files().list(q=query, fields='nextPageToken, files(id, name, md5Checksum)', pageSize=1000, pageToken=next_page_token),
+                endpoint='drive.files'
+            )
+            files += listed_response.get('files', [])
+
+            next_page_token = listed_response.get('nextPageToken')
+            if not next_page_token: break
+
+        return files
+
+    def delete_files(self, file_ids: list[str]) -> int:
+        '''
+        Delete files with batch requests of at most 100 calls, only the deletions that failed with a retryable error are sent again
+
+        Returns:
+            deleted_file_count: the number of files deleted without error
+        '''
+        google_drive_service: any = self.get_google_drive_service()
+        unique_file_ids: list[str] = list(dict.fromkeys(file_ids))
+        deleted_file_count: int = 0
+
+        for index_start in range(0, len(unique_file_ids), MAX_REQUESTS_PER_BATCH):
+            exceptions: dict[str, Optional[Exception]] = self.__request_executor.execute_batch(
+                {file_id: google_drive_service.files().delete(fileId=file_id) for file_id in unique_file_ids[index_start:index_start + MAX_REQUESTS_PER_BATCH]},
+                google_drive_service.new_batch_http_request,
+                endpoint='drive.batch'
+            )
+            for exception in exceptions.values():
+                if exception is None:
+                    deleted_file_count += 1
+                else:
+                    print(f"\033[91mAn error occurred\033[0m: {exception}")
+
+        return deleted_file_count
+
+    def __upload_a_file(self, file_path: str, folder_id: str):
+        get_run_metrics().increment('bytes_uploaded', os.path.getsize(file_path))
+        self.__create_file(os.path.basename(file_path), folder_id, MediaFileUpload(file_path, mimetype='application/octet-stream', chunksize=self.__chunk_size_bytes, resumable=True))
+
+    def __create_file(self, file_name: str, folder_id: str, media: any):
+        file_metadata: dict[str, any] = {
+            'name': file_name,
+            'parents': [folder_id]
+        }
+        # a retried resumable request continues from the last uploaded chunk instead of restarting
+        self.__request_executor.execute(self.get_google_drive_service().files().create(body=file_metadata, media_body=media, fields='id'), endpoint='drive.files')
+
+    def __list_md5_checksums(self, folder_id: str, file_names: list[str]) -> dict[str, str]:
+        return {listed_file['name']: listed_file.get('md5Checksum') for listed_file in self.list_files(folder_id, file_names)}
+
+def get_file_md5_checksum(file_path: str) -> str:
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+def escape_query_string(value: str) -> str:
+    return value.replace('\\', '\\\\').replace("'", "\\'")
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Optional
+import threading
+
+QUOTA_COSTS: dict[str, int] = { # YouTube Data API v3 quota units per request
+    'search': 100,
+    'videos': 1,
+    'commentThreads': 1,
+    'channels': 1,
+}
+
+class QuotaBudgetExceededError(RuntimeError):
+    pass
+
+@dataclass
+class QuotaBudget:
+    '''
+    Thread-safe quota accounting shared by every "YouTubeCrawler" of a pipeline run
+
+    Example:
+        quota_budget = QuotaBudget(max_units=5000)
+        quota_budget.spend('search') # raises "QuotaBudgetExceededError" once the run would go over 5000 units
+    '''
+    __max_units: Optional[int]
+    __spent_units: dict[str, int]
+    __lock: threading.Lock
+
+    def __init__(self, max_units: Optional[int] = None):
+        self.__max_units = max_units
+        self.__spent_units = {}
+        self.__lock = threading.Lock()
+
+    def spend(self, endpoint: str, requests: int = 1):
+        units: int = QUOTA_COSTS.get(endpoint, 1) * requests
+        with self.__lock:
+            if self.__max_units is not None and self.get_total_spent_units() + units > self.__max_units:
+                raise QuotaBudgetExceededError(f"\033[91mQuota budget exceeded\033[0m: {self.get_total_spent_units()} + {units} ({endpoint}) > {self.__max_units} units")
+            self.__spent_units[endpoint] = self.__spent_units.get(endpoint, 0) + units
+
+    def get_spent_units(self) -> dict[str, int]:
+        return dict(self.__spent_units)
+
+    def get_total_spent_units(self) -> int:
+        return sum(self.__spent_units.values())
+
+    def get_max_units(self) -> Optional[int]:
+        return self.__max_units
@@ -0,0 +1,228 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+from time import monotonic, perf_counter, sleep
+import json
+import random
+import threading
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, BatchHttpRequest
+from utilities import load_configs
+from quota_budget import QuotaBudget, QuotaBudgetExceededError, QUOTA_COSTS
+from run_metrics import RunMetrics, get_run_metrics
+
+RETRYABLE_STATUS_CODES: set[int] = {429, 500, 502, 503, 504}
+RETRYABLE_ERROR_REASONS: set[str] = {'rateLimitExceeded', 'userRateLimitExceeded', 'backendError', 'internalError'}
+QUOTA_EXCEEDED_ERROR_REASONS: set[str] = {'quotaExceeded', 'dailyLimitExceeded'}
+
+class QuotaExceededError(QuotaBudgetExceededError):
+    pass
+
+@dataclass
+class TokenBucket:
+    '''
+    Thread-safe token bucket, one token is one quota unit
+
+    Example:
+        token_bucket = TokenBucket(capacity_units=300, refill_units_per_s=50)
+        token_bucket.acquire(100) # blocks until 100 units are available
+    '''
+    __capacity_units: float
+    __refill_units_per_s: float
+    __available_units: float
+    __last_refill_time: float
+    __lock: threading.Lock
+
+    def __init__(self, capacity_units: float, refill_units_per_s: float):
+        self.__capacity_units = capacity_units
+        self.__refill_units_per_s = refill_units_per_s
+        self.__available_units = capacity_units
+        self.__last_refill_time = monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, units: float):
+        units = min(units, self.__capacity_units) # a request larger than the bucket only waits for a full bucket
+        while True:
+            with self.__lock:
+                current_time: float = monotonic()
+                self.__available_units = min(self.__capacity_units, self.__available_units + (current_time - self.__last_refill_time) * self.__refill_units_per_s)
+                self.__last_refill_time = current_time
+
+                if self.__available_units >= units:
+                    self.__available_units -= units
+                    return
+                waiting_time_s: float = (units - self.__available_units) / self.__refill_units_per_s
+            sleep(waiting_time_s)
+
+@dataclass
+class RequestExecutor:
+    '''
+    Execute Google API requests with rate limiting, quota accounting and retries (exponential backoff with full jitter)
+
+    YouTube endpoints (the keys of "QUOTA_COSTS") are charged against the quota budget, other endpoints (e.g. Google Drive) are only counted.
+    Every attempt is recorded into the run metrics: an "api_call" span and the "api_calls", "quota_units", "api_errors" and "retries" counters per endpoint.
+
+    Example:
+        request_executor = build_request_executor(quota_budget=QuotaBudget(max_units=5000))
+        response = request_executor.execute(youtube_service.search().list(q='news', part='id'), endpoint='search')
+    '''
+    __quota_budget: QuotaBudget
+    __token_bucket: Optional[TokenBucket]
+    __max_retries: int
+    __base_backoff_s: float
+    __max_backoff_s: float
+    __request_counts: dict[str, int]
+    __retry_counts: dict[str, int]
+    __lock: threading.Lock
+
+    def __init__(self, quota_budget: Optional[QuotaBudget] = None, token_bucket: Optional[TokenBucket] = None, max_retries: int = 5, base_backoff_s: float = 1.0, max_backoff_s: float = 32.0):
+        self.__quota_budget = quota_budget if quota_budget is not None else QuotaBudget()
+        self.__token_bucket = token_bucket
+        self.__max_retries = max_retries
+        self.__base_backoff_s = base_backoff_s
+        self.__max_backoff_s = max_backoff_s
+        self.__request_counts = {}
+        self.__retry_counts = {}
+        self.__lock = threading.Lock()
+
+    def execute(self, request: HttpRequest, endpoint: str) -> dict[str, any]:
+        run_metrics: RunMetrics = get_run_metrics()
+        for attempt in range(self.__max_retries + 1):
+            if endpoint in QUOTA_COSTS:
+                self.__quota_budget.spend(endpoint)
+                run_metrics.increment('quota_units', QUOTA_COSTS[endpoint], endpoint=endpoint)
+                if self.__token_bucket is not None:
+                    self.__token_bucket.acquire(QUOTA_COSTS[endpoint])
+            self.__count(self.__request_counts, endpoint)
+            run_metrics.increment('api_calls', endpoint=endpoint)
+
+            start_time: float = perf_counter()
+            try:
+                return request.execute()
+            except HttpError as error:
+                run_metrics.increment('api_errors', endpoint=endpoint, status=error.resp.status)
+                error_reasons: set[str] = get_http_error_reasons(error)
+                if error_reasons & QUOTA_EXCEEDED_ERROR_REASONS:
+                    raise QuotaExceededError(f"\033[91mAPI quota exceeded\033[0m ({endpoint}): {error}") from error
+                if not is_retryable_http_error(error):
+                    raise
+                if attempt == self.__max_retries:
+                    raise
+            except (ConnectionError, TimeoutError, httplib2.HttpLib2Error):
+                run_metrics.increment('api_errors', endpoint=endpoint, status='connection')
+                if attempt == self.__max_retries:
+                    raise
+            finally:
+                run_metrics.record_span('api_call', perf_counter() - start_time, endpoint=endpoint)
+
+            self.__count(self.__retry_counts, endpoint)
+            run_metrics.increment('retries', endpoint=endpoint)
+            sleep(random.uniform(0, min(self.__max_backoff_s, self.__base_backoff_s * 2 ** attempt)))
+
+    def execute_batch(self, requests: dict[str, HttpRequest], new_batch_request: Callable[..., BatchHttpRequest], endpoint: str) -> dict[str, Optional[Exception]]:
+        '''
+        Execute the requests as one batch request, then retry only the sub-requests that failed with a retryable error or got no response,
+        with the backoff of "execute" (a sub-request that succeeded is never sent again)
+
+        The batch requests are not charged against the quota budget, only Google Drive batches are used.
+
+        Args:
+            requests: the requests keyed by a request ID unique within the batch
+            new_batch_request: build an empty batch request for a callback, e.g. "google_drive_service.new_batch_http_request"
+
+        Returns:
+            exceptions: the exception of every request ID, None for the requests that succeeded
+
+        Example:
+            exceptions = request_executor.execute_batch({file_id: google_drive_service.files().delete(fileId=file_id)}, google_drive_service.new_batch_http_request, endpoint='drive.batch')
+        '''
+        run_metrics: RunMetrics = get_run_metrics()
+        exceptions: dict[str, Optional[Exception]] = {}
+        pending_request_ids: list[str] = list(requests)
+
+        def on_response(request_id: str, response: any, exception: Optional[Exception]):
+            exceptions[request_id] = exception
+
+        for attempt in range(self.__max_retries + 1):
+            batch_request: BatchHttpRequest = new_batch_request(callback=on_response)
+            for request_id in pending_request_ids:
+                exceptions.pop(request_id, None)
+                batch_request.add(requests[request_id], request_id=request_id)
+            self.__count(self.__request_counts, endpoint)
+            run_metrics.increment('api_calls', endpoint=endpoint)
+
+            start_time: float = perf_counter()
+            batch_error: Optional[Exception] = None
+            try:
+                batch_request.execute()
+            except HttpError as error: # the batch request itself failed, the sub-requests without a response are sent again
+                run_metrics.increment('api_errors', endpoint=endpoint, status=error.resp.status)
+                batch_error = error
+            except (ConnectionError, TimeoutError, httplib2.HttpLib2Error) as error:
+                run_metrics.increment('api_errors', endpoint=endpoint, status='connection')
+                batch_error = error
+            finally:
+                run_metrics.record_span('api_call', perf_counter() - start_time, endpoint=endpoint)
+
+            pending_request_ids = [
+                request_id for request_id in pending_request_ids
+                if request_id not in exceptions or (isinstance(exceptions[request_id], HttpError) and is_retryable_http_error(exceptions[request_id]))
+            ]
+            is_batch_retryable: bool = batch_error is None or not isinstance(batch_error, HttpError) or is_retryable_http_error(batch_error)
+            if not pending_request_ids or attempt == self.__max_retries or not is_batch_retryable:
+                # the results of the earlier attempts are kept, the sub-requests left without a response get the error of the batch request
+                for request_id in pending_request_ids:
+                    exceptions.setdefault(request_id, batch_error)
+                break
+            self.__count(self.__retry_counts, endpoint)
+            run_metrics.increment('retries', endpoint=endpoint)
+            sleep(random.uniform(0, min(self.__max_backoff_s, self.__base_backoff_s * 2 ** attempt)))
+
+        return exceptions
+
+    def get_quota_budget(self) -> QuotaBudget:
+        return self.__quota_budget
+
+    def get_request_counts(self) -> dict[str, int]:
+        return dict(self.__request_counts)
+
+    def get_retry_counts(self) -> dict[str, int]:
+        return dict(self.__retry_counts)
+
+    def __count(self, counts: dict[str, int], endpoint: str):
+        with self.__lock:
+            counts[endpoint] = counts.get(endpoint, 0) + 1
+
+def is_retryable_http_error(error: HttpError) -> bool:
+    return error.resp.status in RETRYABLE_STATUS_CODES or bool(get_http_error_reasons(error) & RETRYABLE_ERROR_REASONS)
+
+def get_http_error_reasons(error: HttpError) -> set[str]:
+    try:
+        error_content: dict[str, any] = json.loads(error.content.decode('utf-8'))
+        return {error_detail.get('reason') for error_detail in error_content['error'].get('errors', [])}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+
+def build_request_executor(quota_budget: Optional[QuotaBudget] = None) -> RequestExecutor:
+    """
+    build a "RequestExecutor" with the settings of "configs.yaml[request_executor]"
+
+    Returns:
+        request_executor: the executor that every crawler and Google Drive request of a run goes through
+
+    Example:
+        request_executor: RequestExecutor = build_request_executor(quota_budget=QuotaBudget(max_units=5000))
+    """
+    REQUEST_EXECUTOR_CONFIGS: dict[str, any] = load_configs().get('request_executor', {})
+
+    token_bucket: Optional[TokenBucket] = None
+    if REQUEST_EXECUTOR_CONFIGS.get('token_bucket_capacity_units'):
+        token_bucket = TokenBucket(REQUEST_EXECUTOR_CONFIGS['token_bucket_capacity_units'], REQUEST_EXECUTOR_CONFIGS['token_bucket_refill_units_per_s'])
+
+    return RequestExecutor(
+        quota_budget=quota_budget,
+        token_bucket=token_bucket,
+        max_retries=REQUEST_EXECUTOR_CONFIGS.get('max_retries', 5),
+        base_backoff_s=REQUEST_EXECUTOR_CONFIGS.get('base_backoff_s', 1.0),
+        max_backoff_s=REQUEST_EXECUTOR_CONFIGS.get('max_backoff_s', 32.0)
+    )
@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import Optional
+from time import time
+from urllib.parse import urlparse, parse_qsl, urlencode
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from utilities import load_configs
+
+@dataclass
+class ResponseCache:
+    '''
+    SQLite cache of API responses, compressed with zlib, with a TTL per endpoint and LRU eviction once "max_bytes" is reached
+
+    The size of the stored responses is summed once when the cache is opened, then kept up to date by every write and eviction.
+
+    Example:
+        response_cache = ResponseCache('./cache/youtube_responses.sqlite3', ttls_s={'videos': 900, 'channels': 86400})
+        response_cache.put('videos', key, response)
+        response: Optional[dict[str, any]] = response_cache.get('videos', key)
+    '''
+    __connection: sqlite3.Connection
+    __ttls_s: dict[str, int]
+    __default_ttl_s: int
+    __max_bytes: int
+    __total_bytes: int
+    __lock: threading.Lock
+
+    def __init__(self, file_path: str, ttls_s: Optional[dict[str, int]] = None, default_ttl_s: int = 3600, max_bytes: int = 256 * 1024 * 1024):
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        self.__connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.__connection.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                endpoint TEXT NOT NULL,
+                key TEXT NOT NULL,
+                response BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                last_accessed_at REAL NOT NULL,
+                PRIMARY KEY (endpoint, key)
+            )
+        ''')
+        self.__connection.execute('CREATE INDEX IF NOT EXISTS responses_last_accessed_at ON responses (last_accessed_at)')
+        self.__connection.commit()
+        self.__ttls_s = dict(ttls_s or {})
+        self.__default_ttl_s = default_ttl_s
+        self.__max_bytes = max_bytes
+        self.__total_bytes = self.__connection.execute('SELECT COALESCE(SUM(LENGTH(response)), 0) FROM responses').fetchone()[0]
+        self.__lock = threading.Lock()
+
+    def get(self, endpoint: str, key: str) -> Optional[dict[str, any]]:
+        current_time: float = time()
+        with self.__lock:
+            row = self.__connection.execute('SELECT response, stored_at FROM responses WHERE endpoint = ? AND key = ?', (endpoint, key)).fetchone()
+            if row is None:
+                return None
+
+            if row[1] + self.__ttls_s.get(endpoint, self.__default_ttl_s) < current_time:
+                self.__connection.execute('DELETE FROM responses WHERE endpoint = ? AND key = ?', (endpoint, key))
+                self.__connection.commit()
+                self.__total_bytes -= len(row[0])
+                return None
+
+            self.__connection.execute('UPDATE responses SET last_accessed_at = ? WHERE endpoint = ? AND key = ?', (current_time, endpoint, key))
+            self.__connection.commit()
+
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, endpoint: str, key: str, response: dict[str, any]):
+        current_time: float = time()
+        compressed_response: bytes = zlib.compress(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        with self.__lock:
+            replaced_row = self.__connection.execute('SELECT LENGTH(response) FROM responses WHERE endpoint = ? AND key = ?', (endpoint, key)).fetchone()
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO responses (endpoint, key, response, stored_at, last_accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (endpoint, key, compressed_response, current_time, current_time)
+            )
+            self.__total_bytes += len(compressed_response) - (replaced_row[0] if replaced_row is not None else 0)
+            self.__evict_least_recently_used()
+            self.__connection.commit()
+
+    def clear(self):
+        with self.__lock:
+            self.__connection.execute('DELETE FROM responses')
+            self.__connection.commit()
+            self.__total_bytes = 0
+
+    def __evict_least_recently_used(self):
+        if self.__total_bytes <= self.__max_bytes:
+            return
+
+        evicted_rowids: list[int] = []
+        for rowid, response_bytes in self.__connection.execute('SELECT rowid, LENGTH(response) FROM responses ORDER BY last_accessed_at'):
+            if self.__total_bytes <= self.__max_bytes: break
+            evicted_rowids.append(rowid)
+            self.__total_bytes -= response_bytes
+        self.__connection.executemany('DELETE FROM responses WHERE rowid = ?', [(rowid,) for rowid in evicted_rowids])
+
+def get_response_cache_key(request_uri: str) -> str:
+    '''
+    Normalize the query of a request URI into a cache key, the API key is dropped and the parameters are sorted
+    '''
+    params: list[tuple[str, str]] = [(name, value) for name, value in parse_qsl(urlparse(request_uri).query) if name != 'key']
+    return urlencode(sorted(params))
+
+__shared_response_cache: Optional[ResponseCache] = None
+__shared_channel_info_cache: Optional[ResponseCache] = None
+__shared_cache_lock: threading.Lock = threading.Lock()
+
+def get_shared_response_cache() -> ResponseCache:
+    """
+    get the process-wide "ResponseCache" built from "configs.yaml[response_cache]"
+
+    Returns:
+        response_cache: the cache shared by every crawler of the process
+
+    Example:
+        response_cache: ResponseCache = get_shared_response_cache()
+    """
+    global __shared_response_cache
+    with __shared_cache_lock:
+        if __shared_response_cache is None:
+            RESPONSE_CACHE_CONFIGS: dict[str, any] = load_configs().get('response_cache', {})
+            __shared_response_cache = ResponseCache(
+                file_path=RESPONSE_CACHE_CONFIGS.get('file_path', './cache/youtube_responses.sqlite3'),
+                ttls_s=RESPONSE_CACHE_CONFIGS.get('ttl_s', {}),
+                default_ttl_s=RESPONSE_CACHE_CONFIGS.get('default_ttl_s', 3600),
+                max_bytes=RESPONSE_CACHE_CONFIGS.get('max_megabytes', 256) * 1024 * 1024
+            )
+        return __shared_response_cache
+
+def get_shared_channel_info_cache() -> ResponseCache:
+    """
+    get the process-wide "ResponseCache" of channel metadata built from "configs.yaml[channel_info_cache]", keyed by channel ID
+
+    Returns:
+        channel_info_cache: the cache shared by every crawler of the process
+
+    Example:
+        channel_info_cache: ResponseCache = get_shared_channel_info_cache()
+    """
+    global __shared_channel_info_cache
+    with __shared_cache_lock:
+        if __shared_channel_info_cache is None:
+            CHANNEL_INFO_CACHE_CONFIGS: dict[str, any] = load_configs().get('channel_info_cache', {})
+            __shared_channel_info_cache = ResponseCache(
+                file_path=CHANNEL_INFO_CACHE_CONFIGS.get('file_path', './cache/channel_info.sqlite3'),
+                default_ttl_s=CHANNEL_INFO_CACHE_CONFIGS.get('ttl_s', 86400),
+                max_bytes=CHANNEL_INFO_CACHE_CONFIGS.get('max_megabytes', 64) * 1024 * 1024
+            )
+        return __shared_channel_info_cache
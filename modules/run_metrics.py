@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+from time import time, perf_counter
+import json
+import os
+import threading
+from utilities import load_configs
+
+METRIC_NAME_PREFIX: str = 'youtube_data_collector'
+
+@dataclass
+class RunMetrics:
+    '''
+    Thread-safe spans and counters of a run, exported once at its end as JSON lines or a Prometheus textfile
+
+    A span is aggregated per (name, labels) into its count, total and longest duration, so per-call spans (e.g. every API call) stay small.
+
+    Example:
+        run_metrics: RunMetrics = get_run_metrics()
+        with run_metrics.span('collect', category='news'):
+            ...
+        run_metrics.increment('api_calls', endpoint='search')
+        run_metrics.export('./metrics/run_metrics.prom', metrics_format='prometheus')
+    '''
+    __spans: dict[tuple[str, tuple[tuple[str, str], ...]], list[float]]
+    __counters: dict[tuple[str, tuple[tuple[str, str], ...]], float]
+    __start_time: float
+    __lock: threading.Lock
+
+    def __init__(self):
+        self.__spans = {}
+        self.__counters = {}
+        self.__start_time = time()
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **labels: str) -> Iterator[None]:
+        start_time: float = perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, perf_counter() - start_time, **labels)
+
+    def record_span(self, name: str, duration_s: float, **labels: str):
+        key: tuple[str, tuple[tuple[str, str], ...]] = (name, get_label_items(labels))
+        with self.__lock:
+            aggregate: Optional[list[float]] = self.__spans.get(key)
+            if aggregate is None:
+                self.__spans[key] = [1, duration_s, duration_s]
+            else:
+                aggregate[0] += 1
+                aggregate[1] += duration_s
+                aggregate[2] = max(aggregate[2], duration_s)
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        key: tuple[str, tuple[tuple[str, str], ...]] = (name, get_label_items(labels))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def get_spans(self) -> list[dict[str, any]]:
+        with self.__lock:
+            return [
+                {'name': name, 'labels': dict(label_items), 'count': int(count), 'total_s': total_s, 'max_s': max_s}
+                for (name, label_items), (count, total_s, max_s) in sorted(self.__spans.items())
+            ]
+
+    def get_counters(self) -> list[dict[str, any]]:
+        with self.__lock:
+            return [{'name': name, 'labels': dict(label_items), 'value': value} for (name, label_items), value in sorted(self.__counters.items())]
+
+    def get_counter_value(self, name: str, **labels: str) -> float:
+        with self.__lock:
+            return self.__counters.get((name, get_label_items(labels)), 0)
+
+    def export(self, file_path: str, metrics_format: str = 'json'):
+        '''
+        Write the metrics of the run to "file_path"
+
+        Args:
+            metrics_format: "json" appends one JSON line per span and counter (a log of every run),
+                "prometheus" replaces the file with the metrics of this run, for the textfile collector of the node exporter
+        '''
+        if metrics_format not in ('json', 'prometheus'):
+            raise ValueError(f"\n\033[91mInvalid input of \"metrics_format\"\033[0m: {metrics_format}\n\033[92mValid input\033[0m: ('json', 'prometheus')")
+
+        folder_path: str = os.path.dirname(file_path)
+        if folder_path:
+            os.makedirs(folder_path, exist_ok=True)
+
+        if metrics_format == 'json':
+            with open(file_path, 'a', encoding='utf-8') as file:
+                file.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in self.__get_json_records())
+            return
+
+        # written aside and renamed, the collector never reads a half-written file
+        with open(f"{file_path}.partial", 'w', encoding='utf-8') as file:
+            file.write(self.__get_prometheus_text())
+        os.replace(f"{file_path}.partial", file_path)
+
+    def __get_json_records(self) -> list[dict[str, any]]:
+        run_start_time: str = datetime.fromtimestamp(self.__start_time).isoformat(timespec='seconds')
+        run_duration_s: float = time() - self.__start_time
+        return (
+            [{'run_start_time': run_start_time, 'type': 'run', 'duration_s': run_duration_s}] +
+            [{'run_start_time': run_start_time, 'type': 'span', **span} for span in self.get_spans()] +
+            [{'run_start_time': run_start_time, 'type': 'counter', **counter} for counter in self.get_counters()]
+        )
+
+    def __get_prometheus_text(self) -> str:
+        lines: list[str] = [
+            f"# TYPE {METRIC_NAME_PREFIX}_run_start_timestamp_seconds gauge",
+            f"{METRIC_NAME_PREFIX}_run_start_timestamp_seconds {self.__start_time:.3f}",
+            f"# TYPE {METRIC_NAME_PREFIX}_run_duration_seconds gauge",
+            f"{METRIC_NAME_PREFIX}_run_duration_seconds {time() - self.__start_time:.3f}",
+            f"# TYPE {METRIC_NAME_PREFIX}_span_seconds summary",
+        ]
+        spans: list[dict[str, any]] = self.get_spans()
+        for span in spans:
+            labels: str = get_prometheus_labels({'span': span['name'], **span['labels']})
+            lines.append(f"{METRIC_NAME_PREFIX}_span_seconds_sum{labels} {span['total_s']:.6f}")
+            lines.append(f"{METRIC_NAME_PREFIX}_span_seconds_count{labels} {span['count']}")
+        lines.append(f"# TYPE {METRIC_NAME_PREFIX}_span_max_seconds gauge")
+        for span in spans:
+            lines.append(f"{METRIC_NAME_PREFIX}_span_max_seconds{get_prometheus_labels({'span': span['name'], **span['labels']})} {span['max_s']:.6f}")
+
+        counter_names: list[str] = []
+        for counter in self.get_counters():
+            if counter['name'] not in counter_names:
+                counter_names.append(counter['name'])
+                lines.append(f"# TYPE {METRIC_NAME_PREFIX}_{counter['name']}_total counter")
+            lines.append(f"{METRIC_NAME_PREFIX}_{counter['name']}_total{get_prometheus_labels(counter['labels'])} {counter['value']:g}")
+
+        return '\n'.join(lines) + '\n'
+
+def get_label_items(labels: dict[str, any]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((label_name, str(label_value)) for label_name, label_value in labels.items()))
+
+def get_prometheus_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped_labels: list[str] = [f'{label_name}="' + label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"' for label_name, label_value in labels.items()]
+    return '{' + ','.join(escaped_labels) + '}'
+
+__run_metrics: Optional[RunMetrics] = None
+__run_metrics_lock: threading.Lock = threading.Lock()
+
+def get_run_metrics() -> RunMetrics:
+    """
+    get the process-wide "RunMetrics" that every stage of a run records into
+
+    Example:
+        get_run_metrics().increment('rows_written', 120, category='news', file_name='video_comments.parquet')
+    """
+    global __run_metrics
+    with __run_metrics_lock:
+        if __run_metrics is None:
+            __run_metrics = RunMetrics()
+        return __run_metrics
+
+def export_run_metrics() -> Optional[str]:
+    """
+    export the metrics of the run as set by "configs.yaml[metrics]", nothing is written when disabled
+
+    Returns:
+        file_path: the written file, None when disabled
+
+    Example:
+        export_run_metrics() # at the end of "run_data_pipeline"
+    """
+    METRICS_CONFIGS: dict[str, any] = load_configs().get('metrics', {})
+    if not METRICS_CONFIGS.get('enabled', False):
+        return None
+
+    METRICS_FORMAT: str = METRICS_CONFIGS.get('format', 'json')
+    FILE_PATH: str = METRICS_CONFIGS.get('file_path', './metrics/run_metrics.jsonl' if METRICS_FORMAT == 'json' else './metrics/run_metrics.prom')
+    get_run_metrics().export(FILE_PATH, metrics_format=METRICS_FORMAT)
+    return FILE_PATH
@@ -0,0 +1,321 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional, TYPE_CHECKING
+from tempfile import SpooledTemporaryFile
+from time import sleep
+import io
+import os
+import threading
+from utilities import load_configs
+if TYPE_CHECKING:
+    import pyarrow as pa # imported by "write_parquet_table" only, the cleanup of the online data does not need it
+
+class StorageWriter(ABC):
+    '''
+    A file being written to a storage backend, nothing is visible in the backend before "commit"
+
+    Example:
+        storage_writer: StorageWriter = storage_backend.open_writer('news', '2025021812_video_info.parquet')
+        pq.write_table(video_info_table, storage_writer.get_sink())
+        storage_writer.commit()
+    '''
+    @abstractmethod
+    def get_sink(self) -> any:
+        '''
+        The writable binary file object to write the content to, e.g. for "pq.ParquetWriter"
+        '''
+
+    @abstractmethod
+    def commit(self) -> int:
+        '''
+        Returns:
+            byte_count: the size of the committed file
+        '''
+
+    @abstractmethod
+    def abort(self):
+        pass
+
+class StorageBackend(ABC):
+    '''
+    Where the collected data is stored, with one folder per category of "configs.yaml[folder_name_to_save_data]"
+
+    Implementations: "LocalStorageBackend", "GoogleDriveStorageBackend" and "InMemoryStorageBackend" (for tests and benchmarks).
+    '''
+    @abstractmethod
+    def open_writer(self, interested_category: str, file_name: str) -> StorageWriter:
+        pass
+
+    @abstractmethod
+    def read_bytes(self, interested_category: str, file_name: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def list_file_names(self, interested_category: str) -> list[str]:
+        pass
+
+    @abstractmethod
+    def delete_files(self, interested_category: str, file_names: list[str]) -> int:
+        pass
+
+    def write_bytes(self, interested_category: str, file_name: str, content: bytes) -> int:
+        storage_writer: StorageWriter = self.open_writer(interested_category, file_name)
+        try:
+            storage_writer.get_sink().write(content)
+        except BaseException:
+            storage_writer.abort()
+            raise
+        return storage_writer.commit()
+
+    def store_local_files(self, file_paths_by_category: dict[str, list[str]]) -> tuple[int, int]:
+        '''
+        Copy local files into the backend, each file is named after its local file name
+
+        Returns:
+            (stored_file_count, skipped_file_count) : tuple[int, int], backends able to tell an identical stored file skip it
+        '''
+        stored_file_count: int = 0
+        for interested_category, file_paths in file_paths_by_category.items():
+            for file_path in file_paths:
+                with open(file_path, 'rb') as file:
+                    self.write_bytes(interested_category, os.path.basename(file_path), file.read())
+                stored_file_count += 1
+        return stored_file_count, 0
+
+@dataclass
+class LocalStorageWriter(StorageWriter):
+    __file_path: str
+    __file: io.BufferedWriter
+
+    def __init__(self, file_path: str):
+        self.__file_path = file_path
+        self.__file = open(f"{file_path}.partial", 'wb')
+
+    def get_sink(self) -> io.BufferedWriter:
+        return self.__file
+
+    def commit(self) -> int:
+        # the complete file replaces "file_path" at once, a crashed run never leaves a half-written file behind
+        byte_count: int = self.__file.tell()
+        self.__file.close()
+        os.replace(f"{self.__file_path}.partial", self.__file_path)
+        return byte_count
+
+    def abort(self):
+        self.__file.close()
+        os.remove(f"{self.__file_path}.partial")
+
+@dataclass
+class LocalStorageBackend(StorageBackend):
+    '''
+    Example:
+        storage_backend = LocalStorageBackend() # the folders of "configs.yaml[folder_name_to_save_data]"
+        file_names: list[str] = storage_backend.list_file_names('news')
+    '''
+    __folder_paths: dict[str, str]
+
+    def __init__(self, folder_paths: Optional[dict[str, str]] = None):
+        self.__folder_paths = dict(folder_paths if folder_paths is not None else load_configs()['folder_name_to_save_data'])
+
+    def get_file_path(self, interested_category: str, file_name: str) -> str:
+        return f"{self.__folder_paths[interested_category]}/{file_name}"
+
+    def open_writer(self, interested_category: str, file_name: str) -> LocalStorageWriter:
+        os.makedirs(self.__folder_paths[interested_category], exist_ok=True)
+        return LocalStorageWriter(self.get_file_path(interested_category, file_name))
+
+    def read_bytes(self, interested_category: str, file_name: str) -> bytes:
+        with open(self.get_file_path(interested_category, file_name), 'rb') as file:
+            return file.read()
+
+    def list_file_names(self, interested_category: str) -> list[str]:
+        folder_path: str = self.__folder_paths[interested_category]
+        if not os.path.isdir(folder_path):
+            return []
+        return sorted(file_name for file_name in os.listdir(folder_path) if not file_name.endswith('.partial'))
+
+    def delete_files(self, interested_category: str, file_names: list[str]) -> int:
+        deleted_file_count: int = 0
+        for file_name in file_names:
+            try:
+                os.remove(self.get_file_path(interested_category, file_name))
+                deleted_file_count += 1
+            except FileNotFoundError:
+                continue
+        return deleted_file_count
+
+@dataclass
+class GoogleDriveStorageWriter(StorageWriter):
+    __file_name: str
+    __folder_id: str
+    __google_drive_uploader: any
+    __file: SpooledTemporaryFile
+
+    def __init__(self, file_name: str, folder_id: str, google_drive_uploader: any, max_memory_bytes: int):
+        self.__file_name = file_name
+        self.__folder_id = folder_id
+        self.__google_drive_uploader = google_drive_uploader
+        self.__file = SpooledTemporaryFile(max_size=max_memory_bytes) # kept in memory, only a file larger than "max_memory_bytes" spills to disk
+
+    def get_sink(self) -> SpooledTemporaryFile:
+        return self.__file
+
+    def commit(self) -> int:
+        # the file only appears in the folder once the resumable upload of the whole content completes
+        byte_count: int = self.__file.tell()
+        self.__file.seek(0)
+        try:
+            self.__google_drive_uploader.upload_stream(self.__file, self.__file_name, self.__folder_id)
+        finally:
+            self.__file.close()
+        return byte_count
+
+    def abort(self):
+        self.__file.close()
+
+@dataclass
+class GoogleDriveStorageBackend(StorageBackend):
+    '''
+    Example:
+        storage_backend = GoogleDriveStorageBackend() # the folders of "configs.yaml[parent_folder_id_to_upload_data]"
+        stored_file_count, skipped_file_count = storage_backend.store_local_files({'news': ['./data/news/2025021812_video_info.parquet']})
+    '''
+    __folder_ids: dict[str, str]
+    __google_drive_uploader: any
+    __max_memory_bytes: int
+
+    def __init__(self, folder_ids: Optional[dict[str, str]] = None, google_drive_uploader: any = None, request_executor: any = None):
+        from google_drive_uploader import GoogleDriveUploader # the Google API client is only imported when Drive is used
+
+        configs: dict[str, any] = load_configs()
+        self.__folder_ids = dict(folder_ids if folder_ids is not None else configs['parent_folder_id_to_upload_data'])
+        self.__google_drive_uploader = google_drive_uploader if google_drive_uploader is not None else GoogleDriveUploader(request_executor=request_executor)
+        self.__max_memory_bytes = configs.get('google_drive_upload', {}).get('max_memory_mb', 64) * 1024 * 1024
+
+    def open_writer(self, interested_category: str, file_name: str) -> GoogleDriveStorageWriter:
+        return GoogleDriveStorageWriter(file_name, self.__folder_ids[interested_category], self.__google_drive_uploader, self.__max_memory_bytes)
+
+    def read_bytes(self, interested_category: str, file_name: str) -> bytes:
+        listed_files: list[dict[str, str]] = self.__google_drive_uploader.list_files(self.__folder_ids[interested_category], [file_name])
+        if not listed_files:
+            raise FileNotFoundError(f"\033[91mNo file named\033[0m \"{file_name}\" in the G-Drive folder of \"{interested_category}\"")
+        return self.__google_drive_uploader.download_file(listed_files[0]['id'])
+
+    def list_file_names(self, interested_category: str) -> list[str]:
+        return sorted(listed_file['name'] for listed_file in self.__google_drive_uploader.list_files(self.__folder_ids[interested_category]))
+
+    def delete_files(self, interested_category: str, file_names: list[str]) -> int:
+        deleted_file_names: set[str] = set(file_names)
+        listed_files: list[dict[str, str]] = self.__google_drive_uploader.list_files(self.__folder_ids[interested_category])
+        return self.__google_drive_uploader.delete_files([listed_file['id'] for listed_file in listed_files if listed_file['name'] in deleted_file_names])
+
+    def store_local_files(self, file_paths_by_category: dict[str, list[str]]) -> tuple[int, int]:
+        # concurrent resumable uploads straight from the files, the files already uploaded with the same md5 are skipped
+        return self.__google_drive_uploader.upload_files({
+            self.__folder_ids[interested_category]: file_paths
+            for interested_category, file_paths in file_paths_by_category.items()
+        })
+
+@dataclass
+class InMemoryStorageWriter(StorageWriter):
+    __on_commit: Callable[[bytes], None]
+    __file: io.BytesIO
+
+    def __init__(self, on_commit: Callable[[bytes], None]):
+        self.__on_commit = on_commit
+        self.__file = io.BytesIO()
+
+    def get_sink(self) -> io.BytesIO:
+        return self.__file
+
+    def commit(self) -> int:
+        content: bytes = self.__file.getvalue()
+        self.__on_commit(content)
+        return len(content)
+
+    def abort(self):
+        self.__file = io.BytesIO()
+
+@dataclass
+class InMemoryStorageBackend(StorageBackend):
+    '''
+    A storage backend keeping the files in memory, to test or benchmark the storage and upload paths without disk or network
+
+    "latency_s" is waited on every call reaching the backend, to simulate a remote storage.
+
+    Example:
+        storage_backend = InMemoryStorageBackend(latency_s=0.05)
+        data_collector.upload_data_to_google_drive(storage_backend=storage_backend)
+        files: dict[str, dict[str, bytes]] = storage_backend.get_files()
+    '''
+    __files: dict[str, dict[str, bytes]]
+    __latency_s: float
+    __lock: threading.Lock
+
+    def __init__(self, latency_s: float = 0.0):
+        self.__files = {}
+        self.__latency_s = latency_s
+        self.__lock = threading.Lock()
+
+    def get_files(self) -> dict[str, dict[str, bytes]]:
+        with self.__lock:
+            return {interested_category: dict(files) for interested_category, files in self.__files.items()}
+
+    def open_writer(self, interested_category: str, file_name: str) -> InMemoryStorageWriter:
+        return InMemoryStorageWriter(lambda content: self.__put(interested_category, file_name, content))
+
+    def read_bytes(self, interested_category: str, file_name: str) -> bytes:
+        sleep(self.__latency_s)
+        with self.__lock:
+            if file_name not in self.__files.get(interested_category, {}):
+                raise FileNotFoundError(f"\033[91mNo file named\033[0m \"{file_name}\" in the in-memory folder of \"{interested_category}\"")
+            return self.__files[interested_category][file_name]
+
+    def list_file_names(self, interested_category: str) -> list[str]:
+        sleep(self.__latency_s)
+        with self.__lock:
+            return sorted(self.__files.get(interested_category, {}).keys())
+
+    def delete_files(self, interested_category: str, file_names: list[str]) -> int:
+        sleep(self.__latency_s)
+        with self.__lock:
+            files: dict[str, bytes] = self.__files.get(interested_category, {})
+            return sum(files.pop(file_name, None) is not None for file_name in file_names)
+
+    def __put(self, interested_category: str, file_name: str, content: bytes):
+        sleep(self.__latency_s)
+        with self.__lock:
+            self.__files.setdefault(interested_category, {})[file_name] = content
+
+def build_storage_backend(storage_backend_name: Optional[str] = None, request_executor: any = None) -> StorageBackend:
+    """
+    build the storage backend named by "configs.yaml[storage_backend]" ("local", "google_drive" or "in_memory")
+
+    Example:
+        storage_backend: StorageBackend = build_storage_backend()
+    """
+    if storage_backend_name is None:
+        storage_backend_name = load_configs().get('storage_backend', 'local')
+
+    if storage_backend_name == 'local':
+        return LocalStorageBackend()
+    if storage_backend_name == 'google_drive':
+        return GoogleDriveStorageBackend(request_executor=request_executor)
+    if storage_backend_name == 'in_memory':
+        return InMemoryStorageBackend()
+    raise ValueError(f"\n\033[91mInvalid input of \"storage_backend\"\033[0m: {storage_backend_name}\n\033[92mValid input\033[0m: ('local', 'google_drive', 'in_memory')")
+
+def write_parquet_table(storage_backend: StorageBackend, interested_category: str, file_name: str, table: 'pa.Table', **parquet_options) -> int:
+    '''
+    Returns:
+        byte_count: the size of the written file
+    '''
+    import pyarrow.parquet as pq
+
+    storage_writer: StorageWriter = storage_backend.open_writer(interested_category, file_name)
+    try:
+        pq.write_table(table, storage_writer.get_sink(), **parquet_options)
+    except BaseException:
+        storage_writer.abort()
+        raise
+    return storage_writer.commit()
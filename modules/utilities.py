@@ -1,14 +1,66 @@
+import json
+import os
+import threading
 import yaml
-from pandas import read_parquet, DataFrame
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
+from datetime import datetime, timedelta
+from typing import Optional, TypedDict
+# pandas and the Google API clients are imported where they are used, the cleanup entry points start without them
 
-def load_configs(file_path: str = './configs.yaml') -> dict[str, any]:
-    with open(file_path, 'r') as file:
-        configs = yaml.safe_load(file)
-    return configs
+class Configs(TypedDict, total=False):
+    '''
+    The sections of "configs.yaml", see the comments of the file for every option
+    '''
+    test: bool
+    parallel_categories: bool
+    max_quota_units_per_run: Optional[int]
+    request_executor: dict[str, any]
+    response_cache: dict[str, any]
+    channel_info_cache: dict[str, any]
+    checkpoint: dict[str, any]
+    streaming_storage: dict[str, any]
+    metrics: dict[str, any]
+    storage_backend: str
+    parquet_options: dict[str, any]
+    text_cleaning: dict[str, any]
+    incremental_collection: dict[str, any]
+    concurrent_collection: dict[str, any]
+    file_names_of_saved_data: dict[str, str]
+    snapshot_dataset: dict[str, any]
+    compaction: dict[str, any]
+    retention: dict[str, any]
+    folder_name_to_save_data: dict[str, str]
+    parent_folder_id_to_upload_data: dict[str, str]
+    google_service_account_file_path: str
+    google_drive_upload: dict[str, any]
+
+__loaded_configs: dict[str, tuple[tuple[int, int], Configs]] = {}
+__loaded_configs_lock: threading.Lock = threading.Lock()
+
+def load_configs(file_path: str = './configs.yaml') -> Configs:
+    """
+    load "configs.yaml", parsed once per process and shared by every caller (read-only), parsed again only when the file is modified
+
+    Example:
+        configs: Configs = load_configs()
+        FOLDER_PATHS: dict[str, str] = configs['folder_name_to_save_data']
+    """
+    file_path = os.path.abspath(file_path)
+    file_stat: os.stat_result = os.stat(file_path)
+    file_version: tuple[int, int] = (file_stat.st_mtime_ns, file_stat.st_size)
+
+    with __loaded_configs_lock:
+        loaded_configs: Optional[tuple[tuple[int, int], Configs]] = __loaded_configs.get(file_path)
+        if loaded_configs is not None and loaded_configs[0] == file_version:
+            return loaded_configs[1]
+
+        with open(file_path, 'r') as file:
+            configs: Configs = yaml.safe_load(file)
+        __loaded_configs[file_path] = (file_version, configs)
+        return configs
+
+def load_parquet_file(file_path: str) -> any:
+    from pandas import read_parquet
 
-def load_parquet_file(file_path: str) -> DataFrame:
     try:
         return read_parquet(file_path)
     except Exception as e:
@@ -33,20 +85,106 @@ def get_refined_time_string(time_s: float) -> str:
 
     return time_str
 
-def build_google_drive_service() -> any:
+def get_file_name_period(file_name: str) -> Optional[tuple[datetime, datetime]]:
+    """
+    get the period covered by a data file from the timestamp prefix of its name,
+    "YYYYMMDDHH" for the snapshot of a run, "YYYYMMDD" for a daily and "YYYYMM" for a monthly compacted file
+
+    Returns:
+        (period_start, period_end): the end is exclusive, None if the name has no timestamp prefix (e.g. "empty.txt")
+
+    Example:
+        period_start, period_end = get_file_name_period('20250218_video_info.parquet') # (2025-02-18 00:00, 2025-02-19 00:00)
+    """
+    file_timestamp: str = file_name.split('_', 1)[0]
+    if not file_timestamp.isdigit():
+        return None
+
+    try:
+        if len(file_timestamp) == 10:
+            period_start: datetime = datetime.strptime(file_timestamp, "%Y%m%d%H")
+            return period_start, period_start + timedelta(hours=1)
+        if len(file_timestamp) == 8:
+            period_start = datetime.strptime(file_timestamp, "%Y%m%d")
+            return period_start, period_start + timedelta(days=1)
+        if len(file_timestamp) == 6:
+            period_start = datetime.strptime(file_timestamp, "%Y%m")
+            return period_start, (period_start + timedelta(days=32)).replace(day=1)
+    except ValueError:
+        return None
+
+    return None
+
+__discovery_documents: dict[tuple[str, str], dict[str, any]] = {}
+__discovery_documents_lock: threading.Lock = threading.Lock()
+
+def build_google_api_service(service_name: str, version: str, root_url: Optional[str] = None, **build_arguments: any) -> any:
+    """
+    build the "service" object of a Google API from the discovery document bundled with "googleapiclient",
+    parsed once per process, so building a service does no network I/O
+
+    Args:
+        root_url: the root URL of another API server, e.g. a local stub server for benchmarks
+            (the upload and batch URLs are built from the root URL of the discovery document, not from "client_options")
+        build_arguments: passed to "googleapiclient.discovery.build_from_document", e.g. "developerKey" or "credentials"
+
+    Example:
+        youtube_service: any = build_google_api_service('youtube', 'v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
+    """
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    with __discovery_documents_lock:
+        discovery_document: Optional[dict[str, any]] = __discovery_documents.get((service_name, version))
+        if discovery_document is None:
+            discovery_document_text: Optional[str] = get_static_doc(service_name, version)
+            if discovery_document_text is None:
+                raise ValueError(f"\n\033[91mNo bundled discovery document of\033[0m: {service_name} {version}")
+            discovery_document = json.loads(discovery_document_text)
+            __discovery_documents[(service_name, version)] = discovery_document
+
+        if root_url is not None:
+            discovery_document = {**discovery_document, 'rootUrl': root_url}
+        # building fills in the parsed document once (same result every time), so it is shared under the lock
+        return build_from_document(discovery_document, **build_arguments)
+
+def load_google_drive_credentials() -> any:
+    """
+    load the service account credentials for the Google Drive API
+
+    Returns:
+        credentials: the credentials of "configs.yaml[google_service_account_file_path]"
+
+    Example:
+        credentials: any = load_google_drive_credentials()
+    """
+    from google.oauth2 import service_account
+
+    SCOPES: list[str] = ['https://www.googleapis.com/auth/drive']
+    GOOGLE_SERVICE_ACCOUNT_FILE_PATH: str = load_configs()['google_service_account_file_path']
+    return service_account.Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_FILE_PATH, scopes=SCOPES)
+
+def build_google_drive_service(credentials: any = None, api_endpoint: Optional[str] = None) -> any:
     """
     build the "service" object for the Google Drive API
 
+    Args:
+        credentials: credentials loaded by "load_google_drive_credentials", loaded from the service account file if not given
+        api_endpoint: the root URL of another Drive API server, e.g. a local stub server for benchmarks, no credentials are needed then
+
     Returns:
         service: the service object for the Google Drive API
 
     Example:
         google_drive_service: any = build_google_drive_service()
     """
-    SCOPES: list[str] = ['https://www.googleapis.com/auth/drive']
-    GOOGLE_SERVICE_ACCOUNT_FILE_PATH: str = load_configs()['google_service_account_file_path']
-    credentials = service_account.Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_FILE_PATH, scopes=SCOPES)
+    if api_endpoint is not None:
+        from google.auth.credentials import AnonymousCredentials
+        return build_google_api_service('drive', 'v3', root_url=api_endpoint, credentials=credentials if credentials is not None else AnonymousCredentials())
+
+    if credentials is None:
+        credentials = load_google_drive_credentials()
 
-    google_drive_service = build('drive', 'v3', credentials=credentials)
+    google_drive_service = build_google_api_service('drive', 'v3', credentials=credentials)
 
     return google_drive_service